@@ -0,0 +1,338 @@
+# admin_cli.py — headless admin commands with JSON output (never imports Kivy)
+#
+#   python admin_cli.py [--root DIR] users [--search TEXT]
+#   python admin_cli.py roots | mount DIR | unmount DIR
+#   python admin_cli.py queue [--limit N]
+#   python admin_cli.py claim --owner NAME [-n N] | decide --owner NAME --approve|--reject MOBILE/FILENAME...
+#   python admin_cli.py serve [--host 127.0.0.1] [--port 8765]   (HTTP API, see http_api.py)
+#   python admin_cli.py sync SRC_ROOT [--to DST_ROOT] [--dst-settings DIR] [--user MOBILE]...
+#   python admin_cli.py stats
+#   python admin_cli.py dupes [--link] [--min-size BYTES] [--top N]
+#   python admin_cli.py archive [--days N] [--unapproved-too] [--user MOBILE]...   (cold storage)
+#   python admin_cli.py uploads MOBILE [--approved | --unapproved] [--limit N]
+#   python admin_cli.py report [--out DIR]
+#   python admin_cli.py export MOBILE... --out FILE.zip [--since DATE] [--until DATE]
+#   python admin_cli.py approve|unapprove MOBILE/FILENAME... | --user MOBILE
+#   python admin_cli.py delete MOBILE
+#   python admin_cli.py trash | restore ENTRY [--root DIR] | purge [--days N]
+#
+# Every command covers all mounted roots (see `mount`), merged per user.
+from __future__ import annotations
+import os, sys, json, time, argparse
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from admin_store import AdminStore
+
+def _date(s: str) -> float:
+    return time.mktime(datetime.strptime(s, "%Y-%m-%d").timetuple())
+
+def _upload_paths(store: AdminStore, args) -> List[str]:
+    if args.user:
+        return [u.path for u in store.list_uploads_for_user(args.user)]
+    out = []
+    for item in args.items:
+        if os.path.sep in item and os.path.exists(item):
+            out.append(item)
+        else:
+            mobile, _, name = item.replace("\\", "/").partition("/")
+            out.append(os.path.join(store.uploads_dir(mobile), name))
+    return out
+
+def cmd_users(store: AdminStore, args):
+    mobiles = store.list_users(refresh=not args.no_refresh)
+    if args.search:
+        from user_index import UserIndex
+        idx = UserIndex()
+        idx.sync(store.user_dir, mobiles)
+        mobiles, _ = idx.search(args.search, limit=len(mobiles) or 1)
+    wanted = set(mobiles)
+    return [{"mobile": m, "files": n, "bytes": b, "approved": a}
+            for m, n, b, _i, _v, a, _lo, _hi in store.catalog.user_summary(store.roots)
+            if m in wanted]
+
+def cmd_stats(store: AdminStore, args):
+    size, images, videos = store.storage_stats(refresh=not args.no_refresh)
+    return {"root": store.root, "roots": store.roots, "users": len(store.list_users(refresh=False)),
+            "bytes": size, "images": images, "videos": videos}
+
+def cmd_roots(store: AdminStore, args):
+    per_root = store.stats_by_root(refresh=not args.no_refresh)
+    return [{"root": r, "primary": r == store.root, "users": len(store.catalog.users(r)),
+             "bytes": b, "images": i, "videos": v}
+            for r, (b, i, v) in per_root.items()]
+
+def cmd_mount(store: AdminStore, args):
+    if not store.mount_root(args.path):
+        raise ValueError(f"{args.path} has no users/ folder")
+    return {"roots": store.roots}
+
+def cmd_unmount(store: AdminStore, args):
+    return {"unmounted": store.unmount_root(args.path), "roots": store.roots}
+
+def cmd_uploads(store: AdminStore, args):
+    flt = True if args.approved else False if args.unapproved else None
+    return [{"path": u.path, "media_type": u.media_type, "created_at": u.created_at,
+             "approved": u.approved, "archived": u.archived}
+            for u in store.list_uploads_for_user(args.mobile, approved=flt, limit=args.limit)]
+
+def cmd_report(store: AdminStore, args):
+    from reports import build_report, write_report
+    if not args.no_refresh:
+        store.refresh()
+    report = build_report(store.catalog, store.roots, top=args.top)
+    if args.out:
+        return write_report(report, args.out, f"admin_report_{int(time.time())}")
+    return report
+
+def cmd_export(store: AdminStore, args):
+    from exporter import ExportJob
+    since = _date(args.since) if args.since else None
+    # --until is inclusive of that whole day
+    until = _date(args.until) + timedelta(days=1).total_seconds() - 1e-3 if args.until else None
+    return ExportJob(store, args.mobiles, args.out, since=since, until=until).run()
+
+def cmd_sync(store: AdminStore, args):
+    last = [0.0]
+
+    def progress(done, total, nbytes):
+        now = time.monotonic()
+        if now - last[0] >= 1.0 or done == total:
+            last[0] = now
+            print(f"{done}/{total} files, {nbytes} bytes", file=sys.stderr)
+
+    job = store.sync_job(args.src, args.to, dst_settings_dir=args.dst_settings,
+                         mobiles=args.user, workers=args.workers, force=args.force,
+                         progress=progress)
+    return job.run()   # if interrupted, the next run resumes from the partial copies
+
+def cmd_dupes(store: AdminStore, args):
+    if not args.no_refresh:
+        store.refresh()
+
+    def progress(files, groups, nbytes):
+        print(f"{files} files checked, {groups} duplicate groups, {nbytes} bytes reclaimable",
+              file=sys.stderr)
+
+    job = store.dedupe_job(workers=args.workers, min_size=args.min_size, link=args.link,
+                           top=args.top, progress=progress)
+    return job.run()
+
+def cmd_archive(store: AdminStore, args):
+    if not args.no_refresh:
+        store.refresh()
+    last = [0.0]
+
+    def progress(done, total, nbytes):
+        now = time.monotonic()
+        if now - last[0] >= 1.0 or done == total:
+            last[0] = now
+            print(f"{done}/{total} files, {nbytes} bytes", file=sys.stderr)
+
+    job = store.tiering_job(older_than_days=args.days, approved_only=not args.unapproved_too,
+                            mobiles=args.user, progress=progress)
+    return job.run()
+
+def _queue_item(item) -> dict:
+    return {"path": item.path, "root": item.root, "mobile": item.mobile, "name": item.name,
+            "created_at": item.created_at, "media_type": item.media_type,
+            "lease_expires": item.lease_expires}
+
+def cmd_queue(store: AdminStore, args):
+    if not args.no_refresh:
+        store.refresh()
+    rows = store.catalog.pending(store.roots, limit=args.limit)
+    return {"pending": store.catalog.pending_count(store.roots),
+            "oldest": [{"mobile": m, "name": n, "created_at": t, "media_type": mt}
+                       for _k, m, n, t, mt in rows]}
+
+def cmd_claim(store: AdminStore, args):
+    if not args.no_refresh:
+        store.refresh()
+    queue = store.moderation_queue(owner=args.owner, lease_seconds=args.lease)
+    queue.resume()
+    return [_queue_item(i) for i in queue.claim(args.n)]
+
+def cmd_decide(store: AdminStore, args):
+    queue = store.moderation_queue(owner=args.owner)
+    mine = {(i.mobile, i.name): i for i in queue.resume()}
+    wanted = [(m, n) for m, _, n in (x.replace("\\", "/").partition("/") for x in args.items)]
+    missing = [f"{m}/{n}" for m, n in wanted if (m, n) not in mine]
+    if missing:
+        raise ValueError(f"not claimed by {args.owner} (or lease expired): {', '.join(missing)}")
+    return {"decided": queue.decide([mine[k] for k in wanted], args.approve)}
+
+def cmd_serve(store: AdminStore, args):
+    from http_api import make_server
+    server = make_server(store, args.host, args.port, max_clients=args.max_clients)
+    print(f"Serving http://{args.host}:{server.server_address[1]}/api/stats", file=sys.stderr)
+    print(f"POST token (also in {os.path.join(store.settings_dir, 'api_token')}): {server.token}",
+          file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return {"stopped": True}
+
+def cmd_approve(store: AdminStore, args):
+    return {"approved": store.approve_many(_upload_paths(store, args))}
+
+def cmd_unapprove(store: AdminStore, args):
+    return {"unapproved": store.reject_many(_upload_paths(store, args))}
+
+def _wait_trash(store: AdminStore, errors: list) -> Optional[str]:
+    store.shutdown_trash(wait=True)   # let a cross-device copy finish before exiting
+    return errors[0] if errors else None
+
+def cmd_delete(store: AdminStore, args):
+    errors: list = []
+    ok = store.delete_user(args.mobile, done=lambda err: err and errors.append(err))
+    err = _wait_trash(store, errors)
+    return {"mobile": args.mobile, "deleted": ok and err is None, "error": err}
+
+def cmd_trash(store: AdminStore, args):
+    return store.trash_entries()
+
+def cmd_restore(store: AdminStore, args):
+    errors: list = []
+    store.restore_user(args.entry, root=args.root_of_entry,
+                       done=lambda err: err and errors.append(err))
+    err = _wait_trash(store, errors)
+    return {"entry": args.entry, "restored": err is None, "error": err}
+
+def cmd_purge(store: AdminStore, args):
+    entries, freed = store.purge_trash(args.days)
+    return {"purged": entries, "bytes": freed}
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="admin_cli", description="MyCameraApp admin tools (JSON output)")
+    p.add_argument("--root", help="data root containing users/ (default: saved or discovered)")
+    p.add_argument("--settings-dir", help="admin settings/catalog directory")
+    p.add_argument("--no-refresh", action="store_true", help="answer from the catalog without rescanning")
+    p.add_argument("--indent", type=int, default=None, help="pretty-print JSON")
+    sub = p.add_subparsers(dest="command", required=True)
+
+    s = sub.add_parser("users", help="list users with upload counts")
+    s.add_argument("--search", help="substring of mobile, name, district or state")
+    s.set_defaults(func=cmd_users)
+
+    s = sub.add_parser("stats", help="storage totals")
+    s.set_defaults(func=cmd_stats)
+
+    s = sub.add_parser("dupes", help="find identical uploads across users (reclaimable bytes per user)")
+    s.add_argument("--link", action="store_true", help="replace duplicates with hardlinks to the oldest copy")
+    s.add_argument("--min-size", type=int, default=1, help="ignore files smaller than this many bytes")
+    s.add_argument("--top", type=int, default=20, help="largest duplicate groups to list")
+    s.add_argument("--workers", type=int, default=4)
+    s.set_defaults(func=cmd_dupes)
+
+    s = sub.add_parser("archive", help="move old uploads into per-user monthly archives")
+    s.add_argument("--days", type=float, default=180, help="only uploads older than this")
+    s.add_argument("--unapproved-too", action="store_true", help="not just approved uploads")
+    s.add_argument("--user", action="append", help="only this mobile (repeatable)")
+    s.set_defaults(func=cmd_archive)
+
+    s = sub.add_parser("roots", help="mounted data roots with per-root totals")
+    s.set_defaults(func=cmd_roots)
+
+    s = sub.add_parser("mount", help="add another data root to the merged view")
+    s.add_argument("path")
+    s.set_defaults(func=cmd_mount)
+
+    s = sub.add_parser("unmount", help="drop a secondary data root")
+    s.add_argument("path")
+    s.set_defaults(func=cmd_unmount)
+
+    s = sub.add_parser("uploads", help="list one user's uploads, newest first")
+    s.add_argument("mobile")
+    g = s.add_mutually_exclusive_group()
+    g.add_argument("--approved", action="store_true")
+    g.add_argument("--unapproved", action="store_true")
+    s.add_argument("--limit", type=int)
+    s.set_defaults(func=cmd_uploads)
+
+    s = sub.add_parser("report", help="usage report (JSON to stdout, or JSON+CSV files with --out)")
+    s.add_argument("--out", help="directory for report files")
+    s.add_argument("--top", type=int, default=10)
+    s.set_defaults(func=cmd_report)
+
+    s = sub.add_parser("export", help="write users' uploads into a .zip/.tar/.tar.gz")
+    s.add_argument("mobiles", nargs="+")
+    s.add_argument("--out", required=True, help="archive path")
+    s.add_argument("--since", help="YYYY-MM-DD")
+    s.add_argument("--until", help="YYYY-MM-DD (inclusive)")
+    s.set_defaults(func=cmd_export)
+
+    s = sub.add_parser("queue", help="unreviewed uploads of all users, oldest first (no claim)")
+    s.add_argument("--limit", type=int, default=20)
+    s.set_defaults(func=cmd_queue)
+
+    s = sub.add_parser("claim", help="lease the next unreviewed uploads for review")
+    s.add_argument("--owner", required=True, help="reviewer name; use the same one for decide")
+    s.add_argument("-n", type=int, default=20)
+    s.add_argument("--lease", type=float, default=900, help="seconds before unreviewed claims expire")
+    s.set_defaults(func=cmd_claim)
+
+    s = sub.add_parser("decide", help="approve or reject uploads you claimed")
+    s.add_argument("--owner", required=True)
+    g = s.add_mutually_exclusive_group(required=True)
+    g.add_argument("--approve", action="store_true")
+    g.add_argument("--reject", action="store_true")
+    s.add_argument("items", nargs="+", help="MOBILE/FILENAME")
+    s.set_defaults(func=cmd_decide)
+
+    s = sub.add_parser("serve", help="local HTTP API over the catalog (Ctrl+C to stop); "
+                                     "POSTs need the printed per-run token")
+    s.add_argument("--host", default="127.0.0.1")
+    s.add_argument("--port", type=int, default=8765)
+    s.add_argument("--max-clients", type=int, default=64)
+    s.set_defaults(func=cmd_serve)
+
+    s = sub.add_parser("sync", help="copy new/changed uploads and profiles from another root")
+    s.add_argument("src", help="device root containing users/")
+    s.add_argument("--to", help="destination root (default: the primary root)")
+    s.add_argument("--dst-settings", help="settings dir of the destination admin (carries approvals)")
+    s.add_argument("--user", action="append", help="only this mobile (repeatable)")
+    s.add_argument("--workers", type=int, default=4)
+    s.add_argument("--force", action="store_true", help="re-check users whose folders look unchanged")
+    s.set_defaults(func=cmd_sync)
+
+    for name, func in (("approve", cmd_approve), ("unapprove", cmd_unapprove)):
+        s = sub.add_parser(name, help=f"{name} uploads given as MOBILE/FILENAME or paths")
+        s.add_argument("items", nargs="*")
+        s.add_argument("--user", help=f"{name} every upload of this user")
+        s.set_defaults(func=func)
+
+    s = sub.add_parser("delete", help="move a user to trash")
+    s.add_argument("mobile")
+    s.set_defaults(func=cmd_delete)
+
+    s = sub.add_parser("trash", help="list trash entries, newest first")
+    s.set_defaults(func=cmd_trash)
+
+    s = sub.add_parser("restore", help="move a trash entry back to users/")
+    s.add_argument("entry")
+    s.add_argument("--root", dest="root_of_entry", help="only the trash of this root")
+    s.set_defaults(func=cmd_restore)
+
+    s = sub.add_parser("purge", help="permanently delete old trash entries")
+    s.add_argument("--days", type=float, default=30)
+    s.set_defaults(func=cmd_purge)
+    return p
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    try:
+        store = AdminStore(root=args.root, settings_dir=args.settings_dir)
+        result = args.func(store, args)
+    except Exception as e:
+        print(json.dumps({"error": str(e)}), file=sys.stderr)
+        return 1
+    json.dump(result, sys.stdout, indent=args.indent)
+    sys.stdout.write("\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
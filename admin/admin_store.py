@@ -0,0 +1,501 @@
+# admin_store.py — Kivy-free core of the admin tools (used by main.py and admin_cli.py)
+from __future__ import annotations
+import os, sys, time, json, threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from catalog import Catalog
+from approvals import ApprovalStore, split_upload_path
+from root_discovery import RootDiscovery, looks_like_users_root
+from trash import TrashBin
+
+def _detect_platform() -> str:
+    # same names as kivy.utils.platform, without importing Kivy
+    if "ANDROID_ARGUMENT" in os.environ or "ANDROID_PRIVATE" in os.environ:
+        return "android"
+    if sys.platform in ("win32", "cygwin"):
+        return "win"
+    if sys.platform == "darwin":
+        return "macosx"
+    if sys.platform.startswith(("linux", "freebsd")):
+        return "linux"
+    return "unknown"
+
+platform = _detect_platform()
+
+APP_FOLDER_NAME = "MyCameraApp"  # legacy shared-folder option
+
+def _android_shared_root() -> str:
+    try:
+        from android.storage import primary_external_storage_path
+        base = primary_external_storage_path()
+        return os.path.join(base, APP_FOLDER_NAME)
+    except Exception:
+        return os.path.join("/sdcard", APP_FOLDER_NAME)
+
+def _looks_like_users_root(path: str) -> bool:
+    return looks_like_users_root(path)
+
+def _win_candidates() -> List[str]:
+    cands = []
+    home = os.path.expanduser("~")
+    local = os.getenv("LOCALAPPDATA") or os.path.join(home, "AppData", "Local")
+    roaming = os.getenv("APPDATA") or os.path.join(home, "AppData", "Roaming")
+    for root in (local, roaming):
+        for appname in ("PhotoApp", "photoapp", "MyCameraApp", "mycameraapp"):
+            cands.append(os.path.join(root, appname))
+    for root in (local, roaming):
+        try:
+            for name in os.listdir(root)[:200]:
+                cands.append(os.path.join(root, name))
+        except Exception:
+            pass
+    cands.append(os.path.join(home, APP_FOLDER_NAME))
+    return cands
+
+def _root_candidates() -> List[str]:
+    if platform == "win":
+        return _win_candidates()
+    return [
+        os.path.join(os.path.expanduser("~"), ".local", "share", "PhotoApp"),
+        os.path.join(os.path.expanduser("~"), APP_FOLDER_NAME),
+    ]
+
+def default_users_root(discovery: Optional[RootDiscovery] = None) -> str:
+    env = os.getenv("MYCAM_USERS_ROOT")
+    if env and _looks_like_users_root(env):
+        return env
+    if platform == "android":
+        return _android_shared_root()
+    cands = _root_candidates()
+    if discovery is not None:
+        # cached last-known-good first, then a time-boxed probe
+        found = discovery.find(cands)
+        if found:
+            return found
+    else:
+        for p in cands:
+            if _looks_like_users_root(p):
+                return p
+    return os.path.join(os.path.expanduser("~"), APP_FOLDER_NAME)
+
+def _archive_index(user_dir: str) -> Dict[str, dict]:
+    from tiering import read_index   # cheap, but keeps zipfile off the startup path
+    return read_index(user_dir)
+
+@dataclass
+class Upload:
+    path: str
+    media_type: str  # 'image' or 'video'
+    created_at: float
+    approved: bool = False
+    root: str = ""   # data root the file was found in
+    archived: bool = False   # only in users/<mobile>/archive (see tiering.py); read via local_path()
+
+class AdminStore:
+    """
+    <ROOT>/
+    users/<mobile>/uploads/<mobile>_YYYYMMDD_<n>.(jpg|mp4)
+    trash/<ts>_<mobile>/  (+ <ts>_<mobile>.trash.json, see trash.py)
+
+    Listings and stats are served from a SQLite catalog in settings_dir
+    that only re-lists folders whose mtime changed (see catalog.py).
+
+    Several roots (e.g. one dump per device) can be mounted at once:
+    ``roots`` lists them, primary (``root``) first. Users, uploads and
+    stats are merged across all of them, each Upload records its root,
+    and refreshes run per root in parallel; the catalog caches every root
+    separately, so mounting another one never rescans the rest.
+    """
+    def __init__(self, root: Optional[str] = None, settings_dir: Optional[str] = None):
+        self.settings_dir = settings_dir or os.path.join(os.path.expanduser("~"), ".admin_mycam")
+        os.makedirs(self.settings_dir, exist_ok=True)
+        self._settings_path = os.path.join(self.settings_dir, "settings.json")
+        self._approved_path = os.path.join(self.settings_dir, "approved.json")  # ADD THIS LINE
+
+        saved_root, saved_roots = None, []
+        try:
+            if os.path.exists(self._settings_path):
+                with open(self._settings_path, "r", encoding="utf-8") as f:
+                    saved = json.load(f) or {}
+                saved_root, saved_roots = saved.get("root"), saved.get("roots") or []
+        except Exception:
+            saved_root, saved_roots = None, []
+
+        self.discovery = RootDiscovery(os.path.join(self.settings_dir, "root_cache.json"))
+        self.root_guessed = not (root or saved_root)
+        self.root = root or saved_root or default_users_root(self.discovery)
+        self.users_dir = os.path.join(self.root, "users")
+        self.trash_dir = os.path.join(self.root, "trash")
+        os.makedirs(self.users_dir, exist_ok=True)
+        os.makedirs(self.trash_dir, exist_ok=True)
+        # extra roots mounted last session; skip ones that are gone (unplugged drive)
+        self.roots: List[str] = [self.root] + [
+            r for r in saved_roots
+            if Catalog._key(r) != Catalog._key(self.root) and _looks_like_users_root(r)]
+        self._bins: Dict[str, TrashBin] = {}
+        self._bins_lock = threading.Lock()
+        
+        self._load_approved_status()  # ADD THIS LINE
+        self.catalog = Catalog(os.path.join(self.settings_dir, "catalog.sqlite"),
+                               status_lookup=self.approvals.statuses,
+                               archive_lookup=_archive_index)
+        self._scanner = None
+        self._root_pool: Optional[ThreadPoolExecutor] = None
+        self._sync_state = None
+        self._rehydrated = None
+        self._rehydrated_lock = threading.Lock()
+        self.rehydrate_budget = 2 * 1024 ** 3   # bytes of archived originals kept extracted
+        self._user_roots: Dict[str, List[str]] = {}
+
+    # ---- approval tracking (journaled, keyed by users/<mobile>/uploads/<file>) ----
+    def _load_approved_status(self):
+        """Open the approval journal, importing a legacy approved.json once"""
+        self.approvals = ApprovalStore(self.settings_dir)
+        if os.path.exists(self._approved_path):
+            try:
+                with open(self._approved_path, "r", encoding="utf-8") as f:
+                    self.approvals.import_legacy(json.load(f) or {}, self.users_dir)
+                os.replace(self._approved_path, self._approved_path + ".migrated")
+            except Exception:
+                pass
+
+    def _approval_key(self, file_path: str):
+        return split_upload_path(file_path, self.users_dir)
+
+    def _paths_for(self, keys) -> List[str]:
+        return [os.path.join(self.uploads_dir(m), n) for m, n in keys]
+
+    def toggle_approval(self, file_path: str) -> bool:
+        """Toggle approval status for a file"""
+        key = self._approval_key(file_path)
+        if key is None:
+            return False
+        value = self.approvals.toggle(*key)
+        self.catalog.set_approved([key], value)
+        return value
+
+    def is_approved(self, file_path: str) -> bool:
+        """Check if file is approved"""
+        key = self._approval_key(file_path)
+        return bool(key) and self.approvals.is_approved(*key)
+
+    def approve_many(self, file_paths) -> int:
+        """Approve many uploads with a single journal append"""
+        keys = [k for k in map(self._approval_key, file_paths) if k]
+        self.catalog.set_approved(keys, True)
+        return self.approvals.approve_many(keys)
+
+    def reject_many(self, file_paths) -> int:
+        """Un-approve many uploads with a single journal append"""
+        keys = [k for k in map(self._approval_key, file_paths) if k]
+        self.catalog.set_approved(keys, False)
+        return self.approvals.reject_many(keys)
+
+    def approval_counts(self, mobile: str) -> dict:
+        """{'total', 'approved', 'unapproved'} for one user across all roots, from the index"""
+        mobile = str(mobile)
+        roots = self.roots_of(mobile)
+        self._each_root(lambda r: self.catalog.refresh_user(r, mobile), roots)
+        total, approved = self.catalog.user_counts(roots, mobile)
+        return {"total": total, "approved": approved, "unapproved": total - approved}
+
+    def get_approved_files(self) -> List[str]:
+        """Get list of all approved file paths"""
+        return self._paths_for(self.approvals.items(True))
+
+    def get_unapproved_files(self) -> List[str]:
+        """Get list of all unapproved file paths"""
+        return self._paths_for(self.approvals.items(False))
+
+    # KEEP ALL YOUR EXISTING METHODS AS THEY ARE (save_root, set_root, list_users, etc.)
+    def save_root(self, path: str):
+        os.makedirs(self.settings_dir, exist_ok=True)
+        with open(self._settings_path, "w", encoding="utf-8") as f:
+            json.dump({"root": path, "roots": [r for r in self.roots if r != path]}, f)
+
+    def set_root(self, path: str) -> bool:
+        """Make ``path`` the primary root (other mounted roots stay mounted)."""
+        if not _looks_like_users_root(path):
+            return False
+        self.roots = [path] + [r for r in self.roots[1:] if Catalog._key(r) != Catalog._key(path)]
+        self.root = path
+        self.users_dir = os.path.join(self.root, "users")
+        self.trash_dir = os.path.join(self.root, "trash")
+        self.save_root(path)
+        self.discovery.remember(path)
+        self.root_guessed = False
+        return True
+
+    def mount_root(self, path: str) -> bool:
+        """Add another data root to the merged view; nothing is rescanned until the next refresh."""
+        if not _looks_like_users_root(path):
+            return False
+        if Catalog._key(path) not in {Catalog._key(r) for r in self.roots}:
+            self.roots.append(path)
+            self.save_root(self.root)
+            self.discovery.remember(path)
+        return True
+
+    def unmount_root(self, path: str) -> bool:
+        """Drop a secondary root from the view (its catalog rows stay cached for a later remount)."""
+        key = Catalog._key(path)
+        if key == Catalog._key(self.root):
+            return False
+        kept = [r for r in self.roots if Catalog._key(r) != key]
+        if len(kept) == len(self.roots):
+            return False
+        self.roots = kept
+        self.save_root(self.root)
+        with self._bins_lock:
+            bin_ = self._bins.pop(key, None)
+        if bin_ is not None:
+            bin_.shutdown()
+        return True
+
+    def _each_root(self, fn, roots: Optional[List[str]] = None) -> list:
+        """``fn(root)`` for each root, in parallel when there are several."""
+        roots = self.roots if roots is None else roots
+        if len(roots) < 2:
+            return [fn(r) for r in roots]
+        if self._root_pool is None:
+            self._root_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="roots")
+        return list(self._root_pool.map(fn, roots))
+
+    def refresh(self, force: bool = False) -> int:
+        """Rescan changed folders of every root; cheap when nothing changed."""
+        return sum(self._each_root(lambda r: self.catalog.refresh(r, force=force)))
+
+    @property
+    def scanner(self):
+        """Background refresh service, created on first use (the CLI never needs it)."""
+        if self._scanner is None:
+            from scanner import ScanService
+            self._scanner = ScanService(self.catalog)
+        return self._scanner
+
+    def scan_async(self, force: bool = False, **callbacks):
+        """Refresh the catalog in the background (see ScanService.scan)."""
+        on_users = callbacks.pop("on_users", None)
+
+        def users_listed(mobiles):
+            self._load_user_roots()
+            if on_users:
+                on_users(mobiles)
+        return self.scanner.scan(list(self.roots), force=force, on_users=users_listed, **callbacks)
+
+    def _load_user_roots(self) -> None:
+        by_key = {Catalog._key(r): r for r in self.roots}
+        self._user_roots = {m: [by_key[k] for k in keys if k in by_key]
+                            for m, keys in self.catalog.user_roots(self.roots).items()}
+
+    def list_users(self, refresh: bool = True) -> List[str]:
+        """Mobiles present in any mounted root."""
+        if refresh:
+            self.refresh()
+        self._load_user_roots()
+        return sorted(self._user_roots)
+
+    def roots_of(self, mobile: str) -> List[str]:
+        """Mounted roots holding ``mobile``, primary first (all roots if unknown yet)."""
+        mobile = str(mobile)
+        found = self._user_roots.get(mobile)
+        if found is None:
+            by_key = {Catalog._key(r): r for r in self.roots}
+            keys = self.catalog.user_roots(self.roots, mobile).get(mobile, [])
+            found = [by_key[k] for k in keys if k in by_key]
+        order = {r: i for i, r in enumerate(self.roots)}
+        return sorted(found, key=lambda r: order.get(r, len(order))) or list(self.roots)
+
+    def user_dir(self, mobile: str) -> str:
+        """users/<mobile> in the first root that has it (the primary root for new users)."""
+        for r in self.roots_of(mobile):
+            d = os.path.join(r, "users", str(mobile))
+            if os.path.isdir(d):
+                return d
+        return os.path.join(self.users_dir, str(mobile))
+
+    def uploads_dir(self, mobile: str) -> str:
+        return os.path.join(self.user_dir(mobile), "uploads")
+
+    def list_uploads_for_user(self, mobile: str, approved: Optional[bool] = None,
+                              limit: Optional[int] = None, offset: int = 0,
+                              refresh: bool = True) -> List[Upload]:
+        """Newest first across roots; ``approved`` filters by status, ``limit``/``offset`` page."""
+        mobile = str(mobile)
+        roots = self.roots_of(mobile)
+        if refresh:
+            self._each_root(lambda r: self.catalog.refresh_user(r, mobile), roots)
+        by_key = {Catalog._key(r): r for r in roots}
+        rows = self.catalog.uploads(roots, mobile, approved=approved, limit=limit, offset=offset)
+        return [Upload(path=os.path.join(by_key[k], "users", mobile, "uploads", name),
+                       media_type=mt, created_at=ts, approved=ok, root=by_key[k], archived=arc)
+                for k, name, _size, ts, mt, ok, arc in rows]
+
+    def storage_stats(self, refresh: bool = True):
+        """(total_bytes, images, videos) across all users of all roots."""
+        if refresh:
+            self.refresh()
+        return self.catalog.stats(self.roots)
+
+    def stats_by_root(self, refresh: bool = True) -> Dict[str, Tuple[int, int, int]]:
+        """{root: (total_bytes, images, videos)}, refreshed in parallel."""
+        def one(r):
+            if refresh:
+                self.catalog.refresh(r)
+            return self.catalog.stats(r)
+        return dict(zip(self.roots, self._each_root(one)))
+
+    # ---- cold storage (see tiering.py) ----
+    def tiering_job(self, **kw):
+        """
+        A TieringJob moving old (by default approved) uploads of all roots
+        into per-user, per-month archives. Call run() or start().
+        """
+        from tiering import TieringJob
+        return TieringJob(self, **kw)
+
+    def upload_stat(self, path: str):
+        """os.stat() of an upload, or its archived size/mtime; raises FileNotFoundError."""
+        try:
+            return os.stat(path)
+        except FileNotFoundError:
+            from tiering import archived_stat
+            st = archived_stat(os.path.dirname(os.path.dirname(path)), os.path.basename(path))
+            if st is None:
+                raise
+            return st
+
+    def local_path(self, path: str) -> Optional[str]:
+        """A readable file for upload ``path``: itself, or a copy rehydrated from its archive."""
+        if os.path.isfile(path):
+            return path
+        from tiering import RehydrationCache
+        with self._rehydrated_lock:   # called from thumbnail and preview workers
+            if self._rehydrated is None:
+                self._rehydrated = RehydrationCache(os.path.join(self.settings_dir, "rehydrated"),
+                                                    self.rehydrate_budget)
+        return self._rehydrated.fetch(os.path.dirname(os.path.dirname(path)), os.path.basename(path))
+
+    def moderation_queue(self, **kw):
+        """Global queue of unreviewed uploads with claim/lease (see moderation.py)."""
+        from moderation import ModerationQueue
+        return ModerationQueue(self, **kw)
+
+    # ---- sync (device root -> central root, see sync.py) ----
+    def sync_job(self, src_root: str, dst_root: Optional[str] = None, *,
+                 dst_settings_dir: Optional[str] = None, **kw):
+        """
+        A SyncJob copying new/changed uploads and profiles from ``src_root``
+        into ``dst_root`` (default: the primary root). Approval flags are
+        shared within this store; pass the settings dir of the admin that
+        owns ``dst_root`` to carry them over to it too. Call run() or start().
+        """
+        from sync import SyncJob
+        approvals_dst = ApprovalStore(dst_settings_dir) if dst_settings_dir else self.approvals
+        return SyncJob(src_root, dst_root or self.root, state=self._hash_state(),
+                       approvals_src=self.approvals, approvals_dst=approvals_dst, **kw)
+
+    def _hash_state(self):
+        """The SyncState (file hash cache) shared by sync and duplicate jobs."""
+        from sync import SyncState
+        if self._sync_state is None:
+            self._sync_state = SyncState(os.path.join(self.settings_dir, "sync_state.sqlite"))
+        return self._sync_state
+
+    def dedupe_job(self, **kw):
+        """
+        A DedupeJob over all mounted roots: identical uploads across users,
+        reclaimable bytes per user, optionally hardlinked (``link=True``).
+        Uses the catalog as it stands; refresh() first. Call run() or start().
+        """
+        from dedupe import DedupeJob
+        return DedupeJob(self.catalog, self.roots, state=self._hash_state(), **kw)
+
+    # ---- trash (one bin per root, next to its users/) ----
+    def trash_for(self, root: str) -> TrashBin:
+        key = Catalog._key(root)
+        with self._bins_lock:
+            bin_ = self._bins.get(key)
+            if bin_ is None:
+                bin_ = self._bins[key] = TrashBin(os.path.join(root, "trash"))
+            return bin_
+
+    @property
+    def trash(self) -> TrashBin:
+        return self.trash_for(self.root)
+
+    def delete_user(self, mobile: str, *, progress=None, done=None) -> bool:
+        """
+        Move a user to trash in every root that has them. Returns once the
+        folders have left users/ (renames); if a trash/ is on another device
+        the copy continues in the background, reporting via
+        ``progress(done, total)`` and a single ``done(error)`` at the end.
+        """
+        mobile = str(mobile)
+        srcs = [(r, os.path.join(r, "users", mobile)) for r in self.roots_of(mobile)]
+        srcs = [(r, src) for r, src in srcs if os.path.isdir(src)]
+        if not srcs:
+            return False
+        pending = [len(srcs)]
+        errors: List[str] = []
+        lock = threading.Lock()
+
+        def one_done(err):
+            with lock:
+                if err:
+                    errors.append(err)
+                pending[0] -= 1
+                last = pending[0] == 0
+            if last and done:
+                done(errors[0] if errors else None)
+
+        entry = f"{int(time.time())}_{mobile}"
+        moved = []
+        for r, src in srcs:
+            try:
+                self.trash_for(r).move(src, entry, progress=progress, done=one_done)
+                moved.append(r)
+            except OSError as e:
+                one_done(str(e))
+        self._each_root(lambda r: self.catalog.refresh_users(r, force=True), moved)
+        self._user_roots.pop(mobile, None)
+        return bool(moved)
+
+    def restore_user(self, entry: str, *, root: Optional[str] = None,
+                     progress=None, done=None) -> None:
+        """Move a trash entry back to users/ in ``root`` (default: every root whose trash has it)."""
+        roots = [root] if root else [r for r in self.roots
+                                     if os.path.isdir(os.path.join(r, "trash", entry))]
+        if not roots:
+            raise FileNotFoundError(entry)
+        for r in roots:
+            def finished(err, r=r):
+                if err is None:
+                    self.catalog.refresh_users(r, force=True)
+                    self._user_roots.clear()
+                if done:
+                    done(err)
+            self.trash_for(r).restore(entry, progress=progress, done=finished)
+
+    def trash_entries(self) -> List[dict]:
+        """Trash of every root, newest first; each entry also names its ``root``."""
+        out = [dict(e, root=r) for r in self.roots for e in self.trash_for(r).entries()]
+        out.sort(key=lambda e: -e["deleted_at"])
+        return out
+
+    def purge_trash(self, max_age_days: float = 30):
+        """Permanently delete trash entries older than ``max_age_days``; (entries, bytes)."""
+        results = self._each_root(lambda r: self.trash_for(r).purge(max_age_days * 86400))
+        return sum(n for n, _ in results), sum(b for _, b in results)
+
+    def recover_trash(self) -> int:
+        """Resume trash moves interrupted last session, in every root."""
+        return sum(self.trash_for(r).recover() for r in self.roots)
+
+    def shutdown_trash(self, wait: bool = False) -> None:
+        with self._bins_lock:
+            bins = list(self._bins.values())
+        for bin_ in bins:
+            bin_.shutdown(wait=wait)
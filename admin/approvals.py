@@ -0,0 +1,193 @@
+# approvals.py — append-only approval journal for AdminStore
+from __future__ import annotations
+import os, json, threading
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+Key = Tuple[str, str]  # (mobile, filename) == users/<mobile>/uploads/<filename>
+
+def split_upload_path(path: str, users_dir: Optional[str] = None) -> Optional[Key]:
+    """Map an upload path to (mobile, filename), independent of where the root lives."""
+    p = os.path.normpath(path)
+    if users_dir:
+        try:
+            rel = os.path.relpath(p, os.path.normpath(users_dir))
+        except ValueError:
+            rel = None
+        if rel and not rel.startswith(".."):
+            parts = rel.split(os.sep)
+            if len(parts) == 3 and parts[1] == "uploads":
+                return parts[0], parts[2]
+    parts = p.split(os.sep)
+    if len(parts) >= 4 and parts[-2] == "uploads" and parts[-4] == "users":
+        return parts[-3], parts[-1]
+    return None
+
+class ApprovalStore:
+    """
+    Approval flags keyed by root-relative upload (mobile, filename).
+
+      settings_dir/
+        approvals.json   # compacted snapshot {"users": {mobile: {filename: bool}}}
+        approvals.log    # JSON lines appended since the snapshot
+
+    Every change is one appended line (a bulk change is still one line), so
+    toggling costs O(1) I/O regardless of how many files are tracked. The
+    journal is folded into the snapshot once it reaches ``compact_every``
+    lines. In memory, flags are indexed by mobile and by status (approved /
+    explicitly un-approved), so per-user counts and lists never scan other
+    users' entries.
+    """
+    def __init__(self, settings_dir: str, *, compact_every: int = 5000):
+        self.settings_dir = settings_dir
+        os.makedirs(settings_dir, exist_ok=True)
+        self.snapshot_path = os.path.join(settings_dir, "approvals.json")
+        self.journal_path = os.path.join(settings_dir, "approvals.log")
+        self.compact_every = compact_every
+        self._lock = threading.RLock()
+        self._approved: Dict[str, Set[str]] = {}
+        self._rejected: Dict[str, Set[str]] = {}
+        self._journal_lines = 0
+        self._journal = None
+        self._load()
+
+    # ---- persistence ----
+    def _load(self) -> None:
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                users = (json.load(f) or {}).get("users") or {}
+            for mob, files in users.items():
+                for v in (True, False):
+                    self._apply([(mob, n) for n, fv in files.items() if bool(fv) == v], v)
+        except FileNotFoundError:
+            pass
+        except Exception:
+            pass
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue   # torn last line after a crash
+                    self._apply([tuple(k) for k in rec.get("items", [])], bool(rec.get("v")))
+                    self._journal_lines += 1
+        except FileNotFoundError:
+            pass
+        if self._journal_lines >= self.compact_every:
+            self.compact()
+
+    def _apply(self, items: Iterable[Key], value: bool) -> None:
+        add, drop = (self._approved, self._rejected) if value else (self._rejected, self._approved)
+        for mob, name in items:
+            add.setdefault(mob, set()).add(name)
+            other = drop.get(mob)
+            if other:
+                other.discard(name)
+                if not other:
+                    del drop[mob]
+
+    def _snapshot(self) -> Dict[str, Dict[str, bool]]:
+        users: Dict[str, Dict[str, bool]] = {}
+        for index, v in ((self._approved, True), (self._rejected, False)):
+            for mob, names in index.items():
+                files = users.setdefault(mob, {})
+                for n in names:
+                    files[n] = v
+        return users
+
+    def _append(self, items: List[Key], value: bool) -> None:
+        if self._journal is None:
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write(json.dumps({"v": value, "items": items}, separators=(",", ":")) + "\n")
+        self._journal.flush()
+        self._journal_lines += 1
+        if self._journal_lines >= self.compact_every:
+            self.compact()
+
+    def compact(self) -> None:
+        """Write a fresh snapshot and truncate the journal."""
+        with self._lock:
+            tmp = self.snapshot_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": 1, "users": self._snapshot()}, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.snapshot_path)
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            # replaying old lines over the new snapshot is harmless, so a
+            # crash before this truncate loses nothing
+            open(self.journal_path, "w").close()
+            self._journal_lines = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def import_legacy(self, approved: Dict[str, bool], users_dir: str) -> int:
+        """Adopt an old approved.json ({abs_path: bool}); returns entries kept."""
+        items: Dict[bool, List[Key]] = {True: [], False: []}
+        for path, v in approved.items():
+            key = split_upload_path(path, users_dir)
+            if key:
+                items[bool(v)].append(key)
+        with self._lock:
+            for v, keys in items.items():
+                self._apply(keys, v)
+            self.compact()
+        return len(items[True]) + len(items[False])
+
+    # ---- API ----
+    def is_approved(self, mobile: str, name: str) -> bool:
+        return name in self._approved.get(mobile, ())
+
+    def set_many(self, items: Iterable[Key], value: bool) -> int:
+        items = [(str(m), str(n)) for m, n in items]
+        if not items:
+            return 0
+        with self._lock:
+            self._apply(items, value)
+            self._append(items, value)
+        return len(items)
+
+    def toggle(self, mobile: str, name: str) -> bool:
+        with self._lock:
+            value = not self.is_approved(mobile, name)
+            self.set_many([(mobile, name)], value)
+        return value
+
+    def approve_many(self, items: Iterable[Key]) -> int:
+        return self.set_many(items, True)
+
+    def reject_many(self, items: Iterable[Key]) -> int:
+        return self.set_many(items, False)
+
+    def approved_names(self, mobile: str) -> FrozenSet[str]:
+        with self._lock:
+            return frozenset(self._approved.get(mobile, ()))
+
+    def status(self, mobile: str, name: str) -> Optional[bool]:
+        """True/False if reviewed, None if never reviewed."""
+        if name in self._approved.get(mobile, ()):
+            return True
+        if name in self._rejected.get(mobile, ()):
+            return False
+        return None
+
+    def statuses(self, mobile: str) -> Dict[str, bool]:
+        """Explicit flags of one user: filename -> approved (never-reviewed files are absent)."""
+        with self._lock:
+            out = {n: False for n in self._rejected.get(mobile, ())}
+            out.update((n, True) for n in self._approved.get(mobile, ()))
+        return out
+
+    def approved_count(self, mobile: str) -> int:
+        return len(self._approved.get(mobile, ()))
+
+    def items(self, value: bool) -> List[Key]:
+        index = self._approved if value else self._rejected
+        with self._lock:
+            return [(m, n) for m, names in index.items() for n in names]
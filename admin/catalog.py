@@ -0,0 +1,410 @@
+# catalog.py — persistent SQLite index of users/uploads for AdminStore
+from __future__ import annotations
+import os, json, glob, time, sqlite3, threading
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+IMAGE_EXTS = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp'}
+VIDEO_EXTS = {'.mp4', '.avi', '.mov', '.mkv', '.webm', '.3gp'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    root TEXT NOT NULL, rel TEXT NOT NULL, mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (root, rel));
+CREATE TABLE IF NOT EXISTS users (
+    root TEXT NOT NULL, mobile TEXT NOT NULL,
+    PRIMARY KEY (root, mobile));
+CREATE TABLE IF NOT EXISTS uploads (
+    root TEXT NOT NULL, mobile TEXT NOT NULL, name TEXT NOT NULL,
+    size INTEGER NOT NULL, mtime REAL NOT NULL, media_type TEXT NOT NULL,
+    approved INTEGER NOT NULL DEFAULT 0, reviewed INTEGER NOT NULL DEFAULT 0,
+    archived INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (root, mobile, name));
+CREATE INDEX IF NOT EXISTS uploads_by_user_time ON uploads (root, mobile, mtime DESC);
+"""
+
+Roots = Union[str, Sequence[str]]   # queries take one root or several (merged)
+
+# created after the approved/reviewed columns are guaranteed to exist
+INDEXES = """
+CREATE INDEX IF NOT EXISTS uploads_by_user_status ON uploads (root, mobile, approved, mtime DESC);
+CREATE INDEX IF NOT EXISTS uploads_pending ON uploads (mtime, root, mobile, name) WHERE reviewed=0;
+CREATE INDEX IF NOT EXISTS uploads_by_size ON uploads (size, root, mobile, name);
+"""
+
+def media_type_for(name: str) -> Optional[str]:
+    ext = os.path.splitext(name)[1].lower()
+    if ext in IMAGE_EXTS:
+        return 'image'
+    if ext in VIDEO_EXTS:
+        return 'video'
+    return None
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def _is_mobile(s: str) -> bool:
+    return len(s) == 10 and s.isdigit()
+
+class Catalog:
+    """
+    On-disk catalog of <ROOT>/users/<mobile>/uploads/*.
+
+    refresh() only re-lists the users/ directory and the uploads/ folders
+    whose mtime changed since the last pass (adding, removing or renaming a
+    file bumps its folder's mtime), so an unchanged root costs one stat()
+    per user. Several roots can share one catalog file; each keeps its own
+    rows and folder mtimes, so refreshing one never rescans another, and
+    the queries below accept a list of roots to answer for all of them.
+
+    ``status_lookup(mobile)`` returns that user's explicit approval flags
+    ({filename: approved}); it seeds the ``approved`` and ``reviewed``
+    columns on rescans, and set_approved() keeps them in step afterwards,
+    so per-status pages, counts and the pending queue are index lookups.
+
+    ``archive_lookup(user_dir)`` returns the user's archived uploads
+    ({filename: {"size", "mtime_ns", ...}}, see tiering.py); those are
+    listed too, flagged ``archived``, unless the original is still there.
+
+    An uploads/ folder that can't be listed (permissions, I/O errors) keeps
+    its previous rows and is retried on the next refresh; errors() says
+    which ones failed, so one bad folder never stops a whole scan.
+    """
+    def __init__(self, db_path: str,
+                 status_lookup: Optional[Callable[[str], Mapping[str, bool]]] = None,
+                 archive_lookup: Optional[Callable[[str], Mapping[str, dict]]] = None):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+        cols = {r[1] for r in self._db.execute("PRAGMA table_info(uploads)")}
+        for col in ("approved", "reviewed", "archived"):
+            if col not in cols:
+                self._db.execute(f"ALTER TABLE uploads ADD COLUMN {col} INTEGER NOT NULL DEFAULT 0")
+                self._db.execute("DELETE FROM dirs")   # force a rescan to fill it in
+        self._db.commit()
+        self._db.executescript(INDEXES)
+        self.status_lookup = status_lookup
+        self.archive_lookup = archive_lookup
+        self._refreshed_at: Dict[str, float] = {}
+        self._errors: Dict[Tuple[str, str], str] = {}   # (root key, mobile) -> last listing error
+
+    @staticmethod
+    def _key(root: str) -> str:
+        return os.path.normcase(os.path.abspath(root))
+
+    def _in(self, roots: Roots, col: str = "root") -> Tuple[str, list]:
+        keys = [self._key(roots)] if isinstance(roots, str) else [self._key(r) for r in roots]
+        return f"{col} IN ({','.join('?' * len(keys))})", keys
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    # ---- scanning ----
+    def refresh(self, root: str, *, max_age: float = 1.0, force: bool = False) -> int:
+        """Bring ``root`` up to date; returns the number of folders re-listed."""
+        key = self._key(root)
+        now = time.monotonic()
+        if not force and now - self._refreshed_at.get(key, -1e9) < max_age:
+            return 0
+        with self._lock:
+            mobiles, rescanned = self._refresh_users(root, force)
+        # refresh_user takes the lock per user, so other roots refresh alongside
+        for mob in mobiles:
+            rescanned += self.refresh_user(root, mob, force=force)
+        self._refreshed_at[key] = time.monotonic()
+        return rescanned
+
+    def refresh_users(self, root: str, *, force: bool = False) -> List[str]:
+        """Re-list users/ if it changed; returns the root's mobiles."""
+        with self._lock:
+            return self._refresh_users(root, force)[0]
+
+    def _refresh_users(self, root: str, force: bool) -> Tuple[List[str], int]:
+        key = self._key(root)
+        users_dir = os.path.join(root, "users")
+        m = _mtime_ns(users_dir)
+        row = self._db.execute("SELECT mtime_ns FROM dirs WHERE root=? AND rel='users'",
+                               (key,)).fetchone()
+        rescanned = 0
+        if m is None or force or row is None or row[0] != m:
+            self._scan_users(key, users_dir)
+            self._set_dir(key, "users", m or 0)
+            self._db.commit()
+            rescanned = 1
+        mobiles = [r[0] for r in self._db.execute(
+            "SELECT mobile FROM users WHERE root=? ORDER BY mobile", (key,))]
+        return mobiles, rescanned
+
+    def mark_fresh(self, root: str) -> None:
+        """Record that every folder of ``root`` was just checked (see refresh's max_age)."""
+        self._refreshed_at[self._key(root)] = time.monotonic()
+
+    def refresh_user(self, root: str, mobile: str, *, force: bool = False) -> bool:
+        """Re-list one user's uploads if its folder changed; True if it did.
+
+        The directory is listed without holding the catalog lock, so several
+        users can be refreshed in parallel."""
+        key = self._key(root)
+        users_dir = os.path.join(root, "users")
+        rel = f"users/{mobile}/uploads"
+        m = _mtime_ns(os.path.join(users_dir, mobile, "uploads"))
+        if not force:
+            with self._lock:
+                row = self._db.execute("SELECT mtime_ns FROM dirs WHERE root=? AND rel=?",
+                                       (key, rel)).fetchone()
+            if row is not None and m is not None and row[0] == m:
+                return False
+        try:
+            rows = self._list_uploads(users_dir, mobile)
+        except OSError as e:   # unreadable folder: keep the old rows, leave it marked as stale
+            with self._lock:
+                self._errors[(key, mobile)] = f"{os.path.join(users_dir, mobile, 'uploads')}: {e}"
+            return False
+        with self._lock:
+            self._errors.pop((key, mobile), None)
+            self._store_uploads(key, mobile, rows)
+            self._set_dir(key, rel, m or 0)
+            self._db.commit()
+        return True
+
+    def errors(self, roots: Roots) -> List[str]:
+        """Upload folders of ``roots`` whose last listing failed, with the reason."""
+        keys = set(self._in(roots)[1])
+        with self._lock:
+            return [msg for (k, _mob), msg in sorted(self._errors.items()) if k in keys]
+
+    def _set_dir(self, key: str, rel: str, mtime_ns: int) -> None:
+        self._db.execute("INSERT OR REPLACE INTO dirs (root, rel, mtime_ns) VALUES (?,?,?)",
+                         (key, rel, mtime_ns))
+
+    def _scan_users(self, key: str, users_dir: str) -> None:
+        out: List[str] = []
+        # A) folder names that look like mobiles or profile.json with a mobile
+        try:
+            with os.scandir(users_dir) as it:
+                for e in it:
+                    if not e.is_dir() or e.name.startswith("."):
+                        continue   # hidden, e.g. a trash tombstone (.<mobile>.deleting)
+                    if _is_mobile(e.name):
+                        out.append(e.name)
+                        continue
+                    try:
+                        with open(os.path.join(e.path, "profile.json"), "r", encoding="utf-8") as f:
+                            data = json.load(f) or {}
+                        mob = "".join(ch for ch in str(data.get("mobile", "")) if ch.isdigit())
+                        if _is_mobile(mob) and mob not in out:
+                            out.append(mob)
+                    except Exception:
+                        pass
+        except FileNotFoundError:
+            pass
+        # B) derive from upload filenames if still empty
+        if not out:
+            for p in glob.glob(os.path.join(users_dir, "*", "uploads", "*")):
+                prefix = os.path.basename(p).split("_", 1)[0]
+                if _is_mobile(prefix) and prefix not in out:
+                    out.append(prefix)
+        old = {r[0] for r in self._db.execute("SELECT mobile FROM users WHERE root=?", (key,))}
+        for mob in old - set(out):
+            self._db.execute("DELETE FROM users WHERE root=? AND mobile=?", (key, mob))
+            self._db.execute("DELETE FROM uploads WHERE root=? AND mobile=?", (key, mob))
+            self._db.execute("DELETE FROM dirs WHERE root=? AND rel=?", (key, f"users/{mob}/uploads"))
+        self._db.executemany("INSERT OR IGNORE INTO users (root, mobile) VALUES (?,?)",
+                             [(key, m) for m in set(out) - old])
+
+    def _list_uploads(self, users_dir: str, mobile: str) -> List[tuple]:
+        rows = []
+        prefix = f"{mobile}_"
+        status = self.status_lookup(mobile) if self.status_lookup else {}
+        try:
+            with os.scandir(os.path.join(users_dir, mobile, "uploads")) as it:
+                for e in it:
+                    if not e.name.startswith(prefix):
+                        continue
+                    mt = media_type_for(e.name)
+                    if mt is None:
+                        continue
+                    try:
+                        if not e.is_file():
+                            continue
+                        st = e.stat()
+                    except OSError:
+                        continue
+                    flag = status.get(e.name)
+                    rows.append((e.name, st.st_size, st.st_mtime, mt, int(flag is True),
+                                 int(flag is not None), 0))
+        except (FileNotFoundError, NotADirectoryError):
+            pass
+        if self.archive_lookup:
+            on_disk = {r[0] for r in rows}
+            for name, entry in self.archive_lookup(os.path.join(users_dir, mobile)).items():
+                mt = media_type_for(name)
+                if name in on_disk or mt is None:
+                    continue
+                flag = status.get(name)
+                rows.append((name, int(entry["size"]), int(entry["mtime_ns"]) / 1e9, mt,
+                             int(flag is True), int(flag is not None), 1))
+        return rows
+
+    def _store_uploads(self, key: str, mobile: str, rows: List[tuple]) -> None:
+        self._db.execute("DELETE FROM uploads WHERE root=? AND mobile=?", (key, mobile))
+        self._db.executemany(
+            "INSERT INTO uploads (root, mobile, name, size, mtime, media_type, approved, reviewed, archived) "
+            "VALUES (?,?,?,?,?,?,?,?,?)", [(key, mobile) + r for r in rows])
+
+    def set_approved(self, items: Iterable[Tuple[str, str]], value: bool) -> None:
+        """Mirror approval changes for (mobile, filename) pairs in every root."""
+        with self._lock:
+            self._db.executemany("UPDATE uploads SET approved=?, reviewed=1 WHERE mobile=? AND name=?",
+                                 [(int(value), m, n) for m, n in items])
+            self._db.commit()
+
+    def forget_root(self, root: str) -> None:
+        key = self._key(root)
+        with self._lock:
+            for table in ("dirs", "users", "uploads"):
+                self._db.execute(f"DELETE FROM {table} WHERE root=?", (key,))
+            self._db.commit()
+        self._refreshed_at.pop(key, None)
+
+    # ---- queries ----
+    def users(self, roots: Roots) -> List[str]:
+        where, args = self._in(roots)
+        with self._lock:
+            return [r[0] for r in self._db.execute(
+                f"SELECT DISTINCT mobile FROM users WHERE {where} ORDER BY mobile", args)]
+
+    def user_roots(self, roots: Roots, mobile: Optional[str] = None) -> Dict[str, List[str]]:
+        """mobile -> catalog keys of the roots that have that user (optionally just one mobile)."""
+        where, args = self._in(roots)
+        if mobile is not None:
+            where += " AND mobile=?"
+            args.append(mobile)
+        out: Dict[str, List[str]] = {}
+        with self._lock:
+            for mob, key in self._db.execute(
+                    f"SELECT mobile, root FROM users WHERE {where} ORDER BY mobile", args):
+                out.setdefault(mob, []).append(key)
+        return out
+
+    def uploads(self, roots: Roots, mobile: str, *, approved: Optional[bool] = None,
+                limit: Optional[int] = None, offset: int = 0
+                ) -> List[Tuple[str, str, int, float, str, bool, bool]]:
+        """
+        (root_key, name, size, mtime, media_type, approved, archived), newest
+        first; optionally one status/page.
+        """
+        where, args = self._in(roots)
+        sql = ("SELECT root, name, size, mtime, media_type, approved, archived FROM uploads "
+               f"WHERE {where} AND mobile=?")
+        args.append(mobile)
+        if approved is not None:
+            sql += " AND approved=?"
+            args.append(int(approved))
+        sql += " ORDER BY mtime DESC"
+        if limit is not None:
+            sql += " LIMIT ? OFFSET ?"
+            args += [int(limit), int(offset)]
+        with self._lock:
+            return [(k, n, sz, mt, typ, bool(a), bool(z))
+                    for k, n, sz, mt, typ, a, z in self._db.execute(sql, args)]
+
+    def pending(self, roots: Roots, *, limit: int = 50,
+                after: Optional[Tuple[float, str, str, str]] = None
+                ) -> List[Tuple[str, str, str, float, str]]:
+        """
+        Never-reviewed uploads of all users, oldest capture first:
+        (root_key, mobile, name, mtime, media_type). Pass the last row's
+        (mtime, root_key, mobile, name) as ``after`` for the next page.
+        """
+        where, args = self._in(roots)
+        # walk the partial index in order; the planner would otherwise pick the root index and sort
+        sql = ("SELECT root, mobile, name, mtime, media_type FROM uploads INDEXED BY uploads_pending "
+               f"WHERE reviewed=0 AND {where}")
+        if after is not None:
+            sql += " AND (mtime, root, mobile, name) > (?,?,?,?)"
+            args += list(after)
+        sql += " ORDER BY mtime, root, mobile, name LIMIT ?"
+        args.append(int(limit))
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    def pending_count(self, roots: Roots) -> int:
+        where, args = self._in(roots)
+        with self._lock:
+            return int(self._db.execute(
+                f"SELECT COUNT(*) FROM uploads WHERE reviewed=0 AND {where}", args).fetchone()[0])
+
+    def duplicate_sizes(self, roots: Roots, *, min_size: int = 1, after: int = -1,
+                        limit: int = 1000) -> List[Tuple[int, int]]:
+        """
+        File sizes shared by more than one upload, ascending: (size, files).
+        Pass the last size seen as ``after`` for the next page.
+        """
+        where, args = self._in(roots)
+        # walk the size index from ``after`` so each page stops after ``limit`` groups
+        with self._lock:
+            return self._db.execute(
+                "SELECT size, COUNT(*) FROM uploads INDEXED BY uploads_by_size "
+                f"WHERE {where} AND size>=? AND size>? "
+                "GROUP BY size HAVING COUNT(*)>1 ORDER BY size LIMIT ?",
+                args + [int(min_size), int(after), int(limit)]).fetchall()
+
+    def uploads_of_size(self, roots: Roots, sizes: Sequence[int]) -> List[Tuple[int, str, str, str]]:
+        """(size, root_key, mobile, name) of every upload with one of the given sizes."""
+        where, args = self._in(roots)
+        sizes = list(sizes)
+        with self._lock:
+            return self._db.execute(
+                "SELECT size, root, mobile, name FROM uploads "
+                f"WHERE size IN ({','.join('?' * len(sizes))}) AND {where} "
+                "ORDER BY size, root, mobile, name", sizes + args).fetchall()
+
+    def user_counts(self, roots: Roots, mobile: str) -> Tuple[int, int]:
+        """(total, approved) uploads for one user."""
+        where, args = self._in(roots)
+        with self._lock:
+            total, approved = self._db.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(approved),0) FROM uploads WHERE {where} AND mobile=?",
+                args + [mobile]).fetchone()
+        return int(total), int(approved)
+
+    def stats(self, roots: Roots) -> Tuple[int, int, int]:
+        """(total_bytes, images, videos) over the given root(s)."""
+        where, args = self._in(roots)
+        with self._lock:
+            size, images, videos = self._db.execute(
+                "SELECT COALESCE(SUM(size),0), "
+                "COALESCE(SUM(media_type='image'),0), COALESCE(SUM(media_type='video'),0) "
+                f"FROM uploads WHERE {where}", args).fetchone()
+        return int(size), int(images), int(videos)
+
+    # ---- aggregates (reports) ----
+    def user_summary(self, roots: Roots) -> List[Tuple[str, int, int, int, int, int, float, float]]:
+        """Per user: (mobile, files, bytes, images, videos, approved, first_mtime, last_mtime)."""
+        where, args = self._in(roots, "u.root")
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT u.mobile, COUNT(up.name), COALESCE(SUM(up.size),0), "
+                "COALESCE(SUM(up.media_type='image'),0), COALESCE(SUM(up.media_type='video'),0), "
+                "COALESCE(SUM(up.approved),0), MIN(up.mtime), MAX(up.mtime) "
+                "FROM users u LEFT JOIN uploads up ON up.root=u.root AND up.mobile=u.mobile "
+                f"WHERE {where} GROUP BY u.mobile ORDER BY u.mobile", args).fetchall()
+        return [(m, int(n), int(b), int(i), int(v), int(a), lo, hi) for m, n, b, i, v, a, lo, hi in rows]
+
+    def daily_summary(self, roots: Roots) -> List[Tuple[str, str, int, int, int]]:
+        """Per local day and media type: (YYYY-MM-DD, media_type, files, bytes, approved)."""
+        where, args = self._in(roots)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT date(mtime, 'unixepoch', 'localtime') AS day, media_type, "
+                f"COUNT(*), SUM(size), SUM(approved) FROM uploads WHERE {where} "
+                "GROUP BY day, media_type ORDER BY day, media_type", args).fetchall()
+        return [(d, t, int(n), int(b), int(a)) for d, t, n, b, a in rows]
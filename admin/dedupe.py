@@ -0,0 +1,253 @@
+# dedupe.py — find byte-identical uploads across users; optionally hardlink the copies
+from __future__ import annotations
+import os, heapq, hashlib, threading, uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from catalog import Catalog
+from sync import SyncCancelled, SyncState
+
+EDGE = 64 * 1024   # bytes hashed from each end of a file for the partial hash
+
+Copy = Tuple[str, str, os.stat_result]   # (path, mobile, stat)
+Inode = List[Copy]                       # paths already sharing one inode
+
+def partial_hash(path: str, size: int) -> str:
+    """SHA-256 of the first and last EDGE bytes (the whole file when it is that small)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        if size <= 2 * EDGE:
+            h.update(f.read())
+        else:
+            h.update(f.read(EDGE))
+            f.seek(size - EDGE)
+            h.update(f.read(EDGE))
+    return h.hexdigest()
+
+def same_bytes(a: str, b: str, chunk: int = 1 << 20) -> bool:
+    """True when the two files have identical contents (read in full, no caches)."""
+    with open(a, "rb") as fa, open(b, "rb") as fb:
+        while True:
+            x, y = fa.read(chunk), fb.read(chunk)
+            if x != y:
+                return False
+            if not x:
+                return True
+
+def _group(items, key) -> Dict:
+    out: Dict = {}
+    for it in items:
+        out.setdefault(key(it), []).append(it)
+    return out
+
+class DedupeJob:
+    """
+    Find uploads with identical content anywhere in the given roots.
+
+    Candidates come from the catalog a page of sizes at a time (only sizes
+    shared by two or more uploads, via the ``uploads_by_size`` index), so
+    memory stays bounded by ``batch`` files however large the roots are.
+    Within a batch, files are stat()ed, paths that already share an inode
+    are counted once, then the survivors are narrowed by a hash of their
+    first and last 64 KiB and finally by a full SHA-256 (cached in
+    SyncState, so a re-run only reads files that changed). All file work
+    runs on ``workers`` threads. Files whose size no longer matches the
+    catalog are skipped; refresh the catalog first.
+
+    In each group of identical files the oldest copy is the keeper; every
+    other copy counts as reclaimable for the user that owns it (bytes are
+    counted once per inode, and not at all when the inode has links outside
+    the uploads we saw). With ``link=True`` each copy on the keeper's
+    filesystem (per filesystem when roots span several) is replaced by a
+    hardlink to it, after checking neither changed since it was hashed and
+    comparing the two byte for byte (hashes may come from the cache).
+    A linked copy shares the keeper's timestamps, so it shows the keeper's
+    capture time from then on; names and approvals are unaffected.
+    """
+    def __init__(self, catalog: Catalog, roots: Sequence[str], *, state: SyncState,
+                 workers: int = 4, min_size: int = 1, link: bool = False, top: int = 20,
+                 batch: int = 2000, progress: Optional[Callable[[int, int, int], None]] = None):
+        self.catalog = catalog
+        self.roots = list(roots)
+        self.state = state
+        self.workers = max(1, workers)
+        self.min_size = max(1, min_size)
+        self.link = link
+        self.top = top
+        self.batch = max(1, batch)
+        self.progress = progress   # (files_checked, groups, reclaimable_bytes)
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._errors: List[str] = []
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, done: Optional[Callable[[Dict], None]] = None) -> "DedupeJob":
+        """Run in a background thread; ``done(result)`` is called there when finished."""
+        def target():
+            res = self.run()
+            if done:
+                done(res)
+        self._thread = threading.Thread(target=target, name="dedupe", daemon=True)
+        self._thread.start()
+        return self
+
+    # ---- per-file work (pool threads) ----
+    def _stat(self, item: Tuple[str, str, int]) -> Optional[Copy]:
+        path, mobile, size = item
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None   # gone since the last scan
+        return (path, mobile, st) if st.st_size == size else None
+
+    def _partial(self, inode: Inode) -> Optional[str]:
+        if self._cancel.is_set():
+            return None
+        path, _mobile, st = inode[0]
+        try:
+            return partial_hash(path, st.st_size)
+        except OSError as e:
+            self._errors.append(f"{path}: {e}")
+            return None
+
+    def _full(self, inode: Inode) -> Optional[str]:
+        path = inode[0][0]
+        try:
+            return self.state.file_hash(path, self._cancel.is_set)
+        except SyncCancelled:
+            return None
+        except OSError as e:
+            self._errors.append(f"{path}: {e}")
+            return None
+
+    def _narrow(self, pool, groups: List[List[Inode]], fn) -> List[Tuple[str, List[Inode]]]:
+        """Split each group by ``fn(inode)``; keep the (key, sub-group) pairs of two or more."""
+        flat = [(gi, ino) for gi, g in enumerate(groups) for ino in g]
+        keys = pool.map(lambda f: fn(f[1]), flat)
+        by = _group((((gi, k), ino) for (gi, ino), k in zip(flat, keys) if k), key=lambda kv: kv[0])
+        return [(k, [ino for _k, ino in sub]) for (_gi, k), sub in by.items() if len(sub) > 1]
+
+    # ---- linking ----
+    @staticmethod
+    def _unchanged(copy: Copy) -> bool:
+        path, _mobile, st = copy
+        try:
+            now = os.stat(path)
+        except OSError:
+            return False
+        return (now.st_ino, now.st_size, now.st_mtime_ns) == (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _link_to(self, keeper: Copy, inode: Inode) -> Tuple[int, int]:
+        """Replace every path of ``inode`` with a hardlink to ``keeper``; returns (linked, freed)."""
+        if not self._unchanged(keeper):
+            return 0, 0
+        linked = 0
+        for copy in inode:
+            path = copy[0]
+            if not self._unchanged(copy):
+                continue
+            try:
+                same = same_bytes(keeper[0], path)
+            except OSError as e:
+                self._errors.append(f"{path}: {e}")
+                continue
+            if not (same and self._unchanged(keeper) and self._unchanged(copy)):
+                continue   # differs after all, or was written to while we compared
+            tmp = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.{uuid.uuid4().hex[:8]}.link")
+            try:
+                os.link(keeper[0], tmp)
+                os.replace(tmp, path)
+                linked += 1
+            except OSError as e:
+                self._errors.append(f"{path}: {e}")
+                try:
+                    os.remove(tmp)
+                except OSError:
+                    pass
+        st = inode[0][2]
+        return linked, st.st_size if linked == len(inode) == st.st_nlink else 0
+
+    # ---- main ----
+    def _settle(self, digest: str, inodes: List[Inode], res: Dict, top: list) -> None:
+        inodes.sort(key=lambda ino: (ino[0][2].st_mtime_ns, -ino[0][2].st_nlink, ino[0][0]))
+        size = inodes[0][0][2].st_size
+        res["groups"] += 1
+        wasted = 0
+        for ino in inodes[1:]:
+            frees = ino[0][2].st_nlink <= len(ino)
+            wasted += size if frees else 0
+            for i, (_path, mobile, _st) in enumerate(ino):
+                u = res["by_user"].setdefault(mobile, {"files": 0, "bytes": 0})
+                u["files"] += 1
+                u["bytes"] += size if frees and i == 0 else 0
+                res["duplicates"] += 1
+        res["reclaimable"] += wasted
+        entry = (wasted, digest, [c[0] for ino in inodes for c in ino])
+        if len(top) < self.top:
+            heapq.heappush(top, entry)
+        elif top and entry > top[0]:
+            heapq.heapreplace(top, entry)
+        if self.link:
+            for dev_inodes in _group(inodes, key=lambda ino: ino[0][2].st_dev).values():
+                keeper = dev_inodes[0][0]   # oldest on this filesystem (list is sorted)
+                for ino in dev_inodes[1:]:
+                    linked, freed = self._link_to(keeper, ino)
+                    res["linked"] += linked
+                    res["freed"] += freed
+
+    def _run_batch(self, pool, sizes: List[int], by_key: Dict[str, str], res: Dict, top: list) -> None:
+        items = [(os.path.join(by_key[key], "users", mobile, "uploads", name), mobile, size)
+                 for size, key, mobile, name in self.catalog.uploads_of_size(self.roots, sizes)
+                 if key in by_key]
+        res["files"] += len(items)
+        copies = [c for c in pool.map(self._stat, items) if c is not None]
+        groups = []
+        for same_size in _group(copies, key=lambda c: c[2].st_size).values():
+            inodes = list(_group(same_size, key=lambda c: (c[2].st_dev, c[2].st_ino)).values())
+            if len(inodes) > 1:
+                groups.append(inodes)
+        narrowed = self._narrow(pool, groups, self._partial)
+        # small files were hashed whole, so their partial hash already is the SHA-256
+        done = [(k, g) for k, g in narrowed if g[0][0][2].st_size <= 2 * EDGE]
+        done += self._narrow(pool, [g for _k, g in narrowed if g[0][0][2].st_size > 2 * EDGE],
+                             self._full)
+        if self._cancel.is_set():
+            raise SyncCancelled()
+        for digest, g in done:
+            self._settle(digest, g, res, top)
+
+    def run(self) -> Dict:
+        res = {"files": 0, "groups": 0, "duplicates": 0, "reclaimable": 0, "by_user": {},
+               "largest": [], "linked": 0, "freed": 0, "errors": self._errors, "cancelled": False}
+        by_key = {Catalog._key(r): r for r in self.roots}
+        top: list = []
+        after = -1
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dedupe") as pool:
+                while True:
+                    page = self.catalog.duplicate_sizes(self.roots, min_size=self.min_size,
+                                                        after=after, limit=self.batch)
+                    if not page:
+                        break
+                    sizes, count = [], 0
+                    for size, n in page:
+                        sizes.append(size)
+                        count += n
+                        if count >= self.batch:
+                            self._run_batch(pool, sizes, by_key, res, top)
+                            sizes, count = [], 0
+                    if sizes:
+                        self._run_batch(pool, sizes, by_key, res, top)
+                    after = page[-1][0]
+                    if self.progress:
+                        self.progress(res["files"], res["groups"], res["reclaimable"])
+        except SyncCancelled:
+            res["cancelled"] = True
+        res["largest"] = [{"sha256": d, "wasted": w, "paths": p} for w, d, p in sorted(top, reverse=True)]
+        return res
@@ -0,0 +1,239 @@
+# exporter.py — stream uploads into a ZIP/TAR archive off the UI thread
+from __future__ import annotations
+import io, os, time, tarfile, zipfile, threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Already-compressed media: deflating these only burns CPU
+STORED_EXTS = {'.jpg', '.jpeg', '.png', '.gif', '.webp',
+               '.mp4', '.mov', '.mkv', '.webm', '.3gp', '.avi'}
+
+ZIP_EPOCH = (1980, 1, 1, 0, 0, 0)
+
+Item = Tuple[str, str, int, float]  # (arcname, path, size, mtime)
+
+class ExportCancelled(Exception):
+    pass
+
+class _SourceError(Exception):
+    """A source file could not be opened: skip it (anything later aborts the export)."""
+
+def archive_format(dest: str) -> str:
+    d = dest.lower()
+    if d.endswith((".tar.gz", ".tgz")):
+        return "tar.gz"
+    if d.endswith(".tar"):
+        return "tar"
+    return "zip"
+
+def list_uploads(store, mobile: str):
+    # AdminStore names it list_uploads_for_user, the user app's LocalStore list_uploads_for_mobile
+    lister = getattr(store, "list_uploads_for_user", None) or getattr(store, "list_uploads_for_mobile")
+    return lister(mobile)
+
+class ExportJob:
+    """
+    Write the uploads of one or more users into ``dest`` (.zip, .tar or .tar.gz).
+
+    Files are read on a thread pool at most ``window`` files ahead of the
+    single archive writer, so memory stays bounded; files above
+    ``inline_limit`` are streamed by the writer in chunks instead. JPEG, MP4
+    and other compressed media go in stored, not deflated. ``since`` /
+    ``until`` (epoch seconds) limit the upload time range.
+
+    The archive is built as ``dest + ".part"`` and renamed when complete;
+    cancel() stops at the next file or chunk and removes the partial file.
+    Uploads that can't be read are skipped and listed in ``errors``; any
+    other failure (unwritable destination, disk full) removes the partial
+    file too and is reported as ``error``, with ``path`` None.
+    ``progress(done, total, bytes_done)`` runs on the export thread.
+    """
+    def __init__(self, store, mobiles: Iterable[str], dest: str, *,
+                 since: Optional[float] = None, until: Optional[float] = None,
+                 workers: int = 4, window: int = 8, inline_limit: int = 16 * 1024 * 1024,
+                 progress: Optional[Callable[[int, int, int], None]] = None):
+        self.store = store
+        self.mobiles = [str(m) for m in mobiles]
+        self.dest = dest
+        self.fmt = archive_format(dest)
+        self.since = since
+        self.until = until
+        self.workers = workers
+        self.window = max(1, window)
+        self.inline_limit = inline_limit
+        self.progress = progress
+        self.result: Optional[Dict] = None
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # AdminStore can serve archived uploads (tiering.py); the user app's store can't
+        self._stat = getattr(store, "upload_stat", os.stat)
+        self._local = getattr(store, "local_path", None)
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def collect(self) -> List[Item]:
+        items: List[Item] = []
+        seen = set()
+        for mob in self.mobiles:
+            for up in list_uploads(self.store, mob):
+                ts = up.created_at
+                if (self.since is not None and ts < self.since) or \
+                   (self.until is not None and ts > self.until):
+                    continue
+                try:
+                    size = self._stat(up.path).st_size
+                except OSError:
+                    continue
+                arcname = f"{mob}/{os.path.basename(up.path)}"
+                if arcname in seen:
+                    # same file name in two mounted roots: keep both, tagged by root folder
+                    tag = os.path.basename(os.path.normpath(getattr(up, "root", "") or "dup"))
+                    arcname = f"{mob}/{tag}/{os.path.basename(up.path)}"
+                seen.add(arcname)
+                items.append((arcname, up.path, size, ts))
+        return items
+
+    def start(self, done: Optional[Callable[[Dict], None]] = None) -> "ExportJob":
+        """Run in a background thread; ``done(result)`` is called there when finished."""
+        def target():
+            res = self.run()
+            if done:
+                done(res)
+        self._thread = threading.Thread(target=target, name="export", daemon=True)
+        self._thread.start()
+        return self
+
+    def run(self) -> Dict:
+        """Export and return the result; never raises, so start()'s ``done`` always runs."""
+        part = self.dest + ".part"
+        exported: List[str] = []
+        errors: List[str] = []
+        nbytes = 0
+        cancelled = False
+        error = None
+        try:
+            items = self.collect()
+            os.makedirs(os.path.dirname(os.path.abspath(self.dest)), exist_ok=True)
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="export") as pool:
+                archive = self._open(part)
+                try:
+                    pending: deque = deque()
+                    queue = iter(items)
+
+                    def feed():
+                        while len(pending) < self.window:
+                            item = next(queue, None)
+                            if item is None:
+                                return
+                            small = item[2] <= self.inline_limit
+                            pending.append((item, pool.submit(self._read, item[1]) if small else None))
+
+                    feed()
+                    while pending:
+                        if self._cancel.is_set():
+                            raise ExportCancelled()
+                        item, fut = pending.popleft()
+                        feed()
+                        # read-side failures skip the file; write-side ones (disk
+                        # full) propagate and abort, so no truncated archive is published
+                        try:
+                            self._add(archive, item, fut.result() if fut else None)
+                            exported.append(item[0])
+                            nbytes += item[2]
+                        except _SourceError as e:
+                            errors.append(f"{item[1]}: {e}")
+                        if self.progress:
+                            self.progress(len(exported) + len(errors), len(items), nbytes)
+                finally:
+                    archive.close()
+            os.replace(part, self.dest)
+        except Exception as e:
+            if isinstance(e, ExportCancelled):
+                cancelled = True
+            else:
+                error = str(e) or type(e).__name__
+            try:
+                os.remove(part)
+            except OSError:
+                pass
+        ok = not cancelled and error is None
+        self.result = {"path": self.dest if ok else None, "exported": exported if ok else [],
+                       "bytes": nbytes if ok else 0, "errors": errors, "cancelled": cancelled,
+                       "error": error}
+        return self.result
+
+    # ---- archive backends ----
+    def _open(self, part: str):
+        if self.fmt == "zip":
+            return zipfile.ZipFile(part, "w", allowZip64=True)
+        return tarfile.open(part, "w:gz" if self.fmt == "tar.gz" else "w")
+
+    def _add(self, archive, item: Item, data: Optional[bytes]) -> None:
+        arcname, path, size, mtime = item
+        if data is None and self._local:
+            path = self._local(path) or path
+        if isinstance(archive, zipfile.ZipFile):
+            # ZIP can't represent times before 1980 (e.g. files restored with a zero mtime)
+            zi = zipfile.ZipInfo(arcname, date_time=max(time.localtime(mtime)[:6], ZIP_EPOCH))
+            stored = os.path.splitext(arcname)[1].lower() in STORED_EXTS
+            zi.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+            zi.external_attr = 0o644 << 16
+            if data is not None:
+                archive.writestr(zi, data)
+                return
+            zi.file_size = size
+            with _open_source(path) as src, archive.open(zi, "w", force_zip64=True) as out:
+                self._copy(src, out)
+            return
+        ti = tarfile.TarInfo(arcname)
+        ti.mtime = int(mtime)
+        ti.mode = 0o644
+        if data is not None:
+            ti.size = len(data)
+            archive.addfile(ti, io.BytesIO(data))
+            return
+        with _open_source(path) as src:
+            ti.size = os.fstat(src.fileno()).st_size
+            archive.addfile(ti, _CancellableReader(src, self._cancel))
+
+    def _read(self, path: str) -> bytes:
+        try:
+            return _read((self._local(path) or path) if self._local else path)
+        except OSError as e:
+            raise _SourceError(str(e)) from e
+
+    def _copy(self, src, out, chunk: int = 1024 * 1024) -> None:
+        while True:
+            if self._cancel.is_set():
+                raise ExportCancelled()
+            buf = src.read(chunk)
+            if not buf:
+                return
+            out.write(buf)
+
+def _open_source(path: str):
+    try:
+        return open(path, "rb")
+    except OSError as e:
+        raise _SourceError(str(e)) from e
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+class _CancellableReader:
+    """File wrapper for tarfile.addfile() that aborts large copies on cancel."""
+    def __init__(self, f, cancel: threading.Event):
+        self._f = f
+        self._cancel = cancel
+
+    def read(self, n: int = -1) -> bytes:
+        if self._cancel.is_set():
+            raise ExportCancelled()
+        return self._f.read(n)
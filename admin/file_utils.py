@@ -1,8 +1,9 @@
 # utils/file_utils.py
 import os
-import shutil
 from datetime import datetime
 
+from exporter import ExportJob, list_uploads
+
 def get_file_size_human(file_path):
     """Get human-readable file size"""
     try:
@@ -15,22 +16,13 @@ def get_file_size_human(file_path):
     except:
         return "Unknown size"
 
-def export_user_photos(store, mobile, export_dir=None):
-    """Export all photos for a user"""
+def export_user_photos(store, mobile, export_dir=None, fmt="zip", progress=None):
+    """Export all photos for a user into one archive; returns (exported, archive_path)"""
     if export_dir is None:
-        export_dir = os.path.join(os.path.expanduser("~"), "PhotoExports", f"user_{mobile}")
-    
-    os.makedirs(export_dir, exist_ok=True)
-    exported_files = []
-    
-    uploads = store.list_uploads_for_user(mobile)
-    for upload in uploads:
-        filename = os.path.basename(upload.path)
-        dest_path = os.path.join(export_dir, filename)
-        shutil.copy2(upload.path, dest_path)
-        exported_files.append(dest_path)
-    
-    return exported_files, export_dir
+        export_dir = os.path.join(os.path.expanduser("~"), "PhotoExports")
+    dest = os.path.join(export_dir, f"user_{mobile}_{datetime.now():%Y%m%d_%H%M%S}.{fmt}")
+    result = ExportJob(store, [mobile], dest, progress=progress).run()
+    return result["exported"], result["path"]
 
 def calculate_storage_usage(store):
     """Calculate total storage usage across all users"""
@@ -39,7 +31,7 @@ def calculate_storage_usage(store):
     
     for user in store.list_users():
         user_size = 0
-        uploads = store.list_uploads_for_user(user)
+        uploads = list_uploads(store, user)
         for upload in uploads:
             try:
                 size = os.path.getsize(upload.path)
@@ -0,0 +1,364 @@
+# http_api.py — optional local HTTP API over AdminStore (stdlib only, never imports Kivy)
+#
+#   python admin_cli.py serve [--host 127.0.0.1] [--port 8765]
+#
+#   GET  /api/stats
+#   GET  /api/users?search=TEXT&limit=N&offset=N
+#   GET  /api/users/<mobile>/uploads?approved=0|1&limit=N&offset=N
+#   POST /api/approve   {"items": ["<mobile>/<filename>", ...], "approved": true|false}
+#                       needs Content-Type: application/json and
+#                       Authorization: Bearer <token>; the token is new each run,
+#                       printed by `serve` and written to <settings>/api_token
+#   GET  /files/<mobile>/<filename>    original (ETag, Range, sendfile)
+#   GET  /thumbs/<mobile>/<filename>   JPEG thumbnail (ETag; needs Pillow)
+from __future__ import annotations
+import os, re, sys, hmac, json, time, secrets, threading
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from catalog import _is_mobile, media_type_for
+
+MIME = {
+    ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png", ".gif": "image/gif",
+    ".bmp": "image/bmp", ".webp": "image/webp", ".mp4": "video/mp4", ".mov": "video/quicktime",
+    ".avi": "video/x-msvideo", ".mkv": "video/x-matroska", ".webm": "video/webm", ".3gp": "video/3gpp",
+}
+MAX_PAGE = 500
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)$")
+LOCAL_HOSTS = {"127.0.0.1", "localhost", "::1"}
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+def _etag(st: os.stat_result) -> str:
+    return f'"{st.st_size:x}-{st.st_mtime_ns:x}"'
+
+def _int_arg(q: Dict[str, List[str]], name: str, default: int, cap: int = MAX_PAGE) -> int:
+    try:
+        return max(0, min(cap, int(q.get(name, [default])[0])))
+    except ValueError:
+        raise ApiError(400, f"{name} must be an integer")
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """(start, end_inclusive) for a single ``bytes=`` range; None means serve it all.
+
+    Raises ApiError(416) if the range can't be satisfied. Multi-range
+    requests are answered with the whole file, which RFC 9110 allows."""
+    m = RANGE_RE.match(header.strip())
+    if not m or not (m.group(1) or m.group(2)):
+        return None
+    first, last = m.group(1), m.group(2)
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        start, end = max(0, size - int(last)), size - 1   # suffix: last N bytes
+    if start >= size or start > end:
+        raise ApiError(416, "range not satisfiable")
+    return start, end
+
+class AdminApiServer(ThreadingHTTPServer):
+    """
+    Thread per connection with HTTP/1.1 keep-alive, capped at
+    ``max_clients`` concurrent connections (the rest wait in the listen
+    backlog). Requests answer from the catalog as it stands; a background
+    thread refreshes it every ``refresh_every`` seconds, so no request
+    pays for a rescan.
+
+    Writes need ``token`` as a bearer token and a JSON content type, and
+    are refused from a non-local ``Origin``, so a web page open in the
+    admin's browser can't post approvals to it.
+    """
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, addr, store, *, max_clients: int = 64, refresh_every: float = 30.0,
+                 thumbs=None, token: Optional[str] = None):
+        super().__init__(addr, ApiHandler)
+        self.store = store
+        self.token = token
+        self.thumbs = thumbs
+        self._slots = threading.BoundedSemaphore(max_clients)
+        self._index = None
+        self._index_at = 0.0
+        self._index_lock = threading.Lock()
+        self._stop = threading.Event()
+        self.refresh_every = refresh_every
+        self._refresher = threading.Thread(target=self._refresh_loop, name="api-refresh", daemon=True)
+        self._refresher.start()
+
+    def _refresh_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.store.refresh()
+            except Exception as e:
+                print(f"API refresh failed: {e}", file=sys.stderr)   # stdout is the CLI's JSON
+            self._stop.wait(self.refresh_every)
+
+    def process_request(self, request, client_address):
+        self._slots.acquire()
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._slots.release()
+
+    def server_close(self):
+        self._stop.set()
+        super().server_close()
+
+    def user_index(self, mobiles: List[str]):
+        """Search index over profiles, re-synced at most every few seconds."""
+        with self._index_lock:
+            if self._index is None:
+                from user_index import UserIndex
+                self._index = UserIndex()
+            if time.monotonic() - self._index_at > 5.0:
+                self._index.sync(self.store.user_dir, mobiles)
+                self._index_at = time.monotonic()
+            return self._index
+
+class ApiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive; every response carries Content-Length
+    timeout = 30                    # idle keep-alive connections give their thread back
+    server: AdminApiServer
+
+    def log_message(self, fmt, *args):
+        pass   # quiet; the admin UI/CLI owns stdout
+
+    # ---- plumbing ----
+    def _send_json(self, obj, status: int = 200) -> None:
+        body = json.dumps(obj, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+
+    def _dispatch(self) -> None:
+        url = urlsplit(self.path)
+        parts = [unquote(p) for p in url.path.split("/") if p]
+        q = parse_qs(url.query)
+        try:
+            if self.command == "POST":
+                if parts == ["api", "approve"]:
+                    return self._send_json(self._approve())
+                raise ApiError(404, "not found")
+            if parts == ["api", "stats"]:
+                return self._send_json(self._stats())
+            if parts == ["api", "users"]:
+                return self._send_json(self._users(q))
+            if len(parts) == 4 and parts[:2] == ["api", "users"] and parts[3] == "uploads":
+                return self._send_json(self._uploads(parts[2], q))
+            if len(parts) == 3 and parts[0] == "files":
+                return self._send_file(self._local(self._resolve(parts[1], parts[2])), ranges=True)
+            if len(parts) == 3 and parts[0] == "thumbs":
+                return self._send_thumb(self._resolve(parts[1], parts[2]))
+            raise ApiError(404, "not found")
+        except ApiError as e:
+            if self.command == "POST":
+                self.close_connection = True   # the body may not have been read
+            self._send_json({"error": str(e)}, e.status)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        except Exception as e:
+            self._send_json({"error": str(e)}, 500)
+
+    do_GET = do_HEAD = do_POST = _dispatch
+
+    # ---- JSON endpoints ----
+    def _stats(self) -> dict:
+        store = self.server.store
+        size, images, videos = store.storage_stats(refresh=False)
+        return {"roots": store.roots, "users": len(store.list_users(refresh=False)),
+                "bytes": size, "images": images, "videos": videos,
+                "unreviewed": store.catalog.pending_count(store.roots)}
+
+    def _users(self, q) -> dict:
+        store = self.server.store
+        limit, offset = _int_arg(q, "limit", 100), _int_arg(q, "offset", 0, cap=10 ** 9)
+        mobiles = store.list_users(refresh=False)
+        search = (q.get("search") or [""])[0]
+        if search:
+            hits, total = self.server.user_index(mobiles).search(search, limit=offset + limit)
+        else:
+            hits, total = mobiles[:offset + limit], len(mobiles)
+        users = []
+        for m in hits[offset:offset + limit]:
+            files, approved = store.catalog.user_counts(store.roots_of(m), m)
+            users.append({"mobile": m, "files": files, "approved": approved,
+                          "roots": store.roots_of(m)})
+        return {"total": total, "offset": offset, "users": users}
+
+    def _uploads(self, mobile: str, q) -> dict:
+        if not _is_mobile(mobile):
+            raise ApiError(400, "bad mobile")
+        flag = (q.get("approved") or [None])[0]
+        approved = None if flag is None else flag in ("1", "true", "yes")
+        limit, offset = _int_arg(q, "limit", 100), _int_arg(q, "offset", 0, cap=10 ** 9)
+        rows = self.server.store.list_uploads_for_user(
+            mobile, approved=approved, limit=limit + 1, offset=offset, refresh=False)
+        return {"offset": offset, "has_more": len(rows) > limit, "uploads": [{
+            "name": os.path.basename(u.path), "media_type": u.media_type,
+            "created_at": u.created_at, "approved": u.approved, "root": u.root,
+            "archived": u.archived,
+            "url": f"/files/{mobile}/{os.path.basename(u.path)}",
+            "thumb": f"/thumbs/{mobile}/{os.path.basename(u.path)}" if u.media_type == "image" else None,
+        } for u in rows[:limit]]}
+
+    def _check_write(self) -> None:
+        """Refuse state changes that could come from another site (CSRF)."""
+        origin = self.headers.get("Origin")
+        if origin is not None and urlsplit(origin).hostname not in LOCAL_HOSTS:
+            raise ApiError(403, "cross-origin request")   # includes "null" (sandboxed/file pages)
+        ctype = (self.headers.get("Content-Type") or "").split(";")[0].strip().lower()
+        if ctype != "application/json":
+            raise ApiError(415, "Content-Type must be application/json")
+        token = self.server.token
+        auth = self.headers.get("Authorization") or ""
+        if not token or not hmac.compare_digest(auth.encode(), f"Bearer {token}".encode()):
+            raise ApiError(401, "missing or wrong API token")
+
+    def _approve(self) -> dict:
+        self._check_write()
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            raise ApiError(400, "body must be JSON")
+        items = body.get("items") or []
+        if not isinstance(items, list):
+            raise ApiError(400, "items must be a list")
+        paths = []
+        for item in items:
+            mobile, _, name = str(item).partition("/")
+            paths.append(self._resolve(mobile, name))
+        store = self.server.store
+        n = store.approve_many(paths) if body.get("approved", True) else store.reject_many(paths)
+        return {"updated": n}
+
+    # ---- files ----
+    def _resolve(self, mobile: str, name: str) -> str:
+        """Path of an upload in the first root that has it; rejects anything else."""
+        if not _is_mobile(mobile) or not name.startswith(f"{mobile}_") \
+                or os.path.basename(name) != name or media_type_for(name) is None:
+            raise ApiError(404, "not found")
+        store = self.server.store
+        for root in store.roots_of(mobile):
+            p = os.path.join(root, "users", mobile, "uploads", name)
+            try:
+                store.upload_stat(p)   # on disk, or archived (tiering.py)
+                return p
+            except OSError:
+                continue
+        raise ApiError(404, "not found")
+
+    def _local(self, path: str) -> str:
+        # an archived original is rehydrated with its mtime, so it keeps its ETag too
+        local = self.server.store.local_path(path)
+        if local is None:
+            raise ApiError(404, "not found")
+        return local
+
+    def _not_modified(self, etag: str) -> bool:
+        inm = self.headers.get("If-None-Match")
+        return bool(inm) and (inm.strip() == "*" or etag in [t.strip() for t in inm.split(",")])
+
+    def _send_file(self, path: str, *, ranges: bool, content_type: Optional[str] = None,
+                   etag: Optional[str] = None) -> None:
+        with open(path, "rb") as f:
+            st = os.fstat(f.fileno())
+            etag = etag or _etag(st)
+            common = [("ETag", etag), ("Last-Modified", formatdate(st.st_mtime, usegmt=True)),
+                      ("Cache-Control", "no-cache")]
+            if self._not_modified(etag):
+                self.send_response(304)
+                for k, v in common:
+                    self.send_header(k, v)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            size = st.st_size
+            span = None
+            if ranges and self.headers.get("Range"):
+                if_range = self.headers.get("If-Range")
+                if not if_range or if_range.strip() == etag:
+                    try:
+                        span = parse_range(self.headers["Range"], size)
+                    except ApiError:
+                        self.send_response(416)
+                        self.send_header("Content-Range", f"bytes */{size}")
+                        self.send_header("Content-Length", "0")
+                        self.end_headers()
+                        return
+            start, end = span or (0, size - 1)
+            count = end - start + 1 if size else 0
+            self.send_response(206 if span else 200)
+            for k, v in common:
+                self.send_header(k, v)
+            self.send_header("Content-Type", content_type or MIME.get(
+                os.path.splitext(path)[1].lower(), "application/octet-stream"))
+            if ranges:
+                self.send_header("Accept-Ranges", "bytes")
+            if span:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.send_header("Content-Length", str(count))
+            self.end_headers()
+            if self.command != "HEAD" and count:
+                # zero-copy where the OS has sendfile(); plain send() elsewhere
+                self.wfile.flush()
+                self.connection.sendfile(f, start, count)
+
+    def _send_thumb(self, path: str) -> None:
+        thumbs = self.server.thumbs
+        if media_type_for(path) != "image" or thumbs is None or not thumbs.available:
+            raise ApiError(404, "no thumbnail (images only; needs Pillow)")
+        # the cache key already encodes the source's path, size and mtime
+        key = thumbs.key_for(path)
+        etag = f'"t-{key[:20]}"' if key else None
+        if etag and self._not_modified(etag):
+            self.send_response(304)   # answered without touching the thumbnail
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        thumb = thumbs.thumbnail(path)
+        if thumb is None:
+            raise ApiError(404, "thumbnail failed")
+        self._send_file(thumb, ranges=False, content_type="image/jpeg", etag=etag)
+
+def write_token(settings_dir: str) -> str:
+    """New random API token, saved owner-only to ``<settings_dir>/api_token``."""
+    token = secrets.token_urlsafe(24)
+    os.makedirs(settings_dir, exist_ok=True)
+    path = os.path.join(settings_dir, "api_token")
+    tmp = path + ".tmp"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token + "\n")
+    os.replace(tmp, path)
+    return token
+
+def make_server(store, host: str = "127.0.0.1", port: int = 8765, **kw) -> AdminApiServer:
+    """Bind the API server (call serve_forever(), or run it in a thread).
+
+    Unless ``token`` is given, a fresh one is generated and saved with write_token()."""
+    if "token" not in kw:
+        kw["token"] = write_token(store.settings_dir)
+    if "thumbs" not in kw:
+        from thumbs import ThumbnailCache
+        kw["thumbs"] = ThumbnailCache(os.path.join(store.settings_dir, "thumbs"),
+                                      stat=store.upload_stat, resolve=store.local_path)
+    return AdminApiServer((host, port), store, **kw)
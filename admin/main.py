@@ -1,8 +1,10 @@
 # admin_main.py — Enhanced Admin App with Dashboard, Search, Export & Themes
 from __future__ import annotations
-import os, sys, time, json, shutil, glob
-from dataclasses import dataclass
-from typing import List, Optional
+from startup_trace import TRACE   # first, so import timing covers everything below
+import os, sys, io, time, shutil, threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
 from kivy.uix.button import Button
 from kivy.uix.label import Label
 os.environ.setdefault("KIVY_VIDEO", "ffpyplayer")
@@ -12,138 +14,24 @@ from kivy.clock import Clock
 from kivy.utils import platform
 from kivy.core.window import Window
 from kivy.uix.image import AsyncImage
-from kivy.factory import Factory
 from kivy.uix.modalview import ModalView
 from kivy.uix.boxlayout import BoxLayout
-from kivy.properties import StringProperty, BooleanProperty
+from kivy.properties import StringProperty, BooleanProperty, NumericProperty
 from kivy.uix.togglebutton import ToggleButton
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.loader import Loader
+from kivy.metrics import dp
 
 from kivymd.app import MDApp
-# Register MDToolbar across KivyMD variants
-_Toolbar = None
-try:
-    from kivymd.uix.toolbar import MDToolbar as _Toolbar
-except Exception:
-    try:
-        from kivymd.uix.appbar import MDToolbar as _Toolbar
-    except Exception:
-        try:
-            from kivymd.uix.appbar import MDTopAppBar as _Toolbar
-        except Exception:
-            from kivy.uix.boxlayout import BoxLayout as _Toolbar
-Factory.register('MDToolbar', cls=_Toolbar)
-
-from kivymd.uix.button import MDIconButton
 from kivymd.uix.card import MDCard
-from kivymd.uix.label import MDLabel
-
-try:
-    from kivymd.uix.list import MDList, OneLineListItem
-except ImportError:
-    try:
-        from kivymd.uix.list import MDList, OneLineAvatarListItem as OneLineListItem
-    except ImportError:
-        from kivymd.uix.list import MDList, MDListItem, MDListItemHeadlineText
-        # Create a compatible OneLineListItem class
-        class OneLineListItem(MDListItem):
-            def __init__(self, text="", **kwargs):
-                super().__init__(**kwargs)
-                self.add_widget(MDListItemHeadlineText(text=text))
-
-from kivymd.uix.menu import MDDropdownMenu
-from kivymd.uix.textfield import MDTextField
-
-# For KivyMD 2.0.1 compatibility
-# For KivyMD 2.0.1 compatibility
-try:
-    from kivymd.uix.button import MDRaisedButton
-except ImportError:
-    try:
-        from kivymd.uix.button import MDFillRoundFlatButton as MDRaisedButton
-    except ImportError:
-        try:
-            from kivymd.uix.button import MDRoundFlatButton as MDRaisedButton
-        except ImportError:
-            from kivymd.uix.button import MDButton as MDRaisedButton
-
-try:
-    from kivymd.uix.selectioncontrol import MDSwitch
-except ImportError:
-    # Use ToggleButton as fallback
-    MDSwitch = ToggleButton
-
-# Optional folder chooser
-try:
-    from plyer import filechooser
-except Exception:
-    filechooser = None
-
-IMAGE_EXTS = {'.png', '.jpg', '.jpeg', '.bmp', '.gif', '.webp'}
-VIDEO_EXTS = {'.mp4', '.avi', '.mov', '.mkv', '.webm', '.3gp'}
-
-APP_FOLDER_NAME = "MyCameraApp"  # legacy shared-folder option
-
-def _android_shared_root() -> str:
-    try:
-        from android.storage import primary_external_storage_path
-        base = primary_external_storage_path()
-        return os.path.join(base, APP_FOLDER_NAME)
-    except Exception:
-        return os.path.join("/sdcard", APP_FOLDER_NAME)
-
-def _looks_like_users_root(path: str) -> bool:
-    users_dir = os.path.join(path, "users")
-    if not os.path.isdir(users_dir):
-        return False
-    try:
-        for name in os.listdir(users_dir):
-            if len(name) == 10 and name.isdigit():
-                return True
-    except Exception:
-        pass
-    for p in glob.glob(os.path.join(users_dir, "*", "uploads", "*")):
-        base = os.path.basename(p)
-        if base.split("_", 1)[0].isdigit() and len(base.split("_", 1)[0]) == 10:
-            return True
-    return False
-
-def _win_candidates() -> List[str]:
-    cands = []
-    home = os.path.expanduser("~")
-    local = os.getenv("LOCALAPPDATA") or os.path.join(home, "AppData", "Local")
-    roaming = os.getenv("APPDATA") or os.path.join(home, "AppData", "Roaming")
-    for root in (local, roaming):
-        for appname in ("PhotoApp", "photoapp", "MyCameraApp", "mycameraapp"):
-            cands.append(os.path.join(root, appname))
-    for root in (local, roaming):
-        try:
-            for name in os.listdir(root)[:200]:
-                cands.append(os.path.join(root, name))
-        except Exception:
-            pass
-    cands.append(os.path.join(home, APP_FOLDER_NAME))
-    return cands
-
-def default_users_root() -> str:
-    env = os.getenv("MYCAM_USERS_ROOT")
-    if env and _looks_like_users_root(env):
-        return env
-    if platform == "android":
-        return _android_shared_root()
-    cands = _win_candidates() if platform == "win" else [
-        os.path.join(os.path.expanduser("~"), ".local", "share", "PhotoApp"),
-        os.path.join(os.path.expanduser("~"), APP_FOLDER_NAME),
-    ]
-    for p in cands:
-        if _looks_like_users_root(p):
-            return p
-    return os.path.join(os.path.expanduser("~"), APP_FOLDER_NAME)
-
-@dataclass
-class Upload:
-    path: str
-    media_type: str  # 'image' or 'video'
-    created_at: float
+
+from admin_store import AdminStore, Upload, _root_candidates
+from thumbs import LRUCache, ThumbnailCache, decode_for_display
+from user_index import UserIndex
+from exporter import ExportJob
+from reports import build_report, write_report
+
+TRACE.mark("imports")
 
 class ThemeManager:
     def __init__(self):
@@ -183,12 +71,87 @@ class ThemeManager:
             self.set_theme("dark")
         return self.current_theme
 
+class PreviewPrefetcher:
+    """
+    Decodes full-size previews on a background thread and keeps the most
+    recent ``capacity`` textures in a ring buffer, so stepping through
+    photos only has to upload an already decoded image to the GPU.
+    """
+    def __init__(self, capacity: int = 5, max_side: int = 2048, resolve=None):
+        self.capacity = capacity
+        self.max_side = max_side
+        self.resolve = resolve   # path -> readable local file (archived uploads)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="preview")
+        self._ring: OrderedDict = OrderedDict()   # path -> texture
+        self._waiters: dict = {}                  # path -> [callback(texture or None)]
+
+    def get(self, path: str):
+        tex = self._ring.get(path)
+        if tex is not None:
+            self._ring.move_to_end(path)
+        return tex
+
+    def want(self, path: str, callback=None):
+        """Ensure ``path`` is decoded; ``callback(texture)`` runs on the UI thread."""
+        tex = self.get(path)
+        if tex is not None:
+            if callback:
+                callback(tex)
+            return
+        pending = path in self._waiters
+        self._waiters.setdefault(path, [])
+        if callback:
+            self._waiters[path].append(callback)
+        if not pending:
+            self._pool.submit(self._decode, path)
+
+    def _decode(self, path: str):
+        local = (self.resolve(path) if self.resolve else path) or path
+        payload = decode_for_display(local, self.max_side)
+        if payload is None:
+            try:
+                with open(local, "rb") as f:   # at least keep disk I/O off the UI thread
+                    payload = f.read()
+            except OSError:
+                payload = None
+        Clock.schedule_once(lambda *_: self._finish(path, payload), 0)
+
+    def _finish(self, path: str, payload):
+        tex = None
+        try:
+            if isinstance(payload, tuple):
+                from kivy.graphics.texture import Texture
+                w, h, data = payload
+                tex = Texture.create(size=(w, h), colorfmt="rgb")
+                tex.blit_buffer(data, colorfmt="rgb", bufferfmt="ubyte")
+                tex.flip_vertical()
+            elif payload:
+                from kivy.core.image import Image as CoreImage
+                ext = os.path.splitext(path)[1].lstrip(".").lower() or "png"
+                tex = CoreImage(io.BytesIO(payload), ext=ext).texture
+        except Exception:
+            tex = None
+        if tex is not None:
+            self._ring[path] = tex
+            self._ring.move_to_end(path)
+            while len(self._ring) > self.capacity:
+                self._ring.popitem(last=False)
+        for cb in self._waiters.pop(path, []):
+            try:
+                cb(tex)
+            except Exception:
+                pass
+
+    def clear(self):
+        self._ring.clear()
+
 class EnhancedFullScreenPreview(ModalView):
     image_source = StringProperty()
     file_info = StringProperty()
     is_approved = BooleanProperty(False)
 
-    def __init__(self, image_path, file_info="", is_approved=False, **kwargs):
+    def __init__(self, image_path, file_info="", is_approved=False,
+                 rows=None, index=None, prefetcher=None, neighbors=2, **kwargs):
         super().__init__(**kwargs)
         self.image_source = image_path
         self.file_info = file_info
@@ -196,6 +159,11 @@ class EnhancedFullScreenPreview(ModalView):
         self.image_path = image_path
         self.size_hint = (0.9, 0.9)
         self.auto_dismiss = True
+        # Navigation: ``rows`` is the grid's Upload list, ``index`` the shown one
+        self.rows = rows
+        self.index = index
+        self.prefetcher = prefetcher
+        self.neighbors = neighbors
         
         # Create layout
         layout = BoxLayout(orientation='vertical', spacing=10, padding=10)
@@ -213,26 +181,31 @@ class EnhancedFullScreenPreview(ModalView):
         
         # Check/Uncheck button
         self.approve_btn = ToggleButton(
-            text='✓ Approved' if self.is_approved else '✗ Unapproved',
             size_hint_x=None,
             width='150dp',
-            state='down' if self.is_approved else 'normal',
-            background_color=(0, 0.7, 0, 1) if self.is_approved else (0.7, 0.7, 0.7, 1)
         )
+        self._style_approve_btn()
         self.approve_btn.bind(on_press=self.toggle_approval)
         
         top_bar.add_widget(close_btn)
         top_bar.add_widget(self.approve_btn)
+
+        if self.rows is not None:
+            for text, cb in (('◀ Prev', lambda x: self.step(-1)),
+                             ('Next ▶', lambda x: self.step(1)),
+                             ('✓ Approve & Next', lambda x: self.approve_and_next())):
+                btn = Button(text=text, size_hint_x=None, width='150dp')
+                btn.bind(on_press=cb)
+                top_bar.add_widget(btn)
         
         # Image
-        image = AsyncImage(
-            source=image_path,
+        self.image = AsyncImage(
             allow_stretch=True,
             keep_ratio=True
         )
         
         # Info label
-        info = Label(
+        self.info = Label(
             text=file_info,
             size_hint_y=None,
             height='80dp',
@@ -241,179 +214,165 @@ class EnhancedFullScreenPreview(ModalView):
         )
         
         layout.add_widget(top_bar)
-        layout.add_widget(image)
-        layout.add_widget(info)
+        layout.add_widget(self.image)
+        layout.add_widget(self.info)
         
         self.add_widget(layout)
+        self._show(image_path)
+
+    def on_open(self):
+        if self.rows is not None:
+            Window.bind(on_key_down=self._on_key_down)
+
+    def on_dismiss(self):
+        Window.unbind(on_key_down=self._on_key_down)
+
+    def _on_key_down(self, window, key, scancode, codepoint, modifiers):
+        if key == 275:      # right arrow
+            self.step(1); return True
+        if key == 276:      # left arrow
+            self.step(-1); return True
+        if codepoint == "a":
+            self.approve_and_next(); return True
+        return False
 
-    def toggle_approval(self, instance):
-        """Toggle approval status"""
-        self.is_approved = not self.is_approved
-        instance.text = '✓ Approved' if self.is_approved else '✗ Unapproved'
-        instance.background_color = (0, 0.7, 0, 1) if self.is_approved else (0.7, 0.7, 0.7, 1)
-        
-        # Update in store
-        app = MDApp.get_running_app()
-        app.store.toggle_approval(self.image_path)
+    def _style_approve_btn(self):
+        self.approve_btn.text = '✓ Approved' if self.is_approved else '✗ Unapproved'
+        self.approve_btn.state = 'down' if self.is_approved else 'normal'
+        self.approve_btn.background_color = (0, 0.7, 0, 1) if self.is_approved else (0.7, 0.7, 0.7, 1)
 
-class AdminStore:
-    """
-    <ROOT>/
-    users/<mobile>/uploads/<mobile>_YYYYMMDD_<n>.(jpg|mp4)
-    trash/<ts>_<mobile>/
-    """
-    def __init__(self, root: Optional[str] = None, settings_dir: Optional[str] = None):
-        self.settings_dir = settings_dir or os.path.join(os.path.expanduser("~"), ".admin_mycam")
-        os.makedirs(self.settings_dir, exist_ok=True)
-        self._settings_path = os.path.join(self.settings_dir, "settings.json")
-        self._approved_path = os.path.join(self.settings_dir, "approved.json")  # ADD THIS LINE
-
-        saved_root = None
-        try:
-            if os.path.exists(self._settings_path):
-                with open(self._settings_path, "r", encoding="utf-8") as f:
-                    saved_root = (json.load(f) or {}).get("root")
-        except Exception:
-            saved_root = None
+    def _show(self, path):
+        if self.prefetcher is None:
+            self.image.source = path
+            return
+        tex = self.prefetcher.get(path)
+        if tex is not None:
+            self.image.source = ""
+            self.image.texture = tex
+        else:
+            self.image.texture = None
+            self.prefetcher.want(path, lambda t, p=path: self._on_decoded(p, t))
+        self._prefetch_neighbors()
+
+    def _on_decoded(self, path, tex):
+        if path != self.image_path:
+            return   # user already moved on
+        if tex is not None:
+            self.image.texture = tex
+        else:
+            self.image.source = path
 
-        self.root = root or saved_root or default_users_root()
-        self.users_dir = os.path.join(self.root, "users")
-        self.trash_dir = os.path.join(self.root, "trash")
-        os.makedirs(self.users_dir, exist_ok=True)
-        os.makedirs(self.trash_dir, exist_ok=True)
-        
-        self._load_approved_status()  # ADD THIS LINE
+    def _image_indexes(self, direction):
+        i = self.index + direction
+        while 0 <= i < len(self.rows):
+            if self.rows[i].media_type == "image":
+                yield i
+            i += direction
 
-    # ADD THESE NEW METHODS FOR APPROVAL TRACKING
-    def _load_approved_status(self):
-        """Load approved status from file"""
-        try:
-            with open(self._approved_path, "r", encoding="utf-8") as f:
-                self.approved_files = json.load(f)
-        except:
-            self.approved_files = {}
-
-    def _save_approved_status(self):
-        """Save approved status to file"""
-        with open(self._approved_path, "w", encoding="utf-8") as f:
-            json.dump(self.approved_files, f)
-
-    def toggle_approval(self, file_path: str) -> bool:
-        """Toggle approval status for a file"""
-        file_path = os.path.normpath(file_path)  # Normalize path
-        current_status = self.approved_files.get(file_path, False)
-        self.approved_files[file_path] = not current_status
-        self._save_approved_status()
-        return self.approved_files[file_path]
-
-    def is_approved(self, file_path: str) -> bool:
-        """Check if file is approved"""
-        file_path = os.path.normpath(file_path)
-        return self.approved_files.get(file_path, False)
-
-    def get_approved_files(self) -> List[str]:
-        """Get list of all approved file paths"""
-        return [path for path, approved in self.approved_files.items() if approved]
-
-    def get_unapproved_files(self) -> List[str]:
-        """Get list of all unapproved file paths"""
-        return [path for path, approved in self.approved_files.items() if not approved]
-
-    # KEEP ALL YOUR EXISTING METHODS AS THEY ARE (save_root, set_root, list_users, etc.)
-    def save_root(self, path: str):
-        os.makedirs(self.settings_dir, exist_ok=True)
-        with open(self._settings_path, "w", encoding="utf-8") as f:
-            json.dump({"root": path}, f)
-
-    def set_root(self, path: str) -> bool:
-        if not _looks_like_users_root(path):
-            return False
-        self.root = path
-        self.users_dir = os.path.join(self.root, "users")
-        self.trash_dir = os.path.join(self.root, "trash")
-        self.save_root(path)
-        return True
+    def _prefetch_neighbors(self):
+        if self.rows is None or self.prefetcher is None:
+            return
+        for direction in (1, -1):
+            for n, i in enumerate(self._image_indexes(direction)):
+                if n >= self.neighbors:
+                    break
+                self.prefetcher.want(self.rows[i].path)
+
+    def step(self, direction):
+        """Move to the next/previous image in the grid order"""
+        if self.rows is None:
+            return
+        app = MDApp.get_running_app()
+        nxt = next(self._image_indexes(direction), None)
+        if nxt is None and direction > 0 and app.load_more_photos_for_preview():
+            self.rows = app._photo_rows
+            nxt = next(self._image_indexes(direction), None)
+        if nxt is None:
+            return
+        self.index = nxt
+        row = self.rows[nxt]
+        self.image_path = self.image_source = row.path
+        self.is_approved = row.approved
+        self._style_approve_btn()
+        self.file_info = self.info.text = app._preview_info(row)
+        self._show(row.path)
+
+    def approve_and_next(self):
+        """Approve the current photo (if needed) and advance in one action"""
+        app = MDApp.get_running_app()
+        if not self.is_approved and app.set_approval(self.image_path, True):
+            self.is_approved = True
+            self._style_approve_btn()
+        self.step(1)
 
-    def list_users(self) -> List[str]:
-        out: List[str] = []
-        # A) folder names that look like mobiles or profile.json with a mobile
-        try:
-            for name in sorted(os.listdir(self.users_dir)):
-                p = os.path.join(self.users_dir, name)
-                if not os.path.isdir(p):
-                    continue
-                if len(name) == 10 and name.isdigit():
-                    out.append(name)
-                else:
-                    prof = os.path.join(p, "profile.json")
-                    try:
-                        with open(prof, "r", encoding="utf-8") as f:
-                            data = json.load(f) or {}
-                        mob = str(data.get("mobile", "")).strip()
-                        mob_digits = "".join(ch for ch in mob if ch.isdigit())
-                        if len(mob_digits) == 10 and mob_digits not in out:
-                            out.append(mob_digits)
-                    except Exception:
-                        pass
-        except FileNotFoundError:
-            pass
-        # B) derive from upload filenames if still empty
-        if not out:
-            for p in glob.glob(os.path.join(self.users_dir, "*", "uploads", "*")):
-                base = os.path.basename(p)
-                prefix = base.split("_", 1)[0]
-                if len(prefix) == 10 and prefix.isdigit() and prefix not in out:
-                    out.append(prefix)
-        return sorted(out)
-
-    def uploads_dir(self, mobile: str) -> str:
-        return os.path.join(self.users_dir, str(mobile), "uploads")
-
-    def list_uploads_for_user(self, mobile: str) -> List[Upload]:
-        udir = self.uploads_dir(mobile)
-        items: List[Upload] = []
-        try:
-            for base in sorted(os.listdir(udir)):
-                if not base.startswith(f"{mobile}_"):
-                    continue
-                p = os.path.join(udir, base)
-                if not os.path.isfile(p):
-                    continue
-                ext = os.path.splitext(base)[1].lower()
-                if ext not in (IMAGE_EXTS | VIDEO_EXTS):
-                    continue
-                mt = 'image' if ext in IMAGE_EXTS else 'video'
-                try:
-                    ts = os.path.getmtime(p)
-                except Exception:
-                    ts = time.time()
-                items.append(Upload(path=p, media_type=mt, created_at=ts))
-        except FileNotFoundError:
-            pass
-        items.sort(key=lambda r: r.created_at, reverse=True)
-        return items
-
-    def delete_user(self, mobile: str) -> bool:
-        src = os.path.join(self.users_dir, str(mobile))
-        if not os.path.isdir(src):
-            return False
-        dst = os.path.join(self.trash_dir, f"{int(time.time())}_{mobile}")
-        try:
-            shutil.move(src, dst)
+    def toggle_approval(self, instance):
+        """Toggle approval status"""
+        app = MDApp.get_running_app()
+        if app.set_approval(self.image_path, not self.is_approved):
+            self.is_approved = not self.is_approved
+            self._style_approve_btn()
+
+class PhotoTile(RecycleDataViewBehavior, MDCard):
+    """One recycled cell of the photos RecycleView (layout in admin.kv)."""
+    path = StringProperty("")
+    name = StringProperty("")
+    media_type = StringProperty("image")
+    approved = BooleanProperty(False)
+    created_at = NumericProperty(0)
+    index = None
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.index = index
+        ret = super().refresh_view_attrs(rv, index, data)
+        MDApp.get_running_app().bind_thumbnail(self)
+        return ret
+
+    def on_touch_down(self, touch):
+        if self.collide_point(*touch.pos) and self.media_type == "image":
+            MDApp.get_running_app().open_photo_at(self.index)
             return True
-        except Exception:
-            return False
+        return super().on_touch_down(touch)
 
 class AdminApp(MDApp):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.store = AdminStore()
+        with TRACE.phase("store_init"):
+            self.store = AdminStore()
         self._selected_mobile: str | None = None
         self.theme_manager = ThemeManager()
         self.is_dark_mode = BooleanProperty(False)
         # ADD THESE TWO LINES
         self.show_approved_only = False
         self.show_unapproved_only = False
+        self.photos_page_size = 200
+        self.prefetch_rows = 3
+        self._photos_shown = 0
+        self._photos_has_more = False
+        self._photo_rows: List[Upload] = []
+        # Thumbnails: JPEGs on disk + decoded textures in a byte-bounded LRU
+        self.thumbs = ThumbnailCache(os.path.join(self.store.settings_dir, "thumbs"),
+                                     stat=self.store.upload_stat, resolve=self.store.local_path)
+        self._thumb_textures = LRUCache(64 * 1024 * 1024,
+                                        sizeof=lambda t: t.width * t.height * 4)
+        self._thumb_waiting = {}
+        # User search: in-memory index, debounced keystrokes, capped results
+        self.user_index = UserIndex()
+        self.search_limit = 200
+        self.search_delay = 0.25
+        self._search_query = ""
+        self._search_ev = None
+        self.preview_neighbors = 2
+        self._preview_cache = PreviewPrefetcher(capacity=2 * self.preview_neighbors + 1,
+                                                resolve=self.store.local_path)
+        self.export_format = "zip"   # or "tar" / "tar.gz"
+        self._export_job = None
+        self._announce_scan = False
+        self.trash_retention_days = 30
+        self._sync_job = None
+        self._dedupe_job = None
+        self._queue = None          # ModerationQueue while the review queue is shown
+        self._queue_renew_ev = None
+        self.queue_batch = 30
 
     # KEEP ALL YOUR EXISTING METHODS AS THEY ARE (build, on_start, refresh_users, etc.)
     def build(self):
@@ -423,7 +382,8 @@ class AdminApp(MDApp):
         
         # Try to load KV file, if it fails use a basic layout
         try:
-            return Builder.load_file("admin.kv")
+            with TRACE.phase("kv_load"):
+                return Builder.load_file("admin.kv")
         except Exception as e:
             print(f"KV file error: {e}")
             return self.create_fallback_ui()
@@ -448,148 +408,380 @@ class AdminApp(MDApp):
         return layout
 
     def on_start(self):
+        Clock.schedule_once(self._finish_startup_trace, 0)
+        # Finish moves interrupted last session, then drop old trash, off the UI thread
+        threading.Thread(target=self._trash_housekeeping, name="trash-housekeeping",
+                         daemon=True).start()
         Clock.schedule_once(lambda *_: self.refresh_users(), 0)
-        self.root.ids.current_root_lbl.text = f"Root: {self.store.root}"
+        self.root.ids.current_root_lbl.text = self._root_label()
         self.update_stats()
+        # Low-priority: thumbnails for uploads made before the cache existed
+        Clock.schedule_once(lambda *_: self.thumbs.start_backfill(self._all_image_paths), 5)
 
-    # -------- ENHANCED USERS TAB ----------
-    def refresh_users(self, *_):
-        lst = self.root.ids.users_list
-        lst.clear_widgets()
+    def _trash_housekeeping(self):
+        try:
+            self.store.recover_trash()
+            self.store.purge_trash(self.trash_retention_days)
+        except Exception as e:
+            print(f"Trash housekeeping failed: {e}")
+
+    def _finish_startup_trace(self, *_):
+        """Runs on the first frame: save startup timings and flag budget overruns."""
+        TRACE.mark("first_frame")
+        TRACE.remove_import_hook()
+        for line in TRACE.write(os.path.join(self.store.settings_dir, "startup_trace.json")):
+            print(f"Startup: over budget: {line}")
+
+    def on_stop(self):
+        if self._export_job is not None:
+            self._export_job.cancel()
+        if self._sync_job is not None:
+            self._sync_job.cancel()   # partial copies resume next time
+        if self._queue is not None:
+            self._queue.release()     # hand unreviewed claims back right away
+        self.store.scanner.shutdown()
+        self.store.shutdown_trash()
+        self.thumbs.shutdown()
+        self._preview_cache.clear()
+
+    def _on_root_discovered(self, root):
+        def apply(*_):
+            if root and root != self.store.root and self.store.root_guessed and self.store.set_root(root):
+                self._toast(f"Found app data at {root}")
+                self.refresh_users()
+        Clock.schedule_once(apply, 0)
+
+    def _all_image_paths(self):
         for mob in self.store.list_users():
-            it = OneLineListItem(text=mob)
-            it.bind(on_release=lambda inst, m=mob: self.select_user(m))
-            lst.add_widget(it)
+            for up in self.store.list_uploads_for_user(mob):
+                if up.media_type == "image" and not up.archived:   # don't rehydrate just to backfill
+                    yield up.path
 
+    # -------- ENHANCED USERS TAB ----------
+    def refresh_users(self, *_, force: bool = False):
+        """Rescan in the background: the user list fills in first, then stats"""
         if not self._selected_mobile:
             self.root.ids.selected_user_lbl.text = "No user selected"
 
-        self.root.ids.photos_grid.clear_widgets()
-        self.root.ids.current_root_lbl.text = f"Root: {self.store.root}"
-        self.update_stats()
+        self._set_photo_rows([])
+        self.root.ids.current_root_lbl.text = self._root_label()
+        self._set_scan_status("Scanning users...", 0)
+        def on_users(mobiles):
+            # profile reads stay off the UI thread; users may live in any mounted root
+            self.user_index.sync(self.store.user_dir, mobiles)
+            Clock.schedule_once(lambda *_: self._on_users_scanned(mobiles), 0)
+
+        def on_progress(done, total):
+            Clock.schedule_once(lambda *_: self._set_scan_status(
+                f"Scanning {done}/{total} users", 100.0 * done / total), 0)
+
+        def on_done(stats):
+            Clock.schedule_once(lambda *_: self._on_scan_done(stats), 0)
+
+        def on_error(msg):
+            Clock.schedule_once(lambda *_: self._on_scan_error(msg), 0)
+
+        self.store.scan_async(force=force, on_users=on_users, on_progress=on_progress,
+                              on_done=on_done, on_error=on_error)
+
+    def _on_users_scanned(self, mobiles):
+        self._run_search()
+        if hasattr(self.root.ids, 'total_users_lbl'):
+            self.root.ids.total_users_lbl.text = str(len(mobiles))
+        if not mobiles and self.store.root_guessed and self.store.discovery.exhausted:
+            # quick probe ran out of time: keep looking without blocking the window
+            self.store.discovery.search_async(_root_candidates, self._on_root_discovered)
+
+    def _on_scan_error(self, msg):
+        self._set_scan_status("", None)
+        self._announce_scan = False
+        self._toast(msg)
+
+    def _on_scan_done(self, stats):
+        self._set_scan_status("", None)
+        self._show_stats(*stats)
+        if self._selected_mobile:
+            self._update_selected_label()
+        if self._announce_scan:
+            self._announce_scan = False
+            self._toast("All data refreshed")
+
+    def _root_label(self):
+        extra = len(self.store.roots) - 1
+        return f"Root: {self.store.root}" + (f" (+{extra} more)" if extra else "")
+
+    def _set_scan_status(self, text, percent):
+        lbl = self.root.ids.get("scan_status_lbl")
+        if lbl is not None:
+            lbl.text = text
+        bar = self.root.ids.get("scan_progress")
+        if bar is not None:
+            bar.opacity = 0 if percent is None else 1
+            bar.value = percent or 0
 
     def select_user(self, mobile: str):
+        self._leave_queue()
         self._selected_mobile = mobile
         self.root.ids.selected_user_lbl.text = f"Photos of {mobile}"
         self.refresh_uploads()
 
     def search_users(self, query):
-        """Search/filter users in real-time"""
-        all_users = self.store.list_users()
-        lst = self.root.ids.users_list
-        lst.clear_widgets()
-
-        if not query.strip():
-            # Show all users if no query
-            for mob in all_users:
-                it = OneLineListItem(text=mob)
-                it.bind(on_release=lambda inst, m=mob: self.select_user(m))
-                lst.add_widget(it)
-        else:
-            # Filter users based on query
-            filtered_users = [user for user in all_users if query in user]
-            for mob in filtered_users:
-                it = OneLineListItem(text=mob)
-                it.bind(on_release=lambda inst, m=mob: self.select_user(m))
-                lst.add_widget(it)
+        """Search/filter users as you type (debounced; mobile, name, district, state)"""
+        self._search_query = query or ""
+        if self._search_ev is not None:
+            self._search_ev.cancel()
+        self._search_ev = Clock.schedule_once(lambda *_: self._run_search(), self.search_delay)
+
+    def _run_search(self):
+        self._search_ev = None
+        hits, total = self.user_index.search(self._search_query, limit=self.search_limit)
+        rows = []
+        for mob in hits:
+            prof = self.user_index.profile(mob)
+            extra = ", ".join(v for v in (prof.get("name"), prof.get("district"), prof.get("state")) if v)
+            rows.append({"text": f"{mob}  {extra}" if extra else mob, "mobile": mob})
+        # Virtualized list: only visible rows get widgets
+        self.root.ids.users_rv.data = rows
+        lbl = self.root.ids.get("users_count_lbl")
+        if lbl is not None:
+            lbl.text = (f"{total} users" if total <= len(hits)
+                        else f"Showing {len(hits)} of {total} users — refine the search")
 
     # -------- ENHANCED PHOTOS TAB ----------
     # REPLACE THE refresh_uploads METHOD WITH THIS UPDATED VERSION
+    def _approval_filter(self):
+        if self.show_approved_only:
+            return True
+        if self.show_unapproved_only:
+            return False
+        return None
+
     def refresh_uploads(self):
-        grid = self.root.ids.photos_grid
-        grid.clear_widgets()
+        if self._queue is not None:
+            self._leave_queue()
+        self._set_photo_rows([])
+        self._photos_shown = 0
+        self._photos_has_more = False
         if not self._selected_mobile:
             return
+        self.root.ids.photos_rv.scroll_y = 1
+        mobile, flt = self._selected_mobile, self._approval_filter()
 
-        uploads = self.store.list_uploads_for_user(self._selected_mobile)
-        
-        # Filter based on approval status
-        if self.show_approved_only:
-            uploads = [up for up in uploads if self.store.is_approved(up.path)]
-        elif self.show_unapproved_only:
-            uploads = [up for up in uploads if not self.store.is_approved(up.path)]
-
-        for row in uploads:
-            is_approved = self.store.is_approved(row.path)
-            card = MDCard(
-                orientation="vertical", 
-                radius=[12], 
-                elevation=2,
-                size_hint_y=None, 
-                height=150,
-                padding="4dp"
-            )
-            
-            # Add approval indicator
-            approval_indicator = BoxLayout(
-                size_hint_y=None,
-                height='20dp',
-                padding='2dp'
-            )
-            
-            status_label = Label(
-                text='✓' if is_approved else '○',
-                size_hint_x=None,
-                width='20dp',
-                color=(0, 1, 0, 1) if is_approved else (0.5, 0.5, 0.5, 1),
-                font_size='14sp'
-            )
-            
-            approval_indicator.add_widget(status_label)
-            approval_indicator.add_widget(Label())  # spacer
-            
-            card.add_widget(approval_indicator)
-            
-            if row.media_type == "image":
-                img = AsyncImage(
-                    source=row.path, 
-                    allow_stretch=True,
-                    keep_ratio=True, 
-                    mipmap=True, 
-                    nocache=False,
-                    anim_delay=0.1
-                )
-                img.bind(on_touch_down=lambda instance, touch, path=row.path, row=row: 
-                         self._on_image_touch(instance, touch, path, row))
-                card.add_widget(img)
+        def work():
+            counts = self.store.approval_counts(mobile)
+            page = self.store.list_uploads_for_user(
+                mobile, approved=flt, limit=self.photos_page_size + 1, refresh=False)
+            return counts, page
+
+        def done(result):
+            Clock.schedule_once(lambda *_: self._on_uploads_loaded(mobile, flt, *result), 0)
+
+        def failed(msg):
+            Clock.schedule_once(lambda *_: self._toast(msg), 0)
+
+        # Selecting another user (or filter) cancels this one
+        self.store.scanner.scan_user(self.store.roots_of(mobile), mobile, work, done, failed)
+
+    def _on_uploads_loaded(self, mobile, flt, counts, page):
+        if mobile != self._selected_mobile or flt != self._approval_filter():
+            return
+        self._set_selected_label(counts)
+        self._photos_shown = 0
+        self._photo_rows = []
+        self._append_uploads(page)
+
+    def _update_selected_label(self):
+        if not self._selected_mobile:
+            return
+        self._set_selected_label(self.store.approval_counts(self._selected_mobile))
+
+    def _set_selected_label(self, counts):
+        self.root.ids.selected_user_lbl.text = (
+            f"Photos of {self._selected_mobile} — {counts['approved']} approved, "
+            f"{counts['unapproved']} unapproved")
+
+    def load_more_uploads(self, *_):
+        """Append the next page of the current filter (approved/unapproved/all)"""
+        if self._queue is not None:
+            self._claim_more()
+            return
+        if not self._selected_mobile:
+            return
+        # Only the matching page is pulled from the store's index
+        uploads = self.store.list_uploads_for_user(
+            self._selected_mobile, approved=self._approval_filter(),
+            limit=self.photos_page_size + 1, offset=self._photos_shown, refresh=False)
+        self._append_uploads(uploads)
+
+    def _append_uploads(self, uploads: List[Upload]):
+        self._photos_has_more = len(uploads) > self.photos_page_size
+        uploads = uploads[:self.photos_page_size]
+        self._photos_shown += len(uploads)
+        self._set_photo_rows(self._photo_rows + uploads)
+
+    def _set_photo_rows(self, rows: List[Upload]):
+        # The RecycleView only builds tiles for the visible rows and rebinds
+        # them to these dicts while scrolling.
+        self._photo_rows = rows
+        self.root.ids.photos_rv.data = [{
+            "path": r.path,
+            "name": os.path.basename(r.path),
+            "media_type": r.media_type,
+            "approved": r.approved,
+            "created_at": r.created_at,
+        } for r in rows]
+
+    def _visible_photo_range(self, rv):
+        """(first, last) data indexes inside the viewport"""
+        layout = rv.children[0] if rv.children else None
+        if layout is None or not rv.data:
+            return 0, -1
+        cols = max(1, int(getattr(layout, "cols", 1) or 1))
+        row_h = dp(150) + dp(10)
+        hidden = max(0.0, layout.height - rv.height)
+        top = (1.0 - rv.scroll_y) * hidden
+        first_row = int(top // row_h)
+        last_row = int((top + rv.height) // row_h)
+        return first_row * cols, min(len(rv.data) - 1, (last_row + 1) * cols - 1)
+
+    def on_photos_scroll(self, rv):
+        """Fetch the next page near the bottom and warm images just outside the viewport"""
+        if self._photos_has_more and rv.scroll_y <= 0.05:
+            self.load_more_uploads()
+        first, last = self._visible_photo_range(rv)
+        if last < first:
+            return
+        cols = max(1, int(getattr(rv.children[0], "cols", 1) or 1))
+        margin = self.prefetch_rows * cols
+        ahead = range(last + 1, min(len(rv.data), last + 1 + margin))
+        behind = range(max(0, first - margin), first)
+        self._prefetch_images([rv.data[i]["path"] for i in (*ahead, *behind)
+                               if rv.data[i]["media_type"] == "image"])
+
+    def _prefetch_images(self, paths):
+        for p in paths:
+            if self._thumb_textures.get(p) is not None:
+                continue
+            if self.thumbs.available:
+                self.thumbs.request(p, lambda thumb, p=p: Clock.schedule_once(
+                    lambda *_: self._on_thumb_ready(p, thumb), 0))
             else:
-                name = os.path.basename(row.path)
-                card.add_widget(MDLabel(
-                    text=f"▶ {name}", 
-                    halign="center",
-                    theme_text_color="Secondary",
-                    font_style="Caption"
-                ))
-            grid.add_widget(card)
-
-    def _on_image_touch(self, instance, touch, image_path, upload_row):
-        if instance.collide_point(*touch.pos):
-            self.show_fullscreen_preview(image_path, upload_row)
-            return True
-        return False
+                try:
+                    Loader.image(p)   # lands in the same cache AsyncImage reads from
+                except Exception:
+                    pass
 
-    # REPLACE THE show_fullscreen_preview METHOD WITH THIS UPDATED VERSION
-    def show_fullscreen_preview(self, image_path, upload_row):
-        """Show enhanced full-screen preview with approval toggle"""
-        file_name = os.path.basename(image_path)
-        file_size = self._get_file_size(image_path)
-        modified_time = time.strftime('%Y-%m-%d %H:%M:%S', 
-                                    time.localtime(upload_row.created_at))
-        is_approved = self.store.is_approved(image_path)  # ADD THIS LINE
+    # -------- THUMBNAILS ----------
+    def bind_thumbnail(self, tile):
+        """Show the cached thumbnail texture for a (re)bound tile"""
+        img = tile.ids.get("img")
+        if img is None:
+            return
+        path = tile.path
+        if tile.media_type != "image" or not path:
+            img.source = ""
+            img.texture = None
+            return
+        if not self.thumbs.available:
+            img.source = path   # no Pillow: decode the original as before
+            return
+        img.source = ""
+        tex = self._thumb_textures.get(path)
+        img.texture = tex
+        if tex is not None:
+            return
+        self._thumb_waiting[path] = tile
+        self.thumbs.request(path, lambda thumb, p=path: Clock.schedule_once(
+            lambda *_: self._on_thumb_ready(p, thumb), 0))
+
+    def _on_thumb_ready(self, path, thumb):
+        tile = self._thumb_waiting.pop(path, None)
+        tex = self._thumb_textures.get(path)
+        if tex is None and thumb:
+            try:
+                from kivy.core.image import Image as CoreImage
+                tex = CoreImage(thumb).texture
+                self._thumb_textures.put(path, tex)
+            except Exception:
+                tex = None
+        if tile is not None and tile.path == path:
+            img = tile.ids.get("img")
+            if img is not None:
+                if tex is not None:
+                    img.texture = tex
+                else:
+                    img.source = path   # undecodable thumbnail: show the original
 
-        file_info = f"File: {file_name}\nSize: {file_size}\nModified: {modified_time}\nUser: {self._selected_mobile}"
+    def open_photo_at(self, index):
+        if index is None or not (0 <= index < len(self._photo_rows)):
+            return
+        row = self._photo_rows[index]
+        self.show_fullscreen_preview(row.path, row, index=index)
 
+    def load_more_photos_for_preview(self) -> bool:
+        """Pull the next grid page when the preview runs past the loaded rows"""
+        if not self._photos_has_more:
+            return False
+        before = len(self._photo_rows)
+        self.load_more_uploads()
+        return len(self._photo_rows) > before
+
+    def set_approval(self, path: str, approved: bool) -> bool:
+        """Approve/unapprove one upload; in the review queue only while its lease is ours"""
+        if self._queue is not None:
+            from moderation import LeaseLost
+            item = self._queue.item_for(path)
+            try:
+                if item is None:
+                    raise LeaseLost(path)
+                self._queue.decide([item], approved)   # also marks it done for other reviewers
+            except LeaseLost:
+                self._drop_photo_rows([path])
+                self._toast("Another reviewer took this item over")
+                return False
+        elif approved:
+            self.store.approve_many([path])
+        else:
+            self.store.reject_many([path])
+        self.on_approval_changed(path, approved)
+        return True
+
+    def on_approval_changed(self, path: str, approved: bool):
+        """Keep the visible tile in sync after a toggle in the preview"""
+        rv = self.root.ids.photos_rv
+        for i, row in enumerate(self._photo_rows):
+            if row.path == path:
+                row.approved = approved
+                rv.data[i]["approved"] = approved
+                rv.refresh_from_data()
+                break
+        self._update_selected_label()
+
+    def _preview_info(self, row):
+        file_name = os.path.basename(row.path)
+        file_size = self._get_file_size(row.path)
+        modified_time = time.strftime('%Y-%m-%d %H:%M:%S', 
+                                    time.localtime(row.created_at))
+        return f"File: {file_name}\nSize: {file_size}\nModified: {modified_time}\nUser: {self._selected_mobile}"
+
+    # REPLACE THE show_fullscreen_preview METHOD WITH THIS UPDATED VERSION
+    def show_fullscreen_preview(self, image_path, upload_row, index=None):
+        """Show enhanced full-screen preview with approval toggle and prev/next"""
         preview = EnhancedFullScreenPreview(
             image_path=image_path,
-            file_info=file_info,
-            is_approved=is_approved  # ADD THIS LINE
+            file_info=self._preview_info(upload_row),
+            is_approved=upload_row.approved,
+            rows=self._photo_rows if index is not None else None,
+            index=index,
+            prefetcher=self._preview_cache,
+            neighbors=self.preview_neighbors,
         )
         preview.open()
 
     def _get_file_size(self, file_path):
         """Get human-readable file size"""
         try:
-            size_bytes = os.path.getsize(file_path)
+            size_bytes = self.store.upload_stat(file_path).st_size
             for unit in ['B', 'KB', 'MB', 'GB']:
                 if size_bytes < 1024.0:
                     return f"{size_bytes:.1f} {unit}"
@@ -620,17 +812,80 @@ class AdminApp(MDApp):
         self.refresh_uploads()
         self._toast("Showing all photos")
 
+    # -------- REVIEW QUEUE (unreviewed uploads of all users) ----------
+    def show_review_queue(self):
+        """Claim the oldest unreviewed uploads across all users and show them"""
+        if self._queue is None:
+            from moderation import ModerationQueue
+            self._queue = ModerationQueue(self.store)
+            self._queue_renew_ev = Clock.schedule_interval(self._renew_queue,
+                                                           self._queue.lease_seconds / 3)
+        else:
+            self._queue.release()
+        self._selected_mobile = None
+        self._set_photo_rows([])
+        self._photos_shown = 0
+        self._photos_has_more = False
+        self.root.ids.photos_rv.scroll_y = 1
+        self.root.ids.selected_user_lbl.text = "Review queue: claiming..."
+        self._claim_more()
+
+    def _claim_more(self):
+        queue = self._queue
+
+        def work():
+            items = queue.claim(self.queue_batch)
+            pending = queue.pending_count()
+            Clock.schedule_once(lambda *_: self._on_queue_claimed(queue, items, pending), 0)
+
+        self._photos_has_more = False   # no second claim while this one runs
+        threading.Thread(target=work, name="queue-claim", daemon=True).start()
+
+    def _on_queue_claimed(self, queue, items, pending):
+        if queue is not self._queue:
+            queue.release(items)   # left the queue meanwhile
+            return
+        rows = [Upload(path=i.path, media_type=i.media_type, created_at=i.created_at,
+                       approved=False, root=i.root) for i in items]
+        self._photos_has_more = len(items) == self.queue_batch
+        self._photos_shown += len(rows)
+        self._set_photo_rows(self._photo_rows + rows)
+        self.root.ids.selected_user_lbl.text = (
+            f"Review queue: {len(queue.claimed())} claimed by you, {pending} unreviewed in total")
+
+    def _renew_queue(self, *_):
+        if self._queue is None:
+            return
+        lost = self._queue.renew()
+        if lost:   # expired or taken over: no longer ours to review
+            self._drop_photo_rows([i.path for i in lost])
+            self._toast(f"{len(lost)} item(s) went to another reviewer")
+
+    def _drop_photo_rows(self, paths):
+        gone = set(paths)
+        rows = [r for r in self._photo_rows if r.path not in gone]
+        if len(rows) != len(self._photo_rows):
+            self._set_photo_rows(rows)
+
+    def _leave_queue(self):
+        if self._queue is None:
+            return
+        if self._queue_renew_ev is not None:
+            self._queue_renew_ev.cancel()
+            self._queue_renew_ev = None
+        queue, self._queue = self._queue, None
+        threading.Thread(target=queue.release, name="queue-release", daemon=True).start()
+
     # KEEP ALL YOUR EXISTING METHODS AS THEY ARE BELOW THIS LINE
     # -------- NEW STATISTICS FEATURES ----------
     def update_stats(self):
-        """Update dashboard statistics"""
-        total_size, total_images, total_videos = self.calculate_storage_stats()
-        total_users = len(self.store.list_users())
-
-        # Update UI labels if they exist
+        """Update dashboard statistics from the catalog as it stands (no rescan)"""
         if hasattr(self.root.ids, 'total_users_lbl'):
-            self.root.ids.total_users_lbl.text = str(total_users)
+            self.root.ids.total_users_lbl.text = str(len(self.store.list_users(refresh=False)))
+        self._show_stats(*self.store.storage_stats(refresh=False))
 
+    def _show_stats(self, total_size, total_images, total_videos):
+        # Update UI labels if they exist
         if hasattr(self.root.ids, 'total_photos_lbl'):
             self.root.ids.total_photos_lbl.text = str(total_images + total_videos)
 
@@ -638,24 +893,8 @@ class AdminApp(MDApp):
             self.root.ids.storage_lbl.text = self._format_size(total_size)
 
     def calculate_storage_stats(self):
-        """Calculate total storage usage"""
-        total_size = 0
-        total_images = 0
-        total_videos = 0
-
-        for user in self.store.list_users():
-            uploads = self.store.list_uploads_for_user(user)
-            for upload in uploads:
-                try:
-                    total_size += os.path.getsize(upload.path)
-                    if upload.media_type == 'image':
-                        total_images += 1
-                    else:
-                        total_videos += 1
-                except:
-                    pass
-
-        return total_size, total_images, total_videos
+        """Calculate total storage usage (from the store's catalog)"""
+        return self.store.storage_stats()
 
     def _format_size(self, size_bytes):
         """Format file size in human readable format"""
@@ -666,52 +905,114 @@ class AdminApp(MDApp):
         return f"{size_bytes:.1f} PB"
 
     # -------- NEW EXPORT FEATURES ----------
+    def _cancel_running_export(self) -> bool:
+        if self._export_job is not None and self._export_job.running:
+            self._export_job.cancel()
+            self._toast("Cancelling export...")
+            return True
+        return False
+
     def export_user_photos(self):
-        """Export all photos for selected user"""
+        """Export the selected user's photos to one archive"""
+        if self._cancel_running_export():
+            return
         if not self._selected_mobile:
             self._toast("Select a user first")
             return
+        self.export_photos([self._selected_mobile])
 
-        try:
-            export_dir = os.path.join(os.path.expanduser("~"), "PhotoExports", f"user_{self._selected_mobile}_{int(time.time())}")
-            os.makedirs(export_dir, exist_ok=True)
-            
-            uploads = self.store.list_uploads_for_user(self._selected_mobile)
-            exported_count = 0
-            
-            for upload in uploads:
-                filename = os.path.basename(upload.path)
-                shutil.copy2(upload.path, os.path.join(export_dir, filename))
-                exported_count += 1
-            
-            self._toast(f"Exported {exported_count} files to {export_dir}")
-        except Exception as e:
-            self._toast(f"Export failed: {e}")
+    def export_search_results(self):
+        """Export every user matching the search to one archive, after confirming the count"""
+        if self._cancel_running_export():
+            return
+        mobiles, _ = self.user_index.search(self._search_query, limit=len(self.user_index) or 1)
+        if not mobiles:
+            self._toast("No users to export")
+            return
+        what = f'matching "{self._search_query}"' if self._search_query else "in every mounted root"
+        self._confirm(f"Export all {len(mobiles)} users {what}?",
+                      lambda: self.export_photos(mobiles))
+
+    def export_photos(self, mobiles, *, since=None, until=None, fmt=None):
+        """Stream uploads of ``mobiles`` (optionally within [since, until]) into an archive
+        on a background thread; pressing Export again cancels."""
+        fmt = fmt or self.export_format
+        export_dir = os.path.join(os.path.expanduser("~"), "PhotoExports")
+        tag = mobiles[0] if len(mobiles) == 1 else f"{len(mobiles)}_users"
+        dest = os.path.join(export_dir, f"user_{tag}_{time.strftime('%Y%m%d_%H%M%S')}.{fmt}")
+        last = [0.0]
+
+        def progress(done, total, nbytes):
+            now = time.monotonic()
+            if done == total or now - last[0] >= 0.2:
+                last[0] = now
+                Clock.schedule_once(lambda *_: self._set_export_status(
+                    f"{done}/{total} files, {self._format_size(nbytes)}"), 0)
+
+        def finished(res):
+            Clock.schedule_once(lambda *_: self._on_export_done(res), 0)
+
+        self._export_job = ExportJob(self.store, mobiles, dest, since=since, until=until,
+                                     progress=progress).start(finished)
+        self._set_export_status("Collecting files...")
+        self._toast(f"Exporting {len(mobiles)} user(s)... press Export again to cancel")
+
+    def _set_export_status(self, text):
+        lbl = self.root.ids.get("export_progress_lbl")
+        if lbl is not None:
+            lbl.text = text
+
+    def _on_export_done(self, res):
+        self._export_job = None
+        if res["cancelled"]:
+            self._set_export_status("Cancelled")
+            self._toast("Export cancelled")
+            return
+        if res.get("error"):
+            self._set_export_status("Failed")
+            self._toast(f"Export failed: {res['error']}")
+            return
+        n = len(res["exported"])
+        self._set_export_status(f"{n} files, {self._format_size(res['bytes'])}")
+        msg = f"Exported {n} files to {res['path']}"
+        if res["errors"]:
+            msg += f" ({len(res['errors'])} failed)"
+        self._toast(msg)
 
     def generate_report(self):
-        """Generate usage report"""
-        total_size, total_images, total_videos = self.calculate_storage_stats()
-
-        report = f"""
+        """Generate usage report (text summary + JSON/CSV breakdowns) off the UI thread"""
+        def work():
+            try:
+                self.store.refresh()
+                report = build_report(self.store.catalog, self.store.roots)
+                report_dir = os.path.join(os.path.expanduser("~"), "AdminReports")
+                stem = f"admin_report_{int(time.time())}"
+                write_report(report, report_dir, stem)
+                t = report["totals"]
+                media = report["per_media_type"]
+                summary = f"""
 ADMIN REPORT - {time.strftime('%Y-%m-%d %H:%M:%S')}
 =================================
-Total Users: {len(self.store.list_users())}
-Total Images: {total_images}
-Total Videos: {total_videos}
-Total Storage: {self._format_size(total_size)}
-Data Root: {self.store.root}
+Total Users: {t['users']} ({t['active_users']} with uploads)
+Total Images: {media.get('image', {}).get('files', 0)}
+Total Videos: {media.get('video', {}).get('files', 0)}
+Total Storage: {self._format_size(t['bytes'])}
+Approved: {t['approved']} ({t['approval_ratio']:.1%})
+Uploads last 7 days: {report['growth']['last_7d']['files']}
+Top users by storage: {', '.join(report['top_by_bytes'][:5])}
+Data Roots: {', '.join(self.store.roots)}
 =================================
 """
+                report_path = os.path.join(report_dir, stem + ".txt")
+                with open(report_path, 'w', encoding='utf-8') as f:
+                    f.write(summary)
+                msg = f"Report saved to {report_path} (+ JSON/CSV)"
+            except Exception as e:
+                msg = f"Report failed: {e}"
+            Clock.schedule_once(lambda *_: self._toast(msg), 0)
 
-        # Save report to file
-        report_dir = os.path.join(os.path.expanduser("~"), "AdminReports")
-        os.makedirs(report_dir, exist_ok=True)
-        report_path = os.path.join(report_dir, f"admin_report_{int(time.time())}.txt")
-
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(report)
-
-        self._toast(f"Report saved to {report_path}")
+        threading.Thread(target=work, name="report", daemon=True).start()
+        self._toast("Generating report...")
 
     # -------- THEME MANAGEMENT ----------
     def toggle_theme(self):
@@ -760,7 +1061,7 @@ Data Root: {self.store.root}
             downloads_dir = os.path.join(os.path.expanduser("~"), "Downloads")
             filename = os.path.basename(image_path)
             dest_path = os.path.join(downloads_dir, filename)
-            shutil.copy2(image_path, dest_path)
+            shutil.copy2(self.store.local_path(image_path) or image_path, dest_path)
             self._toast(f"Downloaded to {dest_path}")
         except Exception as e:
             self._toast(f"Download failed: {e}")
@@ -768,16 +1069,19 @@ Data Root: {self.store.root}
     def clear_cache(self):
         """Clear application cache"""
         try:
-            # Clear any cached data
-            self._toast("Cache cleared")
+            tex_count, tex_bytes = self._thumb_textures.clear()
+            files, disk_bytes = self.thumbs.clear()
+            self.root.ids.photos_rv.refresh_from_data()
+            self._toast(f"Cache cleared: {files} thumbnails ({self._format_size(disk_bytes)} on disk), "
+                        f"{tex_count} textures ({self._format_size(tex_bytes)} in memory)")
         except Exception as e:
             self._toast(f"Cache clear failed: {e}")
 
     def refresh_all(self):
-        """Refresh all data"""
-        self.refresh_users()
-        self.update_stats()
-        self._toast("All data refreshed")
+        """Refresh all data (full rescan in the background)"""
+        self._announce_scan = True
+        self.refresh_users(force=True)
+        self._toast("Refreshing...")
 
     # -------- KEEP EXISTING MENU METHODS ----------
     def open_folder(self):
@@ -797,16 +1101,50 @@ Data Root: {self.store.root}
     def delete_user(self):
         if not self._selected_mobile:
             self._toast("Pick a user first"); return
-        if self.store.delete_user(self._selected_mobile):
-            self._toast(f"Archived {self._selected_mobile}")
+        mobile = self._selected_mobile
+        last = [0.0]
+
+        def progress(done, total):
+            now = time.monotonic()
+            if now - last[0] >= 0.2:
+                last[0] = now
+                Clock.schedule_once(lambda *_: self._set_scan_status(
+                    f"Archiving {mobile}: {self._format_size(done)}",
+                    100.0 * done / total if total else 0), 0)
+
+        def finished(err):
+            def report(*_):
+                self._set_scan_status("", None)
+                if err:
+                    self._toast(f"Archiving {mobile} failed: {err}")
+                    self.refresh_users()
+                else:
+                    self._toast(f"Archived {mobile}")
+            Clock.schedule_once(report, 0)
+
+        # The folder leaves users/ at once; a cross-device copy carries on in the background
+        if self.store.delete_user(mobile, progress=progress, done=finished):
             self._selected_mobile = None
             self.refresh_users()
         else:
             self._toast("Delete failed")
 
-    def choose_root(self):
-        # Allow picking the root directory that contains 'users'
+    def restore_user(self, entry):
+        """Bring a trashed user back (entry as listed by store.trash_entries())"""
+        def finished(err):
+            Clock.schedule_once(lambda *_: (
+                self._toast(f"Restore failed: {err}") if err else self.refresh_users()), 0)
+        try:
+            self.store.restore_user(entry, done=finished)
+        except OSError as e:
+            self._toast(f"Restore failed: {e}")
+
+    def _pick_folder(self, title):
         path = None
+        try:
+            from plyer import filechooser   # optional; only needed here
+        except Exception:
+            filechooser = None
         if filechooser:
             try:
                 sel = filechooser.choose_dir()
@@ -820,9 +1158,14 @@ Data Root: {self.store.root}
                 import tkinter as tk
                 from tkinter import filedialog
                 tk.Tk().withdraw()
-                path = filedialog.askdirectory(title="Pick folder containing 'users'")
+                path = filedialog.askdirectory(title=title)
             except Exception:
                 path = None
+        return path
+
+    def choose_root(self):
+        # Allow picking the root directory that contains 'users'
+        path = self._pick_folder("Pick folder containing 'users'")
         if not path:
             self._toast("No folder selected"); return
         if self.store.set_root(path):
@@ -831,6 +1174,106 @@ Data Root: {self.store.root}
         else:
             self._toast("Selected folder doesn't look like the app data (needs a 'users' subfolder)")
 
+    def add_root(self):
+        """Mount another device's data folder alongside the current root"""
+        path = self._pick_folder("Pick another folder containing 'users'")
+        if not path:
+            self._toast("No folder selected"); return
+        if self.store.mount_root(path):
+            self._toast(f"Added {path} ({len(self.store.roots)} roots)")
+            self.refresh_users()   # the other roots are served from the catalog cache
+        else:
+            self._toast("Selected folder doesn't look like the app data (needs a 'users' subfolder)")
+
+    def import_root(self):
+        """Copy new/changed uploads from a device folder into the current root (again to cancel)"""
+        if self._sync_job is not None and self._sync_job.running:
+            self._sync_job.cancel()
+            self._toast("Cancelling import...")
+            return
+        path = self._pick_folder("Pick the device folder containing 'users'")
+        if not path:
+            self._toast("No folder selected"); return
+        last = [0.0]
+
+        def progress(done, total, nbytes):
+            now = time.monotonic()
+            if now - last[0] >= 0.2 or done == total:
+                last[0] = now
+                Clock.schedule_once(lambda *_: self._set_scan_status(
+                    f"Importing {done}/{total} files, {self._format_size(nbytes)}",
+                    100.0 * done / total if total else 0), 0)
+
+        def done(res):
+            Clock.schedule_once(lambda *_: self._on_import_done(res), 0)
+
+        self._set_scan_status("Comparing folders...", 0)
+        self._sync_job = self.store.sync_job(path, progress=progress).start(done)
+
+    def _on_import_done(self, res):
+        self._sync_job = None
+        self._set_scan_status("", None)
+        if res["cancelled"]:
+            msg = f"Import cancelled after {res['copied']} files"
+        else:
+            msg = (f"Imported {res['copied']} files ({self._format_size(res['bytes'])}), "
+                   f"{res['profiles']} profiles")
+        if res["errors"]:
+            msg += f" ({len(res['errors'])} failed)"
+        self._toast(msg)
+        self.refresh_users()
+
+    def find_duplicates(self):
+        """Report identical uploads across users and the space they waste (again to cancel)"""
+        if self._dedupe_job is not None and self._dedupe_job.running:
+            self._dedupe_job.cancel()
+            self._toast("Cancelling duplicate search...")
+            return
+
+        def progress(files, groups, nbytes):
+            Clock.schedule_once(lambda *_: self._set_scan_status(
+                f"Checked {files} files: {groups} duplicate groups, "
+                f"{self._format_size(nbytes)} reclaimable", None), 0)
+
+        def done(res):
+            Clock.schedule_once(lambda *_: self._on_duplicates_done(res), 0)
+
+        self._set_scan_status("Looking for duplicates...", None)
+        self._dedupe_job = self.store.dedupe_job(progress=progress).start(done)
+
+    def _on_duplicates_done(self, res):
+        self._dedupe_job = None
+        self._set_scan_status("", None)
+        if res["cancelled"]:
+            self._toast("Duplicate search cancelled"); return
+        if not res["groups"]:
+            self._toast("No duplicate uploads found"); return
+        worst = sorted(res["by_user"].items(), key=lambda kv: -kv[1]["bytes"])[:3]
+        msg = (f"{res['duplicates']} duplicate files, {self._format_size(res['reclaimable'])} "
+               "reclaimable; most: " + ", ".join(f"{m} ({self._format_size(u['bytes'])})"
+                                                 for m, u in worst))
+        self._toast(msg)
+
+    def remove_root(self, path):
+        if self.store.unmount_root(path):
+            self._toast(f"Removed {path}")
+            self.refresh_users()
+
+    def _confirm(self, text: str, on_yes):
+        """Small yes/no dialog; ``on_yes()`` runs only if confirmed"""
+        view = ModalView(size_hint=(None, None), size=(dp(380), dp(160)), auto_dismiss=True)
+        box = BoxLayout(orientation='vertical', spacing=dp(10), padding=dp(12))
+        box.add_widget(Label(text=text, halign='center'))
+        buttons = BoxLayout(size_hint_y=None, height=dp(40), spacing=dp(10))
+        cancel, ok = Button(text='Cancel'), Button(text='Export')
+        cancel.bind(on_press=lambda *_: view.dismiss())
+        ok.bind(on_press=lambda *_: (view.dismiss(), on_yes()))
+        buttons.add_widget(cancel)
+        buttons.add_widget(ok)
+        box.add_widget(buttons)
+        view.add_widget(box)
+        view.open()
+
     def _toast(self, text: str):
         try:
             from kivymd.toast import toast
@@ -0,0 +1,293 @@
+# moderation.py — global review queue of unreviewed uploads with claim/lease
+from __future__ import annotations
+import os, json, time, uuid, socket
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from catalog import Catalog, media_type_for
+
+LEASE_SUFFIX = ".lease"
+
+@dataclass
+class QueueItem:
+    path: str
+    root: str
+    mobile: str
+    name: str
+    created_at: float
+    media_type: str
+    lease_expires: float = 0.0
+
+class LeaseLost(Exception):
+    """The item's lease expired and another reviewer took it."""
+
+class ModerationQueue:
+    """
+    All never-reviewed uploads of every mounted root, oldest capture
+    first, paged from the catalog's ``uploads_pending`` index.
+
+    Several admin instances (windows, machines sharing the data root) can
+    work the queue together: claim() takes a lease on each item it hands
+    out, as one small file per item in ``lease_dir`` (default
+    ``<root>/moderation``), created with O_EXCL so only one instance wins.
+    Leases expire after ``lease_seconds`` unless renewed, and an expired
+    one is taken over by renaming it away first (again only one winner).
+    decide() records the approval and turns the lease into a "done"
+    marker, so other instances skip the item and adopt the decision into
+    their own approvals the next time they claim (see absorb()). Done
+    markers are pruned after ``keep_done`` seconds.
+    """
+    def __init__(self, store, *, lease_dir: Optional[str] = None, owner: Optional[str] = None,
+                 lease_seconds: float = 300, keep_done: float = 7 * 86400):
+        self.store = store
+        self.lease_dir = lease_dir or os.path.join(store.root, "moderation")
+        os.makedirs(self.lease_dir, exist_ok=True)
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.lease_seconds = lease_seconds
+        self.keep_done = keep_done
+        self._mine: Dict[Tuple[str, str], QueueItem] = {}
+        self._decided: Dict[str, QueueItem] = {}   # normalized path -> item we recorded
+        self._absorbed: Dict[str, int] = {}   # done marker -> mtime_ns already adopted
+
+    # ---- lease files ----
+    def _lease_path(self, mobile: str, name: str) -> str:
+        return os.path.join(self.lease_dir, f"{mobile}__{name}{LEASE_SUFFIX}")
+
+    @staticmethod
+    def _read(path: str) -> Optional[dict]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f) or {}
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            return {}   # being written right now: treat as held
+
+    def _write(self, path: str, data: dict) -> None:
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    def _create(self, path: str, data: dict) -> bool:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        return True
+
+    def _acquire(self, mobile: str, name: str, now: float) -> bool:
+        path = self._lease_path(mobile, name)
+        lease = {"owner": self.owner, "expires": now + self.lease_seconds, "mobile": mobile, "name": name}
+        if self._create(path, lease):
+            return True
+        cur = self._read(path)
+        if cur is None:
+            return self._create(path, lease)   # released meanwhile
+        if "decision" in cur or not cur.get("owner"):
+            return False
+        if cur["owner"] == self.owner:
+            self._write(path, lease)
+            return True
+        if float(cur.get("expires", 0)) > now:
+            return False
+        # expired: rename it away (only one instance can), then make it ours
+        stale = f"{path}.{uuid.uuid4().hex[:8]}.stale"
+        try:
+            os.rename(path, stale)
+        except OSError:
+            return False
+        taken = self._read(stale)
+        if taken != cur:
+            # someone renewed or re-took it in between: that lease is live, put it back
+            try:
+                os.rename(stale, path)
+            except OSError:
+                pass
+            return False
+        os.remove(stale)
+        return self._create(path, lease)
+
+    # ---- queue ----
+    def _roots_by_key(self) -> Dict[str, str]:
+        return {Catalog._key(r): r for r in self.store.roots}
+
+    def claim(self, n: int = 20, *, page: int = 200) -> List[QueueItem]:
+        """Lease up to ``n`` more unreviewed items (oldest first) and return them."""
+        self.absorb()
+        now = time.time()
+        by_key = self._roots_by_key()
+        got: List[QueueItem] = []
+        after = None
+        while len(got) < n:
+            rows = self.store.catalog.pending(self.store.roots, limit=page, after=after)
+            if not rows:
+                break
+            for key, mobile, name, mtime, media_type in rows:
+                if len(got) >= n:
+                    break
+                k = (mobile, name)
+                if k in self._mine or key not in by_key:
+                    continue
+                if self.store.approvals.status(mobile, name) is not None:
+                    continue   # decided elsewhere; the catalog catches up on its next rescan
+                if not self._acquire(mobile, name, now):   # held by another reviewer, or done
+                    continue
+                root = by_key[key]
+                item = QueueItem(path=os.path.join(root, "users", mobile, "uploads", name),
+                                 root=root, mobile=mobile, name=name, created_at=mtime,
+                                 media_type=media_type, lease_expires=now + self.lease_seconds)
+                self._mine[k] = item
+                got.append(item)
+            last = rows[-1]
+            after = (last[3], last[0], last[1], last[2])
+        return got
+
+    def claimed(self) -> List[QueueItem]:
+        return sorted(self._mine.values(), key=lambda i: i.created_at)
+
+    def item_for(self, path: str) -> Optional[QueueItem]:
+        """Our claimed (or already decided) item for ``path``, if any."""
+        p = os.path.normpath(path)
+        return self._decided.get(p) or next(
+            (i for i in self._mine.values() if os.path.normpath(i.path) == p), None)
+
+    def resume(self) -> List[QueueItem]:
+        """Pick up our own unexpired leases (same ``owner``, e.g. a CLI user) after a restart."""
+        now = time.time()
+        by_key = self._roots_by_key()
+        roots = list(by_key.values())
+        for e in os.scandir(self.lease_dir):
+            if not e.name.endswith(LEASE_SUFFIX):
+                continue
+            cur = self._read(e.path)
+            if not cur or cur.get("owner") != self.owner or "decision" in cur \
+                    or float(cur.get("expires", 0)) <= now:
+                continue
+            mobile, name = cur.get("mobile"), cur.get("name")
+            if (mobile, name) in self._mine:
+                continue
+            for root, mt, media_type in self._locate(roots, mobile, name):
+                self._mine[(mobile, name)] = QueueItem(
+                    path=os.path.join(root, "users", mobile, "uploads", name), root=root,
+                    mobile=mobile, name=name, created_at=mt, media_type=media_type,
+                    lease_expires=float(cur["expires"]))
+                break
+        return self.claimed()
+
+    def _locate(self, roots: List[str], mobile: str, name: str):
+        for root in roots:
+            p = os.path.join(root, "users", mobile, "uploads", name)
+            try:
+                yield root, os.path.getmtime(p), media_type_for(name) or "image"
+            except OSError:
+                continue
+
+    def renew(self) -> List[QueueItem]:
+        """Extend all our leases; returns the items that were lost meanwhile (and forgets them)."""
+        now = time.time()
+        lost = []
+        for k, item in list(self._mine.items()):
+            cur = self._read(self._lease_path(*k))
+            if not cur or cur.get("owner") != self.owner or "decision" in cur:
+                lost.append(self._mine.pop(k))
+                continue
+            cur["expires"] = item.lease_expires = now + self.lease_seconds
+            self._write(self._lease_path(*k), cur)
+        return lost
+
+    def release(self, items: Optional[Iterable[QueueItem]] = None) -> None:
+        """Give items back to the queue unreviewed (all claimed items by default)."""
+        for item in list(items if items is not None else self._mine.values()):
+            k = (item.mobile, item.name)
+            self._mine.pop(k, None)
+            path = self._lease_path(*k)
+            cur = self._read(path)
+            if cur and cur.get("owner") == self.owner and "decision" not in cur:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _check_ours(self, keys: List[Tuple[str, str]]) -> None:
+        """Raise LeaseLost unless every item's lease (or our own done marker) is ours."""
+        for mobile, name in keys:
+            cur = self._read(self._lease_path(mobile, name))
+            if not cur or cur.get("owner") != self.owner:
+                item = self._mine.pop((mobile, name), None)
+                raise LeaseLost(item.path if item else f"{mobile}/{name}")
+
+    def decide(self, items: Iterable[QueueItem], approved: bool) -> int:
+        """
+        Approve/unapprove claimed (or re-decide our decided) items; raises
+        LeaseLost if any was taken over, in which case none is applied.
+        """
+        items = list(items)
+        self._check_ours([(i.mobile, i.name) for i in items])
+        paths = [i.path for i in items]
+        if approved:
+            self.store.approve_many(paths)
+        else:
+            self.store.reject_many(paths)
+        self._write_decisions([(i.mobile, i.name) for i in items], approved)
+        return len(items)
+
+    def record(self, keys: Iterable[Tuple[str, str]], approved: bool) -> None:
+        """
+        Mark items decided (when the approval was stored by other means) so
+        other reviewers skip them; raises LeaseLost, writing nothing, if any
+        lease is no longer ours.
+        """
+        keys = list(keys)
+        self._check_ours(keys)
+        self._write_decisions(keys, approved)
+
+    def _write_decisions(self, keys: List[Tuple[str, str]], approved: bool) -> None:
+        now = time.time()
+        for mobile, name in keys:
+            item = self._mine.pop((mobile, name), None)
+            if item is not None:
+                self._decided[os.path.normpath(item.path)] = item
+            self._write(self._lease_path(mobile, name),
+                        {"owner": self.owner, "mobile": mobile, "name": name,
+                         "decision": bool(approved), "decided_at": now})
+
+    def absorb(self) -> int:
+        """Adopt other reviewers' decisions into our approvals; prune old done markers."""
+        now = time.time()
+        adopt: Dict[bool, List[Tuple[str, str]]] = {True: [], False: []}
+        try:
+            entries = [e for e in os.scandir(self.lease_dir) if e.name.endswith(LEASE_SUFFIX)]
+        except OSError:
+            return 0
+        for e in entries:
+            try:
+                m = e.stat().st_mtime_ns
+            except OSError:
+                continue
+            if self._absorbed.get(e.name) == m:
+                continue   # unchanged since we last looked
+            cur = self._read(e.path)
+            if not cur or "decision" not in cur:
+                continue
+            self._absorbed[e.name] = m
+            if now - float(cur.get("decided_at", now)) > self.keep_done:
+                try:
+                    os.remove(e.path)
+                except OSError:
+                    pass
+                self._absorbed.pop(e.name, None)
+                continue
+            mobile, name, value = cur.get("mobile"), cur.get("name"), bool(cur["decision"])
+            if mobile and name and self.store.approvals.status(mobile, name) != value:
+                adopt[value].append((mobile, name))
+        for value, keys in adopt.items():
+            if keys:
+                self.store.approvals.set_many(keys, value)
+                self.store.catalog.set_approved(keys, value)
+        return len(adopt[True]) + len(adopt[False])
+
+    def pending_count(self) -> int:
+        return self.store.catalog.pending_count(self.store.roots)
@@ -0,0 +1,107 @@
+# reports.py — usage/approval reports built from the catalog, written as CSV + JSON
+from __future__ import annotations
+import os, csv, json, time
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Union
+
+def _ratio(a: int, b: int) -> float:
+    return round(a / b, 4) if b else 0.0
+
+def _window(daily: Dict[str, Dict[str, int]], end: date, days: int, key: str) -> int:
+    start = end - timedelta(days=days)
+    return sum(v[key] for d, v in daily.items() if start < date.fromisoformat(d) <= end)
+
+def build_report(catalog, root: Union[str, List[str]], *, top: int = 10,
+                 today: Optional[date] = None) -> Dict:
+    """
+    Aggregate ``root`` (or a list of roots, merged per user and day) from
+    the catalog index (two GROUP BY queries, no filesystem walk): totals,
+    per-user, per-day and per-media-type breakdowns, approval ratios, top
+    consumers and 7/30-day growth.
+    """
+    users = catalog.user_summary(root)
+    days = catalog.daily_summary(root)
+    today = today or date.today()
+
+    per_user = [{
+        "mobile": m, "files": n, "bytes": b, "images": i, "videos": v,
+        "approved": a, "approval_ratio": _ratio(a, n),
+        "first_upload": time.strftime("%Y-%m-%d", time.localtime(lo)) if lo else "",
+        "last_upload": time.strftime("%Y-%m-%d", time.localtime(hi)) if hi else "",
+    } for m, n, b, i, v, a, lo, hi in users]
+
+    per_media: Dict[str, Dict[str, int]] = {}
+    per_day: Dict[str, Dict[str, int]] = {}
+    for d, typ, n, b, a in days:
+        for bucket in (per_media.setdefault(typ, {"files": 0, "bytes": 0, "approved": 0}),
+                       per_day.setdefault(d, {"files": 0, "bytes": 0, "approved": 0,
+                                              "images": 0, "videos": 0})):
+            bucket["files"] += n
+            bucket["bytes"] += b
+            bucket["approved"] += a
+        per_day[d][typ + "s"] = per_day[d].get(typ + "s", 0) + n
+
+    daily_rows, cum_files, cum_bytes = [], 0, 0
+    for d in sorted(per_day):
+        v = per_day[d]
+        cum_files += v["files"]
+        cum_bytes += v["bytes"]
+        daily_rows.append({"day": d, **v, "cumulative_files": cum_files,
+                           "cumulative_bytes": cum_bytes})
+
+    files = sum(u["files"] for u in per_user)
+    approved = sum(u["approved"] for u in per_user)
+    growth = {}
+    for span in (7, 30):
+        cur_f = _window(per_day, today, span, "files")
+        prev_f = _window(per_day, today - timedelta(days=span), span, "files")
+        growth[f"last_{span}d"] = {
+            "files": cur_f,
+            "bytes": _window(per_day, today, span, "bytes"),
+            "previous_files": prev_f,
+            "change": _ratio(cur_f - prev_f, prev_f) if prev_f else None,
+        }
+
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "root": root,
+        "totals": {
+            "users": len(per_user),
+            "active_users": sum(1 for u in per_user if u["files"]),
+            "files": files,
+            "bytes": sum(u["bytes"] for u in per_user),
+            "approved": approved,
+            "approval_ratio": _ratio(approved, files),
+        },
+        "per_media_type": {t: {**v, "approval_ratio": _ratio(v["approved"], v["files"])}
+                           for t, v in sorted(per_media.items())},
+        "growth": growth,
+        "top_by_bytes": [u["mobile"] for u in sorted(per_user, key=lambda u: -u["bytes"])[:top]],
+        "top_by_files": [u["mobile"] for u in sorted(per_user, key=lambda u: -u["files"])[:top]],
+        "per_user": per_user,
+        "per_day": daily_rows,
+    }
+
+def _write_csv(path: str, rows: List[Dict], fields: List[str]) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        w.writerows(rows)
+
+def write_report(report: Dict, out_dir: str, stem: str) -> Dict[str, str]:
+    """Write <stem>.json plus <stem>_users.csv / _daily.csv / _media.csv; returns the paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    paths = {k: os.path.join(out_dir, f"{stem}{suffix}") for k, suffix in
+             (("json", ".json"), ("users", "_users.csv"), ("daily", "_daily.csv"),
+              ("media", "_media.csv"))}
+    with open(paths["json"], "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    _write_csv(paths["users"], report["per_user"],
+               ["mobile", "files", "bytes", "images", "videos", "approved",
+                "approval_ratio", "first_upload", "last_upload"])
+    _write_csv(paths["daily"], report["per_day"],
+               ["day", "files", "bytes", "images", "videos", "approved",
+                "cumulative_files", "cumulative_bytes"])
+    _write_csv(paths["media"], [{"media_type": t, **v} for t, v in report["per_media_type"].items()],
+               ["media_type", "files", "bytes", "approved", "approval_ratio"])
+    return paths
@@ -0,0 +1,137 @@
+# root_discovery.py — bounded, cached discovery of the shared <ROOT>/users folder
+from __future__ import annotations
+import os, sys, json, time, threading
+from typing import Callable, Dict, Iterable, List, Optional
+
+def _is_mobile(s: str) -> bool:
+    return len(s) == 10 and s.isdigit()
+
+def looks_like_users_root(path: str, *, max_entries: int = 500, max_user_dirs: int = 20,
+                          deadline: Optional[float] = None) -> bool:
+    """
+    True if ``path/users`` holds a <mobile> folder, or a few user folders
+    hold <mobile>_* uploads. Reads at most ``max_entries`` names of users/
+    and peeks into at most ``max_user_dirs`` uploads/ folders (first
+    entries only), so a huge unrelated tree costs the same as a small one.
+    """
+    users_dir = os.path.join(path, "users")
+    others: List[str] = []
+    try:
+        with os.scandir(users_dir) as it:
+            for i, e in enumerate(it):
+                if i >= max_entries or (deadline and time.monotonic() > deadline):
+                    break
+                if _is_mobile(e.name):
+                    return True
+                if len(others) < max_user_dirs:
+                    others.append(e.path)
+    except OSError:
+        return False
+    for d in others:
+        if deadline and time.monotonic() > deadline:
+            return False
+        try:
+            with os.scandir(os.path.join(d, "uploads")) as it:
+                for i, e in enumerate(it):
+                    if i >= 5:
+                        break
+                    if _is_mobile(e.name.split("_", 1)[0]):
+                        return True
+        except OSError:
+            continue
+    return False
+
+class RootDiscovery:
+    """
+    Finds the data root among candidate folders, remembering the answer.
+
+    root_cache.json keeps the last-known-good root (checked first, with a
+    single cheap validation) and candidates that were slow to probe, which
+    the bounded startup pass skips. find() stops at the first match or when
+    ``budget`` seconds are spent; search_async() does an unbounded pass on
+    a background thread for when the quick pass came up empty.
+    """
+    def __init__(self, cache_path: str, *, budget: float = 0.5, slow_after: float = 0.05):
+        self.cache_path = cache_path
+        self.budget = budget
+        self.slow_after = slow_after
+        self.last_good: Optional[str] = None
+        self.slow: Dict[str, float] = {}
+        self.exhausted = False      # True if the last find() ran out of budget
+        self._lock = threading.Lock()
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f) or {}
+            self.last_good = data.get("root")
+            self.slow = {str(k): float(v) for k, v in (data.get("slow") or {}).items()}
+        except Exception:
+            pass
+
+    def _save(self) -> None:
+        try:
+            os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+            tmp = self.cache_path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"root": self.last_good, "slow": self.slow}, f)
+            os.replace(tmp, self.cache_path)
+        except OSError:
+            pass
+
+    def remember(self, root: str) -> None:
+        with self._lock:
+            self.last_good = root
+            self.slow.pop(root, None)
+            self._save()
+
+    def _probe(self, path: str, deadline: Optional[float]) -> bool:
+        t0 = time.monotonic()
+        ok = looks_like_users_root(path, deadline=deadline)
+        took = time.monotonic() - t0
+        if took >= self.slow_after and not ok:
+            self.slow[path] = round(took, 3)
+            print(f"Root discovery: slow candidate {path} ({took:.2f}s)", file=sys.stderr)
+        return ok
+
+    def find(self, candidates: Iterable[str], *, budget: Optional[float] = None) -> Optional[str]:
+        """First matching candidate within ``budget`` seconds (None = unbounded)."""
+        budget = self.budget if budget is None else budget
+        deadline = time.monotonic() + budget if budget else None
+        self.exhausted = False
+        with self._lock:
+            if self.last_good and looks_like_users_root(self.last_good):
+                return self.last_good
+            seen = set()
+            found = None
+            for p in candidates:
+                if p in seen:
+                    continue
+                seen.add(p)
+                if deadline and p in self.slow:
+                    self.exhausted = True   # left for the background pass
+                    continue
+                if deadline and time.monotonic() > deadline:
+                    self.exhausted = True
+                    break
+                if not os.path.isdir(os.path.join(p, "users")):
+                    continue
+                if self._probe(p, deadline):
+                    found = p
+                    break
+            if found:
+                self.last_good = found
+                self.slow.pop(found, None)
+            self._save()
+        return found
+
+    def search_async(self, candidates: Callable[[], Iterable[str]],
+                     done: Callable[[Optional[str]], None]) -> threading.Thread:
+        """Unbounded search on a daemon thread; ``done(root_or_None)`` runs there."""
+        def worker():
+            try:
+                root = self.find(candidates(), budget=0)
+            except Exception:
+                root = None
+            done(root)
+        t = threading.Thread(target=worker, name="root-discovery", daemon=True)
+        t.start()
+        return t
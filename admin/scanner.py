@@ -0,0 +1,147 @@
+# scanner.py — background catalog refresh with incremental callbacks
+from __future__ import annotations
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import zip_longest
+from typing import Callable, List, Optional, Sequence, Union
+
+Roots = Union[str, Sequence[str]]
+
+def _as_list(roots: Roots) -> List[str]:
+    return [roots] if isinstance(roots, str) else list(roots)
+
+class ScanJob:
+    """Handle for one background scan; cancel() makes it stop and drop its callbacks."""
+    def __init__(self):
+        self._cancel = threading.Event()
+        self.done = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+class ScanService:
+    """
+    Runs catalog refreshes off the caller's thread.
+
+    scan() lists users/ first and reports the mobiles, then re-lists
+    changed uploads/ folders on a small pool, reporting progress every
+    ``batch`` users and the stats at the end. Given several roots it lists
+    them in parallel and interleaves their users, so each device gets its
+    share of the pool, and reports the merged mobiles and totals.
+    scan_user() refreshes a single user (e.g. the one just selected). Starting a new scan of
+    either kind cancels the previous one of that kind, and callbacks of a
+    cancelled job are never called. Callbacks run on the worker thread;
+    UI code should hop back to its own thread (e.g. via Clock).
+
+    A job that fails reports ``on_error(message)`` instead of ``on_done``.
+    Upload folders that couldn't be read don't fail a scan: it still
+    finishes, then reports them through ``on_error`` (see Catalog.errors).
+    """
+    def __init__(self, catalog, *, workers: int = 4, batch: int = 100):
+        self.catalog = catalog
+        self.batch = batch
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan")
+        # one runner per kind, so a selected user never waits behind a full scan
+        self._root_runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan-root")
+        self._user_runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan-user")
+        self._lock = threading.Lock()
+        self._root_job: Optional[ScanJob] = None
+        self._user_job: Optional[ScanJob] = None
+
+    def _replace(self, attr: str) -> ScanJob:
+        job = ScanJob()
+        with self._lock:
+            old = getattr(self, attr)
+            if old is not None:
+                old.cancel()
+            setattr(self, attr, job)
+        return job
+
+    def scan(self, roots: Roots, *, force: bool = False,
+             on_users: Optional[Callable[[List[str]], None]] = None,
+             on_progress: Optional[Callable[[int, int], None]] = None,
+             on_done: Optional[Callable[[tuple], None]] = None,
+             on_error: Optional[Callable[[str], None]] = None) -> ScanJob:
+        roots = _as_list(roots)
+        job = self._replace("_root_job")
+
+        def run():
+            try:
+                per_root = list(self._pool.map(
+                    lambda r: self.catalog.refresh_users(r, force=force), roots))
+                if job.cancelled:
+                    return
+                if on_users:
+                    on_users(sorted(set().union(*per_root)))
+                # round-robin over roots: (r1,u1), (r2,u1), (r1,u2), ...
+                pairs = [p for group in zip_longest(*(
+                    [(r, m) for m in mobiles] for r, mobiles in zip(roots, per_root)))
+                    for p in group if p]
+                total = len(pairs)
+                for start in range(0, total, self.batch):
+                    if job.cancelled:
+                        return
+                    chunk = pairs[start:start + self.batch]
+                    list(self._pool.map(
+                        lambda p: job.cancelled or self.catalog.refresh_user(*p, force=force),
+                        chunk))
+                    if on_progress and not job.cancelled:
+                        on_progress(min(start + len(chunk), total), total)
+                if job.cancelled:
+                    return
+                for r in roots:
+                    self.catalog.mark_fresh(r)
+                if on_done:
+                    on_done(self.catalog.stats(roots))
+                errors = self.catalog.errors(roots)
+                if errors and on_error and not job.cancelled:
+                    more = f" (and {len(errors) - 1} more)" if len(errors) > 1 else ""
+                    on_error(f"Cannot read {errors[0]}{more}")
+            except Exception as e:
+                if on_error and not job.cancelled:
+                    on_error(f"Scan failed: {e}")
+            finally:
+                job.done.set()
+
+        self._root_runner.submit(run)
+        return job
+
+    def scan_user(self, roots: Roots, mobile: str, work: Callable[[], object],
+                  on_done: Callable[[object], None],
+                  on_error: Optional[Callable[[str], None]] = None) -> ScanJob:
+        """Refresh ``mobile`` in each root then run ``work()``; ``on_done(result)`` unless superseded."""
+        roots = _as_list(roots)
+        job = self._replace("_user_job")
+
+        def run():
+            try:
+                list(self._pool.map(lambda r: self.catalog.refresh_user(r, mobile), roots))
+                if job.cancelled:
+                    return
+                result = work()
+                if not job.cancelled:
+                    on_done(result)
+            except Exception as e:
+                if on_error and not job.cancelled:
+                    on_error(f"Loading {mobile} failed: {e}")
+            finally:
+                job.done.set()
+
+        self._user_runner.submit(run)
+        return job
+
+    def cancel(self) -> None:
+        with self._lock:
+            for job in (self._root_job, self._user_job):
+                if job is not None:
+                    job.cancel()
+
+    def shutdown(self) -> None:
+        self.cancel()
+        self._pool.shutdown(wait=False)
+        self._root_runner.shutdown(wait=False)
+        self._user_runner.shutdown(wait=False)
@@ -0,0 +1,130 @@
+# startup_trace.py — per-import and per-phase startup timings, with a budget check
+#
+# Import this first in main.py. Phases (KV load, store init, first frame...)
+# are always timed; per-import timing is enabled with MYCAM_TRACE_IMPORTS=1.
+# write() saves a JSON trace and flags phases over budget; the same check
+# runs offline for CI:
+#
+#   python startup_trace.py startup_trace.json [budget.json]   # exit 1 if over
+from __future__ import annotations
+import os, sys, json, time, builtins
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# Default budgets in milliseconds (cumulative since process start for marks,
+# duration for phases). Override with startup_budget.json next to main.py.
+DEFAULT_BUDGETS = {
+    "imports": 1500,
+    "store_init": 150,
+    "kv_load": 1200,
+    "first_frame": 4000,
+}
+
+class StartupTrace:
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.phases: Dict[str, float] = {}      # name -> duration ms
+        self.marks: Dict[str, float] = {}       # name -> ms since t0
+        self.imports: List[Tuple[str, float, int]] = []   # (module, ms incl. children, depth)
+        self._depth = 0
+        self._orig_import = None
+
+    # ---- import timing ----
+    def install_import_hook(self) -> None:
+        if self._orig_import is not None:
+            return
+        orig = self._orig_import = builtins.__import__
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return orig(name, globals, locals, fromlist, level)
+            t = time.perf_counter()
+            self._depth += 1
+            try:
+                return orig(name, globals, locals, fromlist, level)
+            finally:
+                self._depth -= 1
+                self.imports.append((name, (time.perf_counter() - t) * 1000.0, self._depth))
+
+        builtins.__import__ = timed_import
+
+    def remove_import_hook(self) -> None:
+        if self._orig_import is not None:
+            builtins.__import__ = self._orig_import
+            self._orig_import = None
+
+    # ---- phases ----
+    def elapsed(self) -> float:
+        return (time.perf_counter() - self.t0) * 1000.0
+
+    def mark(self, name: str) -> None:
+        self.marks.setdefault(name, self.elapsed())
+
+    @contextmanager
+    def phase(self, name: str):
+        t = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + (time.perf_counter() - t) * 1000.0
+
+    # ---- output ----
+    def report(self, top: int = 40) -> dict:
+        slow = sorted(self.imports, key=lambda r: -r[1])[:top]
+        return {
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "total_ms": round(self.elapsed(), 1),
+            "phases_ms": {k: round(v, 1) for k, v in self.phases.items()},
+            "marks_ms": {k: round(v, 1) for k, v in self.marks.items()},
+            "slowest_imports": [{"module": m, "ms": round(ms, 1), "depth": d} for m, ms, d in slow],
+        }
+
+    def write(self, path: str, budgets: Optional[Dict[str, float]] = None) -> List[str]:
+        """Save the trace (with any budget violations) to ``path``; returns the violations."""
+        data = self.report()
+        over = check_budget(data, budgets or load_budgets())
+        data["over_budget"] = over
+        try:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+        except OSError:
+            pass
+        return over
+
+def load_budgets(path: Optional[str] = None) -> Dict[str, float]:
+    path = path or os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_budget.json")
+    budgets = dict(DEFAULT_BUDGETS)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            budgets.update({k: float(v) for k, v in (json.load(f) or {}).items()})
+    except (OSError, ValueError):
+        pass
+    return budgets
+
+def check_budget(report: dict, budgets: Dict[str, float]) -> List[str]:
+    """Human-readable lines for every phase/mark that exceeded its budget."""
+    over = []
+    for section in ("phases_ms", "marks_ms"):
+        for name, ms in (report.get(section) or {}).items():
+            limit = budgets.get(name)
+            if limit is not None and ms > limit:
+                over.append(f"{name}: {ms:.0f} ms > budget {limit:.0f} ms")
+    return over
+
+# Process-wide tracer; t0 is when main.py first imported this module
+TRACE = StartupTrace()
+if os.environ.get("MYCAM_TRACE_IMPORTS") == "1":
+    TRACE.install_import_hook()
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print("usage: python startup_trace.py TRACE.json [BUDGET.json]")
+        sys.exit(2)
+    with open(sys.argv[1], "r", encoding="utf-8") as f:
+        rep = json.load(f)
+    problems = check_budget(rep, load_budgets(sys.argv[2] if len(sys.argv) > 2 else None))
+    for line in problems:
+        print("OVER BUDGET", line)
+    sys.exit(1 if problems else 0)
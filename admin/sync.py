@@ -0,0 +1,365 @@
+# sync.py — incremental copy of users/ from a device root into a central root
+from __future__ import annotations
+import os, shutil, sqlite3, hashlib, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional, Tuple
+
+from catalog import Catalog, _is_mobile, _mtime_ns, media_type_for
+
+CHUNK = 1024 * 1024
+PARTIAL_SUFFIX = ".partial"
+
+Manifest = Dict[str, Tuple[int, int]]   # name -> (size, mtime_ns)
+Task = Tuple[str, str, str, int]        # (mobile, src, dst, size)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    path TEXT PRIMARY KEY, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, sha256 TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS synced (
+    src TEXT NOT NULL, dst TEXT NOT NULL, mobile TEXT NOT NULL,
+    src_mtime_ns INTEGER NOT NULL, dst_mtime_ns INTEGER NOT NULL, profile_mtime_ns INTEGER NOT NULL,
+    PRIMARY KEY (src, dst, mobile));
+"""
+
+class SyncCancelled(Exception):
+    pass
+
+class SyncState:
+    """
+    settings_dir/sync_state.sqlite: file hashes keyed by (path, size,
+    mtime), so a file is hashed at most once per change, and per-user
+    folder mtimes from the last completed sync of each (src, dst) pair.
+    """
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def cached_hash(self, path: str, size: int, mtime_ns: int) -> Optional[str]:
+        with self._lock:
+            row = self._db.execute("SELECT size, mtime_ns, sha256 FROM hashes WHERE path=?",
+                                   (path,)).fetchone()
+        return row[2] if row and row[0] == size and row[1] == mtime_ns else None
+
+    def put_hash(self, path: str, size: int, mtime_ns: int, digest: str) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO hashes VALUES (?,?,?,?)",
+                             (path, size, mtime_ns, digest))
+            self._db.commit()
+
+    def file_hash(self, path: str, cancelled: Callable[[], bool] = lambda: False) -> str:
+        st = os.stat(path)
+        digest = self.cached_hash(path, st.st_size, st.st_mtime_ns)
+        if digest is None:
+            h = hashlib.sha256()
+            with open(path, "rb") as f:
+                for buf in iter(lambda: f.read(CHUNK), b""):
+                    if cancelled():
+                        raise SyncCancelled()
+                    h.update(buf)
+            digest = h.hexdigest()
+            self.put_hash(path, st.st_size, st.st_mtime_ns, digest)
+        return digest
+
+    def last_sync(self, src: str, dst: str, mobile: str) -> Optional[Tuple[int, int, int]]:
+        with self._lock:
+            return self._db.execute(
+                "SELECT src_mtime_ns, dst_mtime_ns, profile_mtime_ns FROM synced "
+                "WHERE src=? AND dst=? AND mobile=?", (src, dst, mobile)).fetchone()
+
+    def mark_synced(self, src: str, dst: str, mobile: str, marks: Tuple[int, int, int]) -> None:
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO synced VALUES (?,?,?,?,?,?)",
+                             (src, dst, mobile) + tuple(marks))
+            self._db.commit()
+
+def manifest(uploads_dir: str, mobile: str) -> Manifest:
+    """Upload files of one user: name -> (size, mtime_ns). Partial copies are skipped."""
+    out: Manifest = {}
+    prefix = f"{mobile}_"
+    try:
+        with os.scandir(uploads_dir) as it:
+            for e in it:
+                if not e.name.startswith(prefix) or media_type_for(e.name) is None:
+                    continue
+                try:
+                    if not e.is_file():
+                        continue
+                    st = e.stat()
+                except OSError:
+                    continue
+                out[e.name] = (st.st_size, st.st_mtime_ns)
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return out
+
+def _list_mobiles(users_dir: str) -> List[str]:
+    try:
+        with os.scandir(users_dir) as it:
+            return sorted(e.name for e in it if e.is_dir() and _is_mobile(e.name))
+    except FileNotFoundError:
+        return []
+
+class SyncJob:
+    """
+    Bring ``dst_root`` up to date with ``src_root``, user by user.
+
+    For each user the two upload manifests (name, size, mtime) are diffed:
+    missing files and files whose size differs are copied; same size with
+    a different mtime is settled by comparing SHA-256 hashes (cached in
+    SyncState, so unchanged files are never re-read). Copies go to a
+    hidden ``.<name>.partial`` next to the target and are renamed into
+    place once their hash matches, so an interrupted run resumes from the
+    partial file and a finished one is never half-visible. Users whose
+    folders haven't changed on either side since their last sync are
+    skipped without listing (``force=True`` re-checks everything). A file
+    the destination moved to cold storage (its ``archive/index.json``, see
+    tiering.py) counts as present when size and mtime match, so a sync
+    never undoes tiering.
+
+    profile.json is copied when the source one differs and is newer.
+    With ``approvals_src``/``approvals_dst`` (two ApprovalStores), the
+    source's explicit approve/unapprove flags are copied over on every
+    run, for users skipped as unchanged too (for files the destination
+    has). Nothing is ever deleted from the destination. Running the same
+    sync twice copies nothing the second time.
+    """
+    def __init__(self, src_root: str, dst_root: str, *, state: SyncState,
+                 mobiles: Optional[List[str]] = None, workers: int = 4, force: bool = False,
+                 approvals_src=None, approvals_dst=None,
+                 progress: Optional[Callable[[int, int, int], None]] = None):
+        self.src_root = src_root
+        self.dst_root = dst_root
+        self.state = state
+        self.mobiles = mobiles
+        self.workers = max(1, workers)
+        self.force = force
+        self.approvals_src = approvals_src
+        self.approvals_dst = approvals_dst
+        self.progress = progress   # (files_done, files_total, bytes_done)
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._bytes = 0
+        self._bytes_lock = threading.Lock()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, done: Optional[Callable[[Dict], None]] = None) -> "SyncJob":
+        """Run in a background thread; ``done(result)`` is called there when finished."""
+        def target():
+            res = self.run()
+            if done:
+                done(res)
+        self._thread = threading.Thread(target=target, name="sync", daemon=True)
+        self._thread.start()
+        return self
+
+    # ---- planning ----
+    def _marks(self, mobile: str) -> Tuple[int, int, int]:
+        src_user = os.path.join(self.src_root, "users", mobile)
+        return (_mtime_ns(os.path.join(src_user, "uploads")) or 0,
+                _mtime_ns(os.path.join(self.dst_root, "users", mobile, "uploads")) or 0,
+                _mtime_ns(os.path.join(src_user, "profile.json")) or 0)
+
+    def _same(self, src: str, dst: str, s: Tuple[int, int], d: Tuple[int, int]) -> bool:
+        if s[0] != d[0]:
+            return False
+        if s[1] == d[1]:
+            return True
+        return (self.state.file_hash(src, self._cancel.is_set)
+                == self.state.file_hash(dst, self._cancel.is_set))
+
+    def plan(self, mobile: str) -> List[Task]:
+        from tiering import read_index
+        src_dir = os.path.join(self.src_root, "users", mobile, "uploads")
+        dst_dir = os.path.join(self.dst_root, "users", mobile, "uploads")
+        theirs = manifest(dst_dir, mobile)
+        archived = read_index(os.path.dirname(dst_dir))
+        tasks: List[Task] = []
+        for name, s in sorted(manifest(src_dir, mobile).items()):
+            src, dst = os.path.join(src_dir, name), os.path.join(dst_dir, name)
+            d = theirs.get(name)
+            if d is None:
+                a = archived.get(name)
+                if a and (int(a["size"]), int(a["mtime_ns"])) == s:
+                    continue   # moved to cold storage (tiering.py); copying it back undoes that
+                tasks.append((mobile, src, dst, s[0]))
+            elif not self._same(src, dst, s, d):
+                tasks.append((mobile, src, dst, s[0]))
+        return tasks
+
+    # ---- transfer ----
+    def _copy(self, src: str, dst: str) -> int:
+        """Copy via .<name>.partial, resuming a previous partial when it is a prefix of src."""
+        partial = os.path.join(os.path.dirname(dst), f".{os.path.basename(dst)}{PARTIAL_SUFFIX}")
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        src_size = os.path.getsize(src)
+        for attempt in range(2):
+            try:
+                offset = os.path.getsize(partial) if attempt == 0 else 0
+            except OSError:
+                offset = 0
+            if offset > src_size:
+                offset = 0
+            h = hashlib.sha256()
+            with open(src, "rb") as fi, open(partial, "r+b" if offset else "wb") as fo:
+                if offset:
+                    for buf in iter(lambda: fo.read(CHUNK), b""):
+                        h.update(buf)
+                    fi.seek(offset)
+                    fo.seek(offset)
+                for buf in iter(lambda: fi.read(CHUNK), b""):
+                    if self._cancel.is_set():
+                        raise SyncCancelled()
+                    fo.write(buf)
+                    h.update(buf)
+                    with self._bytes_lock:
+                        self._bytes += len(buf)
+            digest = h.hexdigest()
+            # a resumed copy is checked against the whole source; a fresh one read it already
+            if not offset or digest == self.state.file_hash(src, self._cancel.is_set):
+                break
+            os.remove(partial)   # stale partial from a different version of the file
+        shutil.copystat(src, partial)
+        os.replace(partial, dst)
+        st = os.stat(dst)
+        self.state.put_hash(dst, st.st_size, st.st_mtime_ns, digest)
+        sst = os.stat(src)
+        self.state.put_hash(src, sst.st_size, sst.st_mtime_ns, digest)
+        return src_size
+
+    def _sync_profile(self, mobile: str) -> bool:
+        src = os.path.join(self.src_root, "users", mobile, "profile.json")
+        dst = os.path.join(self.dst_root, "users", mobile, "profile.json")
+        try:
+            s = os.stat(src)
+        except OSError:
+            return False
+        try:
+            d = os.stat(dst)
+            if d.st_mtime_ns >= s.st_mtime_ns:
+                return False   # destination is as new or newer (e.g. edited centrally)
+            with open(src, "rb") as a, open(dst, "rb") as b:
+                if a.read() == b.read():
+                    return False
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        tmp = dst + ".tmp"
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+        return True
+
+    def _dst_names(self, mobile: str) -> List[str]:
+        """Uploads of ``mobile`` at the destination, archived ones included."""
+        from tiering import read_index
+        user_dir = os.path.join(self.dst_root, "users", mobile)
+        return list(set(manifest(os.path.join(user_dir, "uploads"), mobile)) | set(read_index(user_dir)))
+
+    def _sync_approvals(self, mobiles: List[str], errors: List[str]) -> int:
+        """Copy differing flags for every user, skipped ones included (their
+        folders may be unchanged while their approvals are not)."""
+        if self.approvals_src is None or self.approvals_dst is None \
+                or self.approvals_src is self.approvals_dst:
+            return 0
+        changes: Dict[bool, List[Tuple[str, str]]] = {True: [], False: []}
+        for mob in mobiles:
+            theirs = self.approvals_dst.statuses(mob)
+            diff = [(n, v) for n, v in self.approvals_src.statuses(mob).items() if theirs.get(n) != v]
+            if not diff:
+                continue   # in-memory check; only list the destination when there is work
+            try:
+                present = set(self._dst_names(mob))
+            except OSError as e:
+                errors.append(f"{mob}/approvals: {e}")
+                continue
+            for name, value in diff:
+                if name in present:
+                    changes[value].append((mob, name))
+        return sum(self.approvals_dst.set_many(items, v) for v, items in changes.items())
+
+    def run(self) -> Dict:
+        """Sync and return the result; never raises, so start()'s ``done`` always runs."""
+        res = {"users": 0, "copied": 0, "bytes": 0, "skipped_users": 0, "profiles": 0,
+               "approvals": 0, "errors": [], "cancelled": False}
+        try:
+            self._run(res)
+        except SyncCancelled:
+            res["cancelled"] = True
+        except Exception as e:   # e.g. a root unmounted mid-run
+            res["errors"].append(f"sync failed: {e}")
+        res["bytes"] = self._bytes
+        return res
+
+    def _run(self, res: Dict) -> None:
+        src_key, dst_key = Catalog._key(self.src_root), Catalog._key(self.dst_root)
+        if src_key == dst_key:
+            res["errors"].append("source and destination are the same root")
+            return
+        mobiles = self.mobiles or _list_mobiles(os.path.join(self.src_root, "users"))
+        todo: Dict[str, List[Task]] = {}
+        marks: Dict[str, Tuple[int, int, int]] = {}
+        failed = set()
+        for mob in mobiles:
+            if self._cancel.is_set():
+                raise SyncCancelled()
+            marks[mob] = self._marks(mob)
+            if not self.force and self.state.last_sync(src_key, dst_key, mob) == marks[mob]:
+                res["skipped_users"] += 1
+                continue
+            try:
+                todo[mob] = self.plan(mob)
+            except OSError as e:   # vanished file, permissions, ...: skip this user for now
+                failed.add(mob)
+                res["errors"].append(f"{mob}: {e}")
+        res["users"] = len(todo)
+        total = sum(len(t) for t in todo.values())
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="sync") as pool:
+            futs = {pool.submit(self._copy, src, dst): (mob, src)
+                    for tasks in todo.values() for mob, src, dst, _size in tasks}
+            for fut in as_completed(futs):
+                mob, src = futs[fut]
+                try:
+                    fut.result()
+                    res["copied"] += 1
+                except SyncCancelled:
+                    failed.add(mob)
+                except OSError as e:
+                    failed.add(mob)
+                    res["errors"].append(f"{src}: {e}")
+                if self.progress:
+                    self.progress(res["copied"], total, self._bytes)
+                if self._cancel.is_set():
+                    for f in futs:
+                        f.cancel()
+        if self._cancel.is_set():
+            raise SyncCancelled()
+        for mob in todo:
+            try:
+                res["profiles"] += self._sync_profile(mob)
+            except OSError as e:
+                failed.add(mob)
+                res["errors"].append(f"{mob}/profile.json: {e}")
+        try:
+            res["approvals"] = self._sync_approvals(mobiles, res["errors"])   # every run, not marked
+        except OSError as e:
+            res["errors"].append(f"approvals: {e}")
+        for mob in todo:
+            if mob not in failed:
+                # source marks from before the copy (later changes must show up next
+                # time), destination re-read since our own copies just bumped it
+                src_m, _, prof_m = marks[mob]
+                self.state.mark_synced(src_key, dst_key, mob,
+                                       (src_m, self._marks(mob)[1], prof_m))
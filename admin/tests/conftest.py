@@ -0,0 +1,4 @@
+# Tests import the admin modules the way main.py and admin_cli.py do: flat, from admin/.
+import os, sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
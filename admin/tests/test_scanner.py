@@ -0,0 +1,53 @@
+import os
+
+from catalog import Catalog
+from scanner import ScanService
+
+def _root(tmp_path, mobiles):
+    root = str(tmp_path / "root")
+    for mob in mobiles:
+        d = os.path.join(root, "users", mob, "uploads")
+        os.makedirs(d)
+        with open(os.path.join(d, f"{mob}_a.jpg"), "wb") as f:
+            f.write(b"x")
+    return root
+
+def _scan(catalog, root):
+    got = {}
+    svc = ScanService(catalog)
+    job = svc.scan(root, on_done=lambda stats: got.setdefault("done", stats),
+                   on_error=lambda msg: got.setdefault("error", msg))
+    assert job.done.wait(10)
+    svc.shutdown()
+    return got
+
+def test_unreadable_uploads_folder_is_reported_not_fatal(tmp_path, monkeypatch):
+    root = _root(tmp_path, ["1111111111", "2222222222"])
+    catalog = Catalog(str(tmp_path / "catalog.db"))
+    listing = Catalog._list_uploads
+
+    def flaky(self, users_dir, mobile):
+        if mobile == "2222222222":
+            raise PermissionError(13, "Permission denied")
+        return listing(self, users_dir, mobile)
+
+    monkeypatch.setattr(Catalog, "_list_uploads", flaky)
+    got = _scan(catalog, root)
+    assert "done" in got
+    assert "2222222222" in got["error"] and "Permission denied" in got["error"]
+    assert catalog.users(root) == ["1111111111", "2222222222"]
+
+    monkeypatch.setattr(Catalog, "_list_uploads", listing)   # readable again: retried
+    assert "error" not in _scan(catalog, root)
+
+def test_failed_scan_reports_error(tmp_path, monkeypatch):
+    root = _root(tmp_path, ["1111111111"])
+    catalog = Catalog(str(tmp_path / "catalog.db"))
+
+    def broken(*_a, **_kw):
+        raise OSError(5, "Input/output error")
+
+    monkeypatch.setattr(catalog, "refresh_users", broken)
+    got = _scan(catalog, root)
+    assert "done" not in got
+    assert got["error"].startswith("Scan failed:")
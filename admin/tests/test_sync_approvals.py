@@ -0,0 +1,25 @@
+import os
+
+from admin_store import AdminStore
+from approvals import ApprovalStore
+
+MOBILE = "9876543210"
+
+def test_approvals_carry_over_for_unchanged_users(tmp_path):
+    device, central = str(tmp_path / "device"), str(tmp_path / "central")
+    uploads = os.path.join(device, "users", MOBILE, "uploads")
+    os.makedirs(uploads)
+    name = f"{MOBILE}_a.jpg"
+    with open(os.path.join(uploads, name), "wb") as f:
+        f.write(b"a" * 100)
+    store = AdminStore(root=device, settings_dir=str(tmp_path / "device-settings"))
+    central_settings = str(tmp_path / "central-settings")
+
+    first = store.sync_job(device, central, dst_settings_dir=central_settings).run()
+    assert (first["copied"], first["approvals"]) == (1, 0)
+
+    store.approve_many([os.path.join(uploads, name)])
+    second = store.sync_job(device, central, dst_settings_dir=central_settings).run()
+    assert second["skipped_users"] == 1   # folders unchanged...
+    assert second["approvals"] == 1       # ...but the approval still carries over
+    assert ApprovalStore(central_settings).status(MOBILE, name) is True
@@ -0,0 +1,42 @@
+import os, time
+
+from admin_store import AdminStore
+
+MOBILE = "9876543210"
+OLD = time.time() - 400 * 86400   # well past TieringJob's default 180 days
+
+def _upload(root, name, data, mtime=OLD):
+    d = os.path.join(root, "users", MOBILE, "uploads")
+    os.makedirs(d, exist_ok=True)
+    p = os.path.join(d, f"{MOBILE}_{name}")
+    with open(p, "wb") as f:
+        f.write(data)
+    os.utime(p, (mtime, mtime))
+    return p
+
+def _uploads(root):
+    return sorted(os.listdir(os.path.join(root, "users", MOBILE, "uploads")))
+
+def test_sync_does_not_copy_back_archived_uploads(tmp_path):
+    device, central = str(tmp_path / "device"), str(tmp_path / "central")
+    a = _upload(device, "a.jpg", b"a" * 1000)
+    b = _upload(device, "b.jpg", b"b" * 2000)
+    store = AdminStore(root=central, settings_dir=str(tmp_path / "settings"))
+
+    first = store.sync_job(device).run()
+    assert (first["copied"], first["errors"]) == (2, [])
+
+    store.refresh(force=True)
+    store.approve_many([os.path.join(central, "users", MOBILE, "uploads", os.path.basename(p))
+                        for p in (a, b)])
+    tiered = store.tiering_job().run()
+    assert (tiered["archived"], tiered["errors"]) == (2, [])
+    assert _uploads(central) == []
+
+    _upload(device, "c.jpg", b"c" * 500, mtime=time.time())
+    second = store.sync_job(device).run()
+    assert (second["copied"], second["errors"]) == (1, [])
+    assert _uploads(central) == [f"{MOBILE}_c.jpg"]
+
+    again = store.sync_job(device, force=True).run()
+    assert again["copied"] == 0
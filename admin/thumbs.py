@@ -0,0 +1,217 @@
+# thumbs.py — admin thumbnail cache (disk cache + decode pool + backfill)
+from __future__ import annotations
+import os, shutil, hashlib, threading, time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Optional decoder; without it callers fall back to the original image
+try:
+    from PIL import Image as _PILImage
+except Exception:
+    _PILImage = None
+
+def decode_for_display(src: str, max_side: int) -> Optional[Tuple[int, int, bytes]]:
+    """Decode and downscale ``src`` to (width, height, RGB bytes); None without Pillow."""
+    if _PILImage is None:
+        return None
+    try:
+        with _PILImage.open(src) as im:
+            im.draft("RGB", (max_side, max_side))
+            im.thumbnail((max_side, max_side))
+            im = im.convert("RGB")
+            return im.width, im.height, im.tobytes()
+    except Exception:
+        return None
+
+class LRUCache:
+    """Least-recently-used map bounded by a byte budget (``sizeof(value)``)."""
+    def __init__(self, budget_bytes: int, sizeof: Callable[[object], int]):
+        self.budget = budget_bytes
+        self.sizeof = sizeof
+        self.used = 0
+        self._items: "OrderedDict[str, Tuple[object, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is None:
+                return None
+            self._items.move_to_end(key)
+            return hit[0]
+
+    def put(self, key: str, value) -> None:
+        n = int(self.sizeof(value))
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.used -= old[1]
+            if n > self.budget:
+                return
+            self._items[key] = (value, n)
+            self.used += n
+            while self.used > self.budget and self._items:
+                _, (_, sz) = self._items.popitem(last=False)
+                self.used -= sz
+
+    def clear(self) -> Tuple[int, int]:
+        """Drop everything; returns (entries, bytes) released."""
+        with self._lock:
+            out = (len(self._items), self.used)
+            self._items.clear()
+            self.used = 0
+        return out
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+class ThumbnailCache:
+    """
+    Disk cache of JPEG thumbnails under ``cache_dir``.
+
+    A thumbnail's name is derived from the source path, size and mtime, so
+    an edited or replaced upload gets a fresh one and stale entries are
+    simply never read again. Decoding runs on a small thread pool; a
+    separate backfill thread fills in thumbnails for older uploads only
+    while no interactive requests are waiting.
+
+    ``stat``/``resolve`` let a source live somewhere else than its path
+    (AdminStore.upload_stat/local_path for archived uploads): the key
+    still comes from the source path and its reported size and mtime, so
+    an existing thumbnail is found without touching the original.
+    """
+    def __init__(self, cache_dir: str, *, size: int = 256, workers: int = 2, quality: int = 80,
+                 stat: Callable[[str], os.stat_result] = os.stat,
+                 resolve: Optional[Callable[[str], Optional[str]]] = None):
+        self.cache_dir = cache_dir
+        self.stat = stat
+        self.resolve = resolve
+        self.size = size
+        self.quality = quality
+        os.makedirs(cache_dir, exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbs")
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, List[Callable[[Optional[str]], None]]] = {}
+        self._backfill_stop = threading.Event()
+        self._backfill_thread: Optional[threading.Thread] = None
+
+    @property
+    def available(self) -> bool:
+        return _PILImage is not None
+
+    def key_for(self, src: str) -> Optional[str]:
+        try:
+            st = self.stat(src)
+        except OSError:
+            return None
+        raw = f"{os.path.abspath(src)}|{st.st_size}|{st.st_mtime_ns}|{self.size}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _thumb_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".jpg")
+
+    def cached_path(self, src: str) -> Optional[str]:
+        """Thumbnail path if it is already on disk (no decoding)."""
+        key = self.key_for(src)
+        if key is None:
+            return None
+        p = self._thumb_path(key)
+        return p if os.path.exists(p) else None
+
+    def thumbnail(self, src: str) -> Optional[str]:
+        """Return the thumbnail path for ``src``, generating it if needed."""
+        if _PILImage is None:
+            return None
+        key = self.key_for(src)
+        if key is None:
+            return None
+        dst = self._thumb_path(key)
+        if os.path.exists(dst):
+            return dst
+        local = self.resolve(src) if self.resolve else src
+        if local is None:
+            return None
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        tmp = f"{dst}.{threading.get_ident()}.tmp"
+        try:
+            with _PILImage.open(local) as im:
+                im.draft("RGB", (self.size, self.size))   # cheap JPEG downscale on decode
+                im.thumbnail((self.size, self.size))
+                im.convert("RGB").save(tmp, "JPEG", quality=self.quality)
+            os.replace(tmp, dst)
+            return dst
+        except Exception:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return None
+
+    def request(self, src: str, done: Callable[[Optional[str]], None]) -> None:
+        """Generate on the pool; ``done(path_or_None)`` runs on a worker thread."""
+        with self._lock:
+            waiters = self._inflight.get(src)
+            if waiters is not None:
+                waiters.append(done)
+                return
+            self._inflight[src] = [done]
+        self._pool.submit(self._run, src)
+
+    def _run(self, src: str) -> None:
+        path = self.thumbnail(src)
+        with self._lock:
+            waiters = self._inflight.pop(src, [])
+        for cb in waiters:
+            try:
+                cb(path)
+            except Exception:
+                pass
+
+    # ---- backfill ----
+    def start_backfill(self, sources: Callable[[], Iterable[str]], *, pause: float = 0.02) -> None:
+        """Generate missing thumbnails for ``sources()`` in the background."""
+        if _PILImage is None or (self._backfill_thread and self._backfill_thread.is_alive()):
+            return
+        self._backfill_stop.clear()
+
+        def worker():
+            try:
+                for src in sources():
+                    if self._backfill_stop.is_set():
+                        return
+                    while self._inflight and not self._backfill_stop.is_set():
+                        time.sleep(0.1)   # interactive requests first
+                    self.thumbnail(src)
+                    time.sleep(pause)
+            except Exception:
+                pass
+
+        self._backfill_thread = threading.Thread(target=worker, name="thumbs-backfill", daemon=True)
+        self._backfill_thread.start()
+
+    def stop_backfill(self) -> None:
+        self._backfill_stop.set()
+
+    # ---- housekeeping ----
+    def disk_usage(self) -> Tuple[int, int]:
+        files = total = 0
+        for dirpath, _dirs, names in os.walk(self.cache_dir):
+            for n in names:
+                try:
+                    total += os.path.getsize(os.path.join(dirpath, n))
+                    files += 1
+                except OSError:
+                    pass
+        return files, total
+
+    def clear(self) -> Tuple[int, int]:
+        """Delete every cached thumbnail; returns (files, bytes) removed."""
+        files, total = self.disk_usage()
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        return files, total
+
+    def shutdown(self) -> None:
+        self.stop_backfill()
+        self._pool.shutdown(wait=False)
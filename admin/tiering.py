@@ -0,0 +1,364 @@
+# tiering.py — move old uploads into per-user, per-month archives; rehydrate them on demand
+from __future__ import annotations
+import os, json, time, zlib, hashlib, zipfile, threading, warnings
+from collections import OrderedDict
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from exporter import STORED_EXTS, ZIP_EPOCH
+
+ARCHIVE_DIR = "archive"          # users/<mobile>/archive/<YYYY-MM>.zip + index.json
+INDEX_NAME = "index.json"
+PARTIAL_SUFFIX = ".partial"
+CHUNK = 1024 * 1024
+INDEX_CACHE_SIZE = 1024          # parsed index.json files kept, most recently used
+
+_index_cache: "OrderedDict[str, Tuple[int, int, Dict[str, dict]]]" = OrderedDict()
+_index_lock = threading.Lock()
+
+Item = Tuple[str, str, int, int]   # (name, path, size, mtime_ns)
+
+class TieringCancelled(Exception):
+    pass
+
+class ArchivedStat(NamedTuple):
+    """The stat() fields callers use, for an upload that only exists in an archive."""
+    st_size: int
+    st_mtime_ns: int
+
+    @property
+    def st_mtime(self) -> float:
+        return self.st_mtime_ns / 1e9
+
+def archive_dir(user_dir: str) -> str:
+    return os.path.join(user_dir, ARCHIVE_DIR)
+
+def bundle_for(mtime: float) -> str:
+    return time.strftime("%Y-%m", time.localtime(mtime)) + ".zip"
+
+def _remember(path: str, st: os.stat_result, index: Dict[str, dict]) -> None:
+    with _index_lock:
+        _index_cache[path] = (st.st_mtime_ns, st.st_size, index)
+        _index_cache.move_to_end(path)
+        while len(_index_cache) > INDEX_CACHE_SIZE:
+            _index_cache.popitem(last=False)
+
+def read_index(user_dir: str) -> Dict[str, dict]:
+    """{filename: {"bundle", "size", "mtime_ns", "archived_at"}} of a user's archived uploads.
+
+    Parsed once per version of the file (cached by mtime and size), so it
+    is cheap enough to call per upload. The result is shared: don't modify it."""
+    path = os.path.join(archive_dir(user_dir), INDEX_NAME)
+    try:
+        st = os.stat(path)
+    except OSError:
+        with _index_lock:
+            _index_cache.pop(path, None)
+        return {}
+    with _index_lock:
+        hit = _index_cache.get(path)
+        if hit and hit[:2] == (st.st_mtime_ns, st.st_size):
+            _index_cache.move_to_end(path)
+            return hit[2]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            index = json.load(f) or {}
+    except (OSError, ValueError):
+        return {}
+    _remember(path, st, index)
+    return index
+
+def _write_index(user_dir: str, index: Dict[str, dict]) -> None:
+    path = os.path.join(archive_dir(user_dir), INDEX_NAME)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp, path)
+    _remember(path, os.stat(path), dict(index))
+
+def archived_stat(user_dir: str, name: str) -> Optional[ArchivedStat]:
+    entry = read_index(user_dir).get(name)
+    return ArchivedStat(int(entry["size"]), int(entry["mtime_ns"])) if entry else None
+
+def _crc32(path: str) -> int:
+    crc = 0
+    with open(path, "rb") as f:
+        for buf in iter(lambda: f.read(CHUNK), b""):
+            crc = zlib.crc32(buf, crc)
+    return crc
+
+class TieringJob:
+    """
+    Move uploads older than ``older_than_days`` (by default only approved
+    ones) out of ``users/<mobile>/uploads`` into zip bundles, one per user
+    and capture month, in ``users/<mobile>/archive/``. JPEG, MP4 and other
+    already-compressed media are stored, everything else deflated, as in
+    exports. ``index.json`` next to the bundles maps each archived name to
+    its bundle, size and exact mtime; the catalog lists those entries like
+    regular uploads, and AdminStore.local_path() pulls one back out on
+    demand (see RehydrationCache).
+
+    A bundle is never modified in place: the current one is copied to
+    ``<bundle>.partial``, the new members are appended and read back (zip
+    checks each CRC), then it is renamed over the old one. Only after the
+    index is written are the originals removed, and only if unchanged, so
+    an interrupted run leaves every upload readable and the next run
+    finishes the job. Since the archive lives in the user's folder, trash
+    and restore move it along.
+    """
+    def __init__(self, store, *, older_than_days: float = 180, approved_only: bool = True,
+                 mobiles: Optional[List[str]] = None,
+                 progress: Optional[Callable[[int, int, int], None]] = None):
+        self.store = store
+        self.cutoff = time.time() - older_than_days * 86400
+        self.approved_only = approved_only
+        self.mobiles = mobiles
+        self.progress = progress   # (files_done, files_total, bytes_done)
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, done: Optional[Callable[[Dict], None]] = None) -> "TieringJob":
+        """Run in a background thread; ``done(result)`` is called there when finished."""
+        def target():
+            res = self.run()
+            if done:
+                done(res)
+        self._thread = threading.Thread(target=target, name="tiering", daemon=True)
+        self._thread.start()
+        return self
+
+    # ---- planning ----
+    def plan(self, root: str, mobile: str) -> List[Item]:
+        """Uploads of one user in one root that are due for archiving (still on disk)."""
+        items = []
+        rows = self.store.catalog.uploads(root, mobile, approved=True if self.approved_only else None)
+        uploads = os.path.join(root, "users", mobile, "uploads")
+        for _key, name, _size, mtime, _mt, _ok, archived in rows:
+            if archived or mtime >= self.cutoff:
+                continue
+            path = os.path.join(uploads, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            items.append((name, path, st.st_size, st.st_mtime_ns))
+        return items
+
+    # ---- bundles ----
+    def _append(self, bundle: str, items: List[Item], on_file: Callable[[int], None]) -> None:
+        """Rewrite ``bundle`` with ``items`` added (members already there with the same CRC are kept)."""
+        partial = bundle + PARTIAL_SUFFIX
+        exists = os.path.exists(bundle)
+        if exists:
+            with open(bundle, "rb") as fi, open(partial, "wb") as fo:
+                for buf in iter(lambda: fi.read(CHUNK), b""):
+                    fo.write(buf)
+        added = []
+        try:
+            with zipfile.ZipFile(partial, "a" if exists else "w", allowZip64=True) as zf:
+                have = {zi.filename: zi for zi in zf.infolist()}
+                for name, path, size, mtime_ns in items:
+                    if self._cancel.is_set():
+                        raise TieringCancelled()
+                    old = have.get(name)
+                    if old is not None and old.file_size == size and old.CRC == _crc32(path):
+                        on_file(size)   # left over from an interrupted run
+                        continue
+                    zi = zipfile.ZipInfo(name, date_time=max(time.localtime(mtime_ns / 1e9)[:6], ZIP_EPOCH))
+                    stored = os.path.splitext(name)[1].lower() in STORED_EXTS
+                    zi.compress_type = zipfile.ZIP_STORED if stored else zipfile.ZIP_DEFLATED
+                    zi.external_attr = 0o644 << 16
+                    zi.file_size = size
+                    with warnings.catch_warnings():
+                        warnings.simplefilter("ignore")   # re-archived after a changed original
+                        with open(path, "rb") as src, zf.open(zi, "w", force_zip64=True) as out:
+                            for buf in iter(lambda: src.read(CHUNK), b""):
+                                if self._cancel.is_set():
+                                    raise TieringCancelled()
+                                out.write(buf)
+                    added.append(name)
+                    on_file(size)
+            with zipfile.ZipFile(partial) as zf:   # read back: raises on a bad CRC
+                for name in added:
+                    with zf.open(name) as f:
+                        while f.read(CHUNK):
+                            pass
+            with open(partial, "rb+") as f:
+                os.fsync(f.fileno())
+            os.replace(partial, bundle)
+        except BaseException:
+            try:
+                os.remove(partial)
+            except OSError:
+                pass
+            raise
+
+    def archive_user(self, root: str, mobile: str, items: List[Item],
+                     on_file: Callable[[int], None] = lambda n: None) -> Tuple[int, int]:
+        """Archive ``items`` of one user; returns (files removed from uploads/, bytes)."""
+        user_dir = os.path.join(root, "users", mobile)
+        os.makedirs(archive_dir(user_dir), exist_ok=True)
+        months: Dict[str, List[Item]] = {}
+        for it in items:
+            months.setdefault(bundle_for(it[3] / 1e9), []).append(it)
+        index = dict(read_index(user_dir))   # the cached copy is shared
+        now = time.time()
+        for bundle, month_items in sorted(months.items()):
+            self._append(os.path.join(archive_dir(user_dir), bundle), month_items, on_file)
+            for name, _path, size, mtime_ns in month_items:
+                index[name] = {"bundle": bundle, "size": size, "mtime_ns": mtime_ns, "archived_at": now}
+            _write_index(user_dir, index)
+        moved = nbytes = 0
+        for name, path, size, mtime_ns in items:
+            try:
+                st = os.stat(path)
+                if (st.st_size, st.st_mtime_ns) != (size, mtime_ns):
+                    continue   # changed while we archived it: the original wins in listings
+                os.remove(path)
+            except OSError:
+                continue
+            moved += 1
+            nbytes += size
+        self.store.catalog.refresh_user(root, mobile)   # now listed as archived
+        return moved, nbytes
+
+    def run(self) -> Dict:
+        res = {"users": 0, "archived": 0, "bytes": 0, "errors": [], "cancelled": False}
+        todo: List[Tuple[str, str, List[Item]]] = []
+        for root in self.store.roots:
+            mobiles = self.mobiles or self.store.catalog.users(root)
+            for mobile in mobiles:
+                items = self.plan(root, mobile)
+                if items:
+                    todo.append((root, mobile, items))
+        total = sum(len(t[2]) for t in todo)
+        done = [0, 0]
+
+        def on_file(size: int) -> None:
+            done[0] += 1
+            done[1] += size
+            if self.progress:
+                self.progress(done[0], total, done[1])
+
+        for root, mobile, items in todo:
+            try:
+                moved, nbytes = self.archive_user(root, mobile, items, on_file)
+            except TieringCancelled:
+                res["cancelled"] = True
+                break
+            except (OSError, zipfile.BadZipFile) as e:
+                res["errors"].append(f"{os.path.join(root, 'users', mobile)}: {e}")
+                continue
+            res["users"] += 1
+            res["archived"] += moved
+            res["bytes"] += nbytes
+        return res
+
+class RehydrationCache:
+    """
+    Originals pulled out of archives, kept under ``cache_dir`` and evicted
+    least-recently-used first once they exceed ``budget_bytes``. A file is
+    extracted with its original mtime, so thumbnail keys and HTTP ETags
+    match those of the upload before it was archived. Concurrent requests
+    for the same upload share one extraction.
+    """
+    def __init__(self, cache_dir: str, budget_bytes: int = 2 * 1024 ** 3):
+        self.cache_dir = cache_dir
+        self.budget = budget_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Event] = {}
+        self._files: "OrderedDict[str, int]" = OrderedDict()   # path -> size, oldest first
+        self.used = 0
+        found = []
+        for dirpath, _dirs, names in os.walk(cache_dir):
+            for n in names:
+                p = os.path.join(dirpath, n)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                if n.endswith(".tmp"):
+                    os.remove(p)
+                    continue
+                found.append((st.st_atime, p, st.st_size))
+        for _t, p, size in sorted(found):
+            self._files[p] = size
+            self.used += size
+
+    def _path(self, user_dir: str, name: str, entry: dict) -> str:
+        raw = f"{os.path.abspath(user_dir)}|{name}|{entry['size']}|{entry['mtime_ns']}"
+        key = hashlib.sha1(raw.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key[:2], key + os.path.splitext(name)[1].lower())
+
+    def fetch(self, user_dir: str, name: str) -> Optional[str]:
+        """Local copy of archived upload ``name`` (extracting it if needed); None if not archived."""
+        entry = read_index(user_dir).get(name)
+        if entry is None:
+            return None
+        dst = self._path(user_dir, name, entry)
+        with self._lock:
+            if dst in self._files and os.path.exists(dst):
+                self._files.move_to_end(dst)
+                return dst
+            ev = self._inflight.get(dst)
+            owner = ev is None
+            if owner:
+                ev = self._inflight[dst] = threading.Event()
+        if not owner:
+            ev.wait()
+            return dst if os.path.exists(dst) else None
+        try:
+            return self._extract(user_dir, name, entry, dst)
+        finally:
+            with self._lock:
+                self._inflight.pop(dst, None)
+            ev.set()
+
+    def _extract(self, user_dir: str, name: str, entry: dict, dst: str) -> Optional[str]:
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        tmp = f"{dst}.{threading.get_ident()}.tmp"
+        try:
+            with zipfile.ZipFile(os.path.join(archive_dir(user_dir), entry["bundle"])) as zf, \
+                    zf.open(name) as src, open(tmp, "wb") as out:
+                for buf in iter(lambda: src.read(CHUNK), b""):
+                    out.write(buf)
+            os.utime(tmp, ns=(time.time_ns(), int(entry["mtime_ns"])))
+            os.replace(tmp, dst)
+        except (OSError, KeyError, zipfile.BadZipFile):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return None
+        size = int(entry["size"])
+        with self._lock:
+            self._files[dst] = size
+            self.used += size
+            while self.used > self.budget and len(self._files) > 1:   # keep the one we hand out
+                old, old_size = self._files.popitem(last=False)
+                self.used -= old_size
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+        return dst
+
+    def clear(self) -> Tuple[int, int]:
+        """Delete every rehydrated copy; returns (files, bytes) removed."""
+        with self._lock:
+            out = (len(self._files), self.used)
+            for p in self._files:
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            self._files.clear()
+            self.used = 0
+        return out
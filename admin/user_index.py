@@ -0,0 +1,104 @@
+# user_index.py — in-memory search index over users and their profile fields
+from __future__ import annotations
+import os, json, threading
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
+
+PROFILE_FIELDS = ("name", "district", "state")
+
+def _grams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+class UserIndex:
+    """
+    Substring search over mobile + profile name/district/state.
+
+    Each user's searchable text is indexed by character trigrams, so a
+    query of 3+ characters only verifies users that share all its trigrams;
+    shorter queries fall back to a scan that stops at ``limit`` hits.
+    profile.json is read once per user and re-read only when its mtime
+    changes during sync().
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._text: Dict[str, str] = {}              # mobile -> lowercased haystack
+        self._profile: Dict[str, Dict[str, str]] = {}
+        self._mtime: Dict[str, Optional[int]] = {}
+        self._grams: Dict[str, Set[str]] = {}        # trigram -> mobiles
+        self._order: List[str] = []
+
+    def sync(self, users_dir: Union[str, Callable[[str], str]], mobiles: Iterable[str]) -> int:
+        """Add/remove users and re-read changed profiles; returns users re-indexed.
+
+        ``users_dir`` may instead map a mobile to its user folder (users
+        spread over several roots)."""
+        user_dir = users_dir if callable(users_dir) else (lambda m: os.path.join(users_dir, m))
+        mobiles = list(mobiles)
+        changed = 0
+        with self._lock:
+            for mob in set(self._text) - set(mobiles):
+                self._drop(mob)
+            for mob in mobiles:
+                p = os.path.join(user_dir(mob), "profile.json")
+                try:
+                    m = os.stat(p).st_mtime_ns
+                except OSError:
+                    m = None
+                if mob in self._text and self._mtime.get(mob) == m:
+                    continue
+                prof: Dict[str, str] = {}
+                if m is not None:
+                    try:
+                        with open(p, "r", encoding="utf-8") as f:
+                            data = json.load(f) or {}
+                        prof = {k: str(data.get(k) or "").strip() for k in PROFILE_FIELDS}
+                    except Exception:
+                        prof = {}
+                self._put(mob, prof, m)
+                changed += 1
+            self._order = sorted(self._text)
+        return changed
+
+    def _drop(self, mob: str) -> None:
+        for g in _grams(self._text.pop(mob, "")):
+            s = self._grams.get(g)
+            if s:
+                s.discard(mob)
+                if not s:
+                    del self._grams[g]
+        self._profile.pop(mob, None)
+        self._mtime.pop(mob, None)
+
+    def _put(self, mob: str, prof: Dict[str, str], mtime: Optional[int]) -> None:
+        self._drop(mob)
+        text = " | ".join([mob] + [prof.get(k, "") for k in PROFILE_FIELDS]).lower()
+        self._text[mob] = text
+        self._profile[mob] = prof
+        self._mtime[mob] = mtime
+        for g in _grams(text):
+            self._grams.setdefault(g, set()).add(mob)
+
+    def profile(self, mob: str) -> Dict[str, str]:
+        return dict(self._profile.get(mob, {}))
+
+    def __len__(self) -> int:
+        return len(self._text)
+
+    def search(self, query: str, limit: int = 200) -> Tuple[List[str], int]:
+        """(first ``limit`` matching mobiles in order, total matches)."""
+        q = (query or "").strip().lower()
+        with self._lock:
+            if not q:
+                return self._order[:limit], len(self._order)
+            if len(q) >= 3:
+                sets = [self._grams.get(g, set()) for g in _grams(q)]
+                sets.sort(key=len)
+                cand = set.intersection(*sets) if sets else set()
+                hits = sorted(m for m in cand if q in self._text[m])
+                return hits[:limit], len(hits)
+            hits, total = [], 0
+            for m in self._order:
+                if q in self._text[m]:
+                    total += 1
+                    if len(hits) < limit:
+                        hits.append(m)
+            return hits, total
@@ -1,12 +1,12 @@
-import os, json, re, secrets, hashlib, time, hmac, tempfile
-from typing import Optional
+import os, json, re, secrets, hashlib, time, hmac, tempfile, threading
+from typing import Callable, Iterable, Optional
 
 MOBILE_RE = re.compile(r"^[0-9]{10}$")
 
 def _now() -> int:
     return int(time.time())
 
-def _atomic_write_json(path: str, data: dict) -> None:
+def _atomic_write_json(path: str, data: dict, *, durable: bool = False) -> None:
     d = os.path.dirname(path)
     os.makedirs(d, exist_ok=True)
     fd = None
@@ -15,6 +15,9 @@ def _atomic_write_json(path: str, data: dict) -> None:
         fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=d, text=True)
         with os.fdopen(fd, "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
         os.replace(tmp, path)
     finally:
         try:
@@ -23,6 +26,80 @@ def _atomic_write_json(path: str, data: dict) -> None:
         except Exception:
             pass
 
+def _file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _iter_legacy_users(path: str, key: str = "users_by_mobile", chunk_size: int = 64 * 1024):
+    """
+    Yield (mobile, record) pairs from the ``key`` object of a legacy users.json
+    without loading the whole file: only ~chunk_size characters are buffered.
+    """
+    dec = json.JSONDecoder()
+    ws = " \t\r\n"
+    with open(path, "r", encoding="utf-8") as f:
+        buf, eof = "", False
+
+        def fill() -> bool:
+            nonlocal buf, eof
+            chunk = f.read(chunk_size)
+            eof = not chunk
+            buf += chunk
+            return not eof
+
+        # locate `"users_by_mobile"` then its opening brace
+        needle = json.dumps(key)
+        while True:
+            i = buf.find(needle)
+            if i >= 0:
+                buf = buf[i + len(needle):]
+                break
+            buf = buf[-len(needle):]
+            if not fill():
+                return
+        while True:
+            j = buf.find("{")
+            if j >= 0:
+                if buf[:j].strip(ws) != ":":
+                    return
+                buf = buf[j + 1:]
+                break
+            if not fill():
+                return
+
+        def decode():
+            # decode one JSON value at the head of buf, reading more as needed
+            nonlocal buf
+            while True:
+                buf = buf.lstrip(ws)
+                try:
+                    val, end = dec.raw_decode(buf)
+                    if end < len(buf) or eof:
+                        buf = buf[end:]
+                        return val
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                fill()
+
+        while True:
+            buf = buf.lstrip(ws + ",")
+            while not buf and fill():
+                buf = buf.lstrip(ws + ",")
+            if not buf or buf[0] == "}":
+                return
+            mob = decode()
+            buf = buf.lstrip(ws)
+            while not buf and fill():
+                buf = buf.lstrip(ws)
+            if not buf.startswith(":"):
+                return
+            buf = buf[1:]
+            yield mob, decode()
+
 def _normalize_mobile(mobile: str) -> str:
     x = re.sub(r"\D", "", (mobile or "").strip())
     if not MOBILE_RE.fullmatch(x):
@@ -36,6 +113,124 @@ def _hash_pin(pin: str, *, salt: Optional[str] = None) -> tuple[str, str]:
     dk = hashlib.pbkdf2_hmac("sha256", pin.encode("utf-8"), bytes.fromhex(salt), 120_000)
     return salt, dk.hex()
 
+class LoginThrottle:
+    """
+    Per-mobile token bucket for failed PIN attempts, held in memory.
+
+    Each mobile gets ``max_failures`` tokens that refill over
+    ``lockout_seconds``; a wrong PIN spends one. An empty bucket locks the
+    mobile for ``lockout_seconds`` and then refills it. State goes to
+    ``path`` in batches (every ``flush_every`` failures or ``flush_interval``
+    seconds) and immediately whenever a lock starts or is cleared, so
+    checks and most failures do no disk I/O and lockouts survive restarts.
+    """
+    def __init__(self, path: str, *, max_failures: int = 5, lockout_seconds: float = 300,
+                 flush_every: int = 16, flush_interval: float = 30.0):
+        self.path = path
+        self.max_failures = max(1, int(max_failures))
+        self.lockout_seconds = float(lockout_seconds)
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._state: dict[str, dict] = {}
+        self._pending = 0
+        self._last_flush = time.time()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f) or {}
+            for mob, rec in (data.get("mobiles") or {}).items():
+                if isinstance(rec, dict):
+                    self._state[mob] = {
+                        "tokens": float(rec.get("tokens", self.max_failures)),
+                        "updated": float(rec.get("updated", 0)),
+                        "locked_until": float(rec.get("locked_until", 0)),
+                    }
+        except Exception:
+            pass
+
+    def _refill(self, rec: dict, now: float) -> None:
+        if rec["locked_until"]:
+            if now < rec["locked_until"]:
+                return
+            rec["locked_until"] = 0.0
+            rec["tokens"] = float(self.max_failures)
+        elif self.lockout_seconds > 0:
+            rate = self.max_failures / self.lockout_seconds
+            rec["tokens"] = min(float(self.max_failures), rec["tokens"] + (now - rec["updated"]) * rate)
+        else:
+            rec["tokens"] = float(self.max_failures)
+        rec["updated"] = now
+
+    def retry_after(self, mobile: str) -> float:
+        """Seconds until ``mobile`` may try again (0 when not locked)."""
+        with self._lock:
+            rec = self._state.get(mobile)
+            if not rec or not rec["locked_until"]:
+                return 0.0
+            return max(0.0, rec["locked_until"] - time.time())
+
+    def check(self, mobile: str) -> None:
+        if self.retry_after(mobile) > 0:
+            raise ValueError("Too many attempts. Try again in a few minutes.")
+
+    def seed_legacy(self, mobile: str, failed_attempts: int, last_failed_at: float) -> None:
+        """Adopt a lockout recorded by older versions in auth.json."""
+        with self._lock:
+            if mobile in self._state or failed_attempts < self.max_failures:
+                return
+            until = last_failed_at + self.lockout_seconds
+            if until <= time.time():
+                return
+            self._state[mobile] = {"tokens": 0.0, "updated": last_failed_at, "locked_until": until}
+        self.flush()
+
+    def record_failure(self, mobile: str) -> bool:
+        """Spend a token; returns True if this failure started a lockout."""
+        now = time.time()
+        with self._lock:
+            rec = self._state.setdefault(
+                mobile, {"tokens": float(self.max_failures), "updated": now, "locked_until": 0.0})
+            self._refill(rec, now)
+            rec["tokens"] = max(0.0, rec["tokens"] - 1.0)
+            locked = rec["tokens"] < 1.0 and not rec["locked_until"]
+            if locked:
+                rec["locked_until"] = now + self.lockout_seconds
+            self._pending += 1
+            due = (locked or self._pending >= self.flush_every
+                   or now - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+        return locked
+
+    def reset(self, mobile: str) -> None:
+        """Forget failures (successful login / PIN reset)."""
+        with self._lock:
+            rec = self._state.pop(mobile, None)
+            if rec is None:
+                return
+            was_locked = bool(rec["locked_until"])
+            self._pending += 1
+        if was_locked:
+            self.flush()
+
+    def flush(self) -> None:
+        now = time.time()
+        with self._lock:
+            for mob in list(self._state):
+                rec = self._state[mob]
+                self._refill(rec, now)
+                if not rec["locked_until"] and rec["tokens"] >= self.max_failures:
+                    del self._state[mob]   # fully recovered: nothing to remember
+            snapshot = {"mobiles": {m: dict(r) for m, r in self._state.items()},
+                        "policy": {"max_failures": self.max_failures,
+                                   "lockout_seconds": self.lockout_seconds}}
+            self._pending = 0
+            self._last_flush = now
+        try:
+            _atomic_write_json(self.path, snapshot)
+        except Exception:
+            pass
+
 class AuthStore:
     """
     Per-user auth layout (mobile is the ONLY primary key):
@@ -49,42 +244,113 @@ class AuthStore:
         session.json      # current signed-in mobile
 
     Also migrates legacy auth/users.json (mobile map) if present.
+
+    The session is cached in memory and only re-read when session.json's
+    (inode, mtime, size) signature changes, so logouts done by another
+    process are still picked up. ``session_recheck`` is how long (seconds)
+    a cached answer is trusted before the file is stat()-ed again.
+
+    Failed logins are throttled by a LoginThrottle persisted in
+    auth/throttle.json (``max_failures`` within ``lockout_seconds``).
     """
-    def __init__(self, base_dir: str):
+    def __init__(self, base_dir: str, *, session_recheck: float = 1.0,
+                 max_failures: int = 5, lockout_seconds: float = 300):
         self.base_dir = base_dir
         os.makedirs(self.base_dir, exist_ok=True)
         self.users_root = os.path.join(self.base_dir, "users")
         os.makedirs(self.users_root, exist_ok=True)
         self.session_path = os.path.join(self.base_dir, "session.json")
 
-        # ---- optional migration from legacy map ----
-        legacy_dir = os.path.join(base_dir, "auth")
-        legacy_map = os.path.join(legacy_dir, "users.json")
-        if os.path.exists(legacy_map):
+        # ---- in-memory session cache ----
+        self.session_recheck = session_recheck
+        self._session: Optional[dict] = None
+        self._session_sig: Optional[tuple] = None
+        self._session_checked_at = 0.0
+        self._session_loaded = False
+        self._session_listeners: list[Callable[[Optional[dict]], None]] = []
+
+        self._trash = None
+
+        self.throttle = LoginThrottle(os.path.join(base_dir, "auth", "throttle.json"),
+                                      max_failures=max_failures, lockout_seconds=lockout_seconds)
+
+        # ---- optional migration from legacy map (runs once) ----
+        self.legacy_map = os.path.join(base_dir, "auth", "users.json")
+        self.migration_marker = os.path.join(base_dir, "auth", "users.json.migrated")
+        if os.path.exists(self.legacy_map):
             try:
-                with open(legacy_map, "r", encoding="utf-8") as f:
-                    db = json.load(f) or {}
-                users_map = db.get("users_by_mobile") or {}
-                if isinstance(users_map, dict):
-                    for mob, rec in users_map.items():
-                        mobn = re.sub(r"\D", "", (mob or ""))
-                        if not MOBILE_RE.fullmatch(mobn):
-                            continue
-                        udir = os.path.join(self.users_root, mobn)
-                        os.makedirs(udir, exist_ok=True)
-                        payload = {
-                            "mobile": mobn,
-                            "pin_salt": rec.get("pin_salt", ""),
-                            "pin_hash": rec.get("pin_hash", ""),
-                            "created_at": rec.get("created_at", _now()),
-                            "updated_at": rec.get("updated_at", _now()),
-                        }
-                        _atomic_write_json(os.path.join(udir, "auth.json"), payload)
-                # Keep legacy file as-is; comment next line to preserve it.
-                # os.rename(legacy_map, legacy_map + ".migrated")
+                self._migrate_legacy()
             except Exception:
                 pass
 
+    # ---- legacy migration ----
+    def _migrate_legacy(self) -> None:
+        """
+        Copy legacy auth/users.json records into users/<mobile>/auth.json once.
+
+        A marker next to the legacy map records its size/mtime and sha256; the
+        migration is skipped while the source is unchanged. Records whose
+        auth.json is already identical or newer are left alone, so PINs
+        changed after the migration are never overwritten.
+        """
+        st = os.stat(self.legacy_map)
+        marker = {}
+        try:
+            with open(self.migration_marker, "r", encoding="utf-8") as f:
+                marker = json.load(f) or {}
+        except Exception:
+            marker = {}
+        if marker.get("size") == st.st_size and marker.get("mtime_ns") == st.st_mtime_ns:
+            return
+        checksum = _file_sha256(self.legacy_map)
+        if marker.get("sha256") != checksum:
+            migrated, skipped = 0, 0
+            for mob, rec in _iter_legacy_users(self.legacy_map):
+                mobn = re.sub(r"\D", "", (mob or ""))
+                if not MOBILE_RE.fullmatch(mobn) or not isinstance(rec, dict):
+                    continue
+                if self._migrate_record(mobn, rec):
+                    migrated += 1
+                else:
+                    skipped += 1
+        else:
+            migrated, skipped = marker.get("migrated", 0), marker.get("skipped", 0)
+        _atomic_write_json(self.migration_marker, {
+            "source": os.path.basename(self.legacy_map),
+            "sha256": checksum,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "migrated": migrated,
+            "skipped": skipped,
+            "migrated_at": _now(),
+        }, durable=True)
+
+    def _migrate_record(self, mobn: str, rec: dict) -> bool:
+        ap = os.path.join(self.users_root, mobn, "auth.json")
+        now = _now()
+        # how fresh the legacy record really is; `now` is only what gets written
+        legacy_ts = int(rec.get("updated_at") or rec.get("created_at") or 0)
+        payload = {
+            "mobile": mobn,
+            "pin_salt": rec.get("pin_salt", ""),
+            "pin_hash": rec.get("pin_hash", ""),
+            "created_at": rec.get("created_at") or now,
+            "updated_at": rec.get("updated_at") or now,
+        }
+        try:
+            with open(ap, "r", encoding="utf-8") as f:
+                cur = json.load(f) or {}
+        except Exception:
+            cur = None
+        if cur and cur.get("pin_hash"):
+            if (cur.get("pin_salt"), cur.get("pin_hash")) == (payload["pin_salt"], payload["pin_hash"]):
+                return False
+            if int(cur.get("updated_at", 0) or 0) >= legacy_ts:
+                return False
+            payload = {**cur, **payload}
+        _atomic_write_json(ap, payload)
+        return True
+
     # ---- paths ----
     def _user_dir(self, mobile: str) -> str:
         return os.path.join(self.users_root, _normalize_mobile(mobile))
@@ -120,12 +386,120 @@ class AuthStore:
         # Clear throttle info on reset
         u.pop("failed_attempts", None)
         u.pop("last_failed_at", None)
+        self.throttle.reset(mob)
 
         _atomic_write_json(ap, u)
         return {"mobile": mob}
 
+    def register_many(self, rows: Iterable[tuple[str, str]], *, overwrite: bool = True,
+                      workers: Optional[int] = None, first_row: int = 1) -> dict:
+        """
+        Provision many (mobile, pin) pairs at once.
+
+        PINs are hashed on a process pool (falling back to threads where
+        processes are unavailable, e.g. Android); records are then written
+        on a thread pool. Bad rows never abort the batch; they are returned
+        in ``errors`` as {"row", "mobile", "error"}, rows numbered from
+        ``first_row``.
+        Existing users are updated when ``overwrite`` is true, else reported.
+        """
+        from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+        errors: list[dict] = []
+        todo: dict[str, tuple[int, str]] = {}
+        for i, row in enumerate(rows, start=first_row):
+            try:
+                raw_mobile, pin = row[0], row[1]
+            except Exception:
+                errors.append({"row": i, "mobile": "", "error": "Expected mobile and PIN."})
+                continue
+            raw_mobile, pin = str(raw_mobile or "").strip(), str(pin or "").strip()
+            try:
+                mob = _normalize_mobile(raw_mobile)
+                if not re.fullmatch(r"[0-9]{4,6}", pin):
+                    raise ValueError("PIN must be 4–6 digits.")
+                if mob in todo:
+                    raise ValueError(f"Duplicate of row {todo[mob][0]}.")
+                if not overwrite and os.path.exists(os.path.join(self.users_root, mob, "auth.json")):
+                    raise ValueError("User already exists.")
+            except ValueError as e:
+                errors.append({"row": i, "mobile": raw_mobile, "error": str(e)})
+                continue
+            todo[mob] = (i, pin)
+
+        mobiles = list(todo)
+        pins = [todo[m][1] for m in mobiles]
+        workers = workers or os.cpu_count() or 1
+        chunk = max(1, len(pins) // (workers * 4))
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as ex:
+                hashes = list(ex.map(_hash_pin, pins, chunksize=chunk))
+        except Exception:
+            # hashlib releases the GIL, so threads still use several cores
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                hashes = list(ex.map(_hash_pin, pins))
+
+        now = _now()
+
+        def write(item: tuple[str, tuple[str, str]]) -> Optional[str]:
+            mob, (salt, pin_hash) = item
+            ap = os.path.join(self.users_root, mob, "auth.json")
+            try:
+                try:
+                    with open(ap, "r", encoding="utf-8") as f:
+                        u = json.load(f) or {}
+                    existed = True
+                except FileNotFoundError:
+                    u, existed = {"mobile": mob, "created_at": now}, False
+                except Exception:
+                    u, existed = {"mobile": mob, "created_at": now}, True
+                u.update({"mobile": mob, "pin_salt": salt, "pin_hash": pin_hash, "updated_at": now})
+                u.pop("failed_attempts", None)
+                u.pop("last_failed_at", None)
+                _atomic_write_json(ap, u)   # creates users/<mobile>/ as needed
+                return "updated" if existed else "created"
+            except Exception as e:
+                return f"error:{e}"
+
+        created = updated = 0
+        with ThreadPoolExecutor(max_workers=min(32, workers * 4)) as ex:
+            for mob, res in zip(mobiles, ex.map(write, zip(mobiles, hashes))):
+                if res == "created":
+                    created += 1
+                elif res == "updated":
+                    updated += 1
+                else:
+                    errors.append({"row": todo[mob][0], "mobile": mob, "error": res[len("error:"):]})
+        for mob in mobiles:
+            self.throttle.reset(mob)
+        errors.sort(key=lambda e: e["row"])
+        return {"created": created, "updated": updated, "errors": errors}
+
+    def import_csv(self, path: str, **kwargs) -> dict:
+        """
+        register_many() from a CSV file. Uses the ``mobile`` and ``pin``
+        columns when there is a header row, else the first two columns.
+        Row numbers in the report are CSV line numbers.
+        """
+        import csv
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            rows = list(csv.reader(f))
+        if not rows:
+            return {"created": 0, "updated": 0, "errors": []}
+        header = [c.strip().lower() for c in rows[0]]
+        if "mobile" in header and "pin" in header:
+            mi, pi = header.index("mobile"), header.index("pin")
+            body, first = rows[1:], 2
+        else:
+            mi, pi = 0, 1
+            body, first = rows, 1
+        pairs = [(r[mi] if len(r) > mi else "", r[pi] if len(r) > pi else "") for r in body]
+        return self.register_many(pairs, first_row=first, **kwargs)
+
     def login(self, mobile: str, pin: str) -> dict:
         mob = _normalize_mobile(mobile)
+        # Throttle first: a locked-out mobile costs no disk I/O
+        self.throttle.check(mob)
         ap = self._auth_path(mob)
         if not os.path.exists(ap):
             raise ValueError("Account not found. Please register.")
@@ -136,12 +510,10 @@ class AuthStore:
         except Exception:
             raise ValueError("Corrupted account. Recreate the user.")
 
-        # Throttle (5 failures -> 5 min cool-off)
         now = _now()
-        fails = int(u.get("failed_attempts", 0))
-        last = int(u.get("last_failed_at", 0))
-        if fails >= 5 and now - last < 300:
-            raise ValueError("Too many attempts. Try again in a few minutes.")
+        if "failed_attempts" in u:
+            self.throttle.seed_legacy(mob, int(u.get("failed_attempts", 0)), int(u.get("last_failed_at", 0)))
+            self.throttle.check(mob)
 
         salt = u.get("pin_salt", "")
         expect = u.get("pin_hash", "")
@@ -150,19 +522,18 @@ class AuthStore:
 
         _, got = _hash_pin(pin, salt=salt)
         if not hmac.compare_digest(got, expect):
-            u["failed_attempts"] = fails + 1
-            u["last_failed_at"] = now
-            _atomic_write_json(ap, u)
+            self.throttle.record_failure(mob)
             raise ValueError("Invalid PIN.")
 
         # Success -> clear throttling
+        self.throttle.reset(mob)
         u.pop("failed_attempts", None)
         u.pop("last_failed_at", None)
         u["updated_at"] = now
         _atomic_write_json(ap, u)
 
         # Persist session as current mobile
-        _atomic_write_json(self.session_path, {"mobile": mob, "login_at": now})
+        self._write_session(mob, now)
         return {"mobile": mob}
 
     def logout(self) -> None:
@@ -171,18 +542,68 @@ class AuthStore:
                 os.remove(self.session_path)
         except Exception:
             pass
+        self._set_session(None, None)
 
     def current_user(self) -> Optional[dict]:
-        if not os.path.exists(self.session_path):
+        """Signed-in user (``{"mobile": ...}``) or None; served from memory."""
+        now = time.monotonic()
+        if self._session_loaded and now - self._session_checked_at < self.session_recheck:
+            return dict(self._session) if self._session else None
+        self._session_checked_at = now
+        sig = self._stat_session()
+        if not self._session_loaded or sig != self._session_sig:
+            self._set_session(self._read_session() if sig else None, sig)
+        return dict(self._session) if self._session else None
+
+    # ---- session cache ----
+    def add_session_listener(self, callback: Callable[[Optional[dict]], None]) -> None:
+        """Call ``callback(user_or_None)`` whenever the signed-in user changes."""
+        if callback not in self._session_listeners:
+            self._session_listeners.append(callback)
+
+    def remove_session_listener(self, callback: Callable[[Optional[dict]], None]) -> None:
+        try:
+            self._session_listeners.remove(callback)
+        except ValueError:
+            pass
+
+    def invalidate_session(self) -> None:
+        """Force the next current_user() to re-check session.json."""
+        self._session_checked_at = 0.0
+        self._session_sig = None
+
+    def _stat_session(self) -> Optional[tuple]:
+        try:
+            st = os.stat(self.session_path)
+        except OSError:
             return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _read_session(self) -> Optional[dict]:
         try:
             with open(self.session_path, "r", encoding="utf-8") as f:
                 sess = json.load(f) or {}
-            mob = _normalize_mobile(sess.get("mobile", ""))
             # Return minimal user object (mobile only); main.py/LocalStore use this.
-            return {"mobile": mob}
+            return {"mobile": _normalize_mobile(sess.get("mobile", ""))}
         except Exception:
             return None
+
+    def _write_session(self, mob: str, now: int) -> None:
+        _atomic_write_json(self.session_path, {"mobile": mob, "login_at": now})
+        self._set_session({"mobile": mob}, self._stat_session())
+
+    def _set_session(self, user: Optional[dict], sig: Optional[tuple]) -> None:
+        changed = self._session_loaded and user != self._session
+        self._session = user
+        self._session_sig = sig
+        self._session_loaded = True
+        self._session_checked_at = time.monotonic()
+        if changed:
+            for cb in list(self._session_listeners):
+                try:
+                    cb(dict(user) if user else None)
+                except Exception:
+                    pass
     # --- add inside class AuthStore ---
 
     def user_exists(self, mobile: str) -> bool:
@@ -225,33 +646,49 @@ class AuthStore:
         u.update({"pin_salt": salt, "pin_hash": pin_hash, "updated_at": _now()})
         _atomic_write_json(ap, u)
 
-    def delete_user(self, mobile: str, *, archive: bool = True) -> bool:
-        import shutil
+    @property
+    def trash(self):
+        """TrashBin for base_dir/trash, created on first use."""
+        if self._trash is None:
+            from trash import TrashBin
+            self._trash = TrashBin(os.path.join(self.base_dir, "trash"))
+        return self._trash
+
+    def delete_user(self, mobile: str, *, archive: bool = True,
+                    progress=None, done=None) -> bool:
+        """
+        Remove a user's folder. Returns as soon as it is gone from users/;
+        a cross-device move to trash (or, with ``archive=False``, the actual
+        deletion) finishes in the background, reporting via ``progress`` /
+        ``done`` (see trash.TrashBin).
+        """
         mob = _normalize_mobile(mobile)
         udir = self._user_dir(mob)
         if not os.path.isdir(udir):
             return False
         if archive:
-            trash = os.path.join(self.base_dir, "trash")
-            os.makedirs(trash, exist_ok=True)
-            os.rename(udir, os.path.join(trash, f"{mob}_{_now()}"))
+            self.trash.move(udir, f"{mob}_{_now()}", progress=progress, done=done)
         else:
-            shutil.rmtree(udir, ignore_errors=True)
+            self.trash.discard(udir, done=done)
         # clear session if it belonged to this user
-        try:
-            if os.path.exists(self.session_path):
-                with open(self.session_path, "r", encoding="utf-8") as f:
-                    sess = json.load(f) or {}
-                if _normalize_mobile(sess.get("mobile", "")) == mob:
-                    os.remove(self.session_path)
-        except Exception:
-            pass
+        self.invalidate_session()
+        cur = self.current_user()
+        if cur and cur.get("mobile") == mob:
+            self.logout()
         return True
 
+    def restore_user(self, entry: str, *, progress=None, done=None) -> None:
+        """Put a trashed user folder (an entry of trash.entries()) back into users/."""
+        self.trash.restore(entry, progress=progress, done=done)
+
+    def purge_trash(self, max_age_days: float = 30) -> tuple:
+        """Permanently delete trashed users older than ``max_age_days``; (entries, bytes)."""
+        return self.trash.purge(max_age_days * 86400)
+
     def set_current_user(self, mobile: str) -> dict:
         """Switch session to an existing user without re-entering PIN (e.g., quick account switch UI)."""
         mob = _normalize_mobile(mobile)
         if not self.user_exists(mob):
             raise ValueError("User not found.")
-        _atomic_write_json(self.session_path, {"mobile": mob, "login_at": _now()})
+        self._write_session(mob, _now())
         return {"mobile": mob}
@@ -0,0 +1,171 @@
+import os, csv, gzip, json, time, threading
+from typing import Iterator, List, Optional, Tuple
+
+HEADER = ["ts_iso", "mobile_masked"]
+_TS_FMT = "%Y-%m-%d %H:%M:%S"
+
+def _parse_ts(s: str) -> Optional[float]:
+    try:
+        return time.mktime(time.strptime(s, _TS_FMT))
+    except Exception:
+        return None
+
+class LoginLog:
+    """
+    Buffered, rotating login history.
+
+      auth_dir/
+        login_history.csv                       # active segment (appended)
+        login_history.<YYYYmmdd_HHMMSS>.csv.gz  # rotated, compressed segments
+        login_history.index.json                # [first_ts, last_ts, rows] per segment
+
+    Rows are kept in memory and appended in one write every ``flush_every``
+    rows or ``flush_interval`` seconds (and on flush()/close()). The interval
+    is only checked on append, so owners should also call flush() on a timer
+    and when the app is paused (main.py does both). The active
+    segment is rotated once it reaches ``max_bytes`` or ``max_age`` seconds;
+    ``keep_segments`` (if set) caps how many compressed segments are kept.
+    Queries use the index to open only segments overlapping the time window.
+    """
+    def __init__(self, auth_dir: str, *, flush_every: int = 32, flush_interval: float = 10.0,
+                 max_bytes: int = 1 << 20, max_age: float = 30 * 86400,
+                 keep_segments: Optional[int] = None):
+        self.dir = auth_dir
+        os.makedirs(self.dir, exist_ok=True)
+        self.active_path = os.path.join(self.dir, "login_history.csv")
+        self.index_path = os.path.join(self.dir, "login_history.index.json")
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.keep_segments = keep_segments
+        self._lock = threading.Lock()
+        self._buf: List[Tuple[float, str]] = []
+        self._last_flush = time.time()
+        self._index = self._load_index()
+
+    # ---- index ----
+    def _load_index(self) -> dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                idx = json.load(f) or {}
+        except Exception:
+            idx = {}
+        idx.setdefault("segments", [])
+        if "active_first_ts" not in idx:
+            idx["active_first_ts"] = self._first_ts_of_active()
+        return idx
+
+    def _save_index(self) -> None:
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp, self.index_path)
+
+    def _first_ts_of_active(self) -> Optional[float]:
+        try:
+            with open(self.active_path, "r", encoding="utf-8", newline="") as f:
+                for row in csv.reader(f):
+                    if row and row[0] != HEADER[0]:
+                        return _parse_ts(row[0])
+        except Exception:
+            pass
+        return None
+
+    # ---- writing ----
+    def append(self, mobile_masked: str, ts: Optional[float] = None) -> None:
+        ts = time.time() if ts is None else ts
+        with self._lock:
+            self._buf.append((ts, mobile_masked))
+            due = len(self._buf) >= self.flush_every or ts - self._last_flush >= self.flush_interval
+        if due:
+            self.flush()
+
+    def flush(self) -> None:
+        with self._lock:
+            rows, self._buf = self._buf, []
+            self._last_flush = time.time()
+            if not rows:
+                return
+            is_new = not os.path.exists(self.active_path)
+            with open(self.active_path, "a", newline="", encoding="utf-8") as f:
+                w = csv.writer(f)
+                if is_new:
+                    w.writerow(HEADER)
+                w.writerows([time.strftime(_TS_FMT, time.localtime(t)), m] for t, m in rows)
+            if self._index.get("active_first_ts") is None:
+                self._index["active_first_ts"] = rows[0][0]
+            self._index["active_last_ts"] = rows[-1][0]
+            if self._should_rotate():
+                self._rotate()
+            self._save_index()
+
+    def close(self) -> None:
+        self.flush()
+
+    def _should_rotate(self) -> bool:
+        try:
+            size = os.path.getsize(self.active_path)
+        except OSError:
+            return False
+        first = self._index.get("active_first_ts")
+        return size >= self.max_bytes or (first is not None and time.time() - first >= self.max_age)
+
+    def _rotate(self) -> None:
+        first = self._index.get("active_first_ts") or time.time()
+        name = f"login_history.{time.strftime('%Y%m%d_%H%M%S', time.localtime(first))}.csv.gz"
+        dst = os.path.join(self.dir, name)
+        rows, last = 0, first
+        with open(self.active_path, "r", encoding="utf-8", newline="") as src, \
+                gzip.open(dst + ".tmp", "wt", encoding="utf-8", newline="") as out:
+            w = csv.writer(out)
+            for row in csv.reader(src):
+                w.writerow(row)
+                if row and row[0] != HEADER[0]:
+                    rows += 1
+                    last = _parse_ts(row[0]) or last
+        os.replace(dst + ".tmp", dst)
+        os.remove(self.active_path)
+        self._index["segments"].append({"file": name, "first_ts": first, "last_ts": last, "rows": rows})
+        self._index["active_first_ts"] = None
+        self._index.pop("active_last_ts", None)
+        if self.keep_segments is not None:
+            while len(self._index["segments"]) > self.keep_segments:
+                old = self._index["segments"].pop(0)
+                try:
+                    os.remove(os.path.join(self.dir, old["file"]))
+                except OSError:
+                    pass
+
+    # ---- reading ----
+    def iter_since(self, since_ts: float) -> Iterator[Tuple[float, str]]:
+        """Yield (ts, mobile_masked) for logins at or after ``since_ts``, oldest first."""
+        self.flush()
+        for seg in list(self._index["segments"]):
+            if seg.get("last_ts", 0) < since_ts:
+                continue
+            try:
+                with gzip.open(os.path.join(self.dir, seg["file"]), "rt", encoding="utf-8", newline="") as f:
+                    yield from self._iter_rows(f, since_ts)
+            except OSError:
+                continue
+        last = self._index.get("active_last_ts")
+        if last is not None and last < since_ts:
+            return
+        try:
+            with open(self.active_path, "r", encoding="utf-8", newline="") as f:
+                yield from self._iter_rows(f, since_ts)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _iter_rows(f, since_ts: float) -> Iterator[Tuple[float, str]]:
+        for row in csv.reader(f):
+            if len(row) < 2 or row[0] == HEADER[0]:
+                continue
+            ts = _parse_ts(row[0])
+            if ts is not None and ts >= since_ts:
+                yield ts, row[1]
+
+    def logins_in_last_days(self, days: float) -> List[Tuple[float, str]]:
+        return list(self.iter_since(time.time() - days * 86400))
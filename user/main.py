@@ -7,18 +7,13 @@ from __future__ import annotations
 # - Works with updated auth_store.py (mobile primary key) and local_store.py (mobile-scoped uploads).
 # - Preserves your original structure & camera logic.
 
+from startup_trace import TRACE   # first, so import timing covers everything below
+
 import os
 # Prefer ffpyplayer before any Kivy video imports.
 os.environ.setdefault("KIVY_VIDEO", "ffpyplayer")
 
 
-from kivymd.uix.dialog import MDDialog
-from kivymd.uix.button import MDFlatButton
-from kivymd.uix.boxlayout import MDBoxLayout
-from kivymd.uix.label import MDLabel
-from kivymd.uix.card import MDCard
-from kivy.uix.image import AsyncImage
-
 def _fmt_bytes(n):
     try:
         for u in ["B","KB","MB","GB","TB"]:
@@ -44,7 +39,6 @@ import uuid
 import glob
 import shutil
 import threading
-import csv
 from typing import Optional
 
 from kivy.lang import Builder
@@ -55,42 +49,54 @@ from kivy.clock import Clock
 from kivy.utils import platform
 from kivy.cache import Cache
 from kivy.uix.image import AsyncImage
-from kivy.uix.video import Video
 
 from kivymd.app import MDApp
 
+# Heavy/optional modules (camera4kivy, plyer, cv2, Video, dialogs) are
+# imported on first use below, not at startup.
+
 # ---- camera4kivy import with safe fallback ----
-try:
-    from camera4kivy import Preview          # PyPI name (desktop)
-except Exception:
-    try:
-        from kivy_garden.camera4kivy import Preview  # Garden name (Android/buildozer)
-    except Exception:
-        from kivy.uix.widget import Widget
-        class Preview(Widget):
-            """Fallback so KV loads even if camera4kivy is missing."""
-            pass
+_Preview = None
+def _preview_class():
+    global _Preview
+    if _Preview is None:
+        try:
+            from camera4kivy import Preview          # PyPI name (desktop)
+        except Exception:
+            try:
+                from kivy_garden.camera4kivy import Preview  # Garden name (Android/buildozer)
+            except Exception:
+                from kivy.uix.widget import Widget
+                class Preview(Widget):
+                    """Fallback so the app runs even if camera4kivy is missing."""
+                    pass
+        _Preview = Preview
+    return _Preview
 # -----------------------------------------------
 
 from local_store import LocalStore  # per-user profile + uploads
 from auth_store import AuthStore    # local auth (mobile-only)
+from login_log import LoginLog      # buffered, rotating login history
 
-# optional pickers
-try:
-    from plyer import filechooser
-except Exception:
-    filechooser = None
-try:
-    from plyer import camera as plyer_camera
-except Exception:
-    plyer_camera = None
+# optional pickers (plyer), resolved on first use
+_plyer_cache: dict = {}
+def _plyer(name: str):
+    """plyer facade ``name`` (e.g. 'filechooser', 'camera'), or None if unavailable."""
+    if name not in _plyer_cache:
+        try:
+            import importlib
+            _plyer_cache[name] = getattr(importlib.import_module("plyer"), name)
+        except Exception:
+            _plyer_cache[name] = None
+    return _plyer_cache[name]
 
-# OpenCV fallback (desktop video)
-try:
-    import cv2  # noqa: F401
-    _HAS_CV2 = True
-except Exception:
-    _HAS_CV2 = False
+# OpenCV fallback (desktop video): only checks it is installed; imported by the recorder
+def _has_cv2() -> bool:
+    try:
+        import importlib.util
+        return importlib.util.find_spec("cv2") is not None
+    except Exception:
+        return False
 
 
 # ---------- crash logger ----------
@@ -112,6 +118,8 @@ def install_crashlog(path: str):
 Cache.register('asyncimage', limit=64)
 Cache.register('preview_image', limit=4)
 
+TRACE.mark("imports")
+
 
 class PhotoApp(MDApp):
     def __init__(self, **kwargs):
@@ -119,6 +127,8 @@ class PhotoApp(MDApp):
         # Auth + data
         self.auth: Optional[AuthStore] = None
         self.store: Optional[LocalStore] = None
+        self.login_log: Optional[LoginLog] = None
+        self._login_flush_ev = None
         self.profile_data: dict = {}  # ACTIVE user's profile only (per-mobile JSON)
 
         # Gallery paging
@@ -145,7 +155,7 @@ class PhotoApp(MDApp):
         self._cv_stop_flag = False
 
         # Camera attrs
-        self._cam_widget: Optional[Preview] = None
+        self._cam_widget = None   # camera4kivy Preview, created on first use
         self._cam_connected = False
         self._last_capture_path: Optional[str] = None
 
@@ -174,6 +184,10 @@ class PhotoApp(MDApp):
     def open_upload_detail(self, filepath: str):
         """Open a modal dialog with big preview + description + file info."""
         try:
+            from kivymd.uix.dialog import MDDialog
+            from kivymd.uix.button import MDFlatButton
+            from kivymd.uix.boxlayout import MDBoxLayout
+            from kivymd.uix.label import MDLabel
             # read meta sidecar (added earlier when saving)
             meta = {}
             sidecar = filepath + ".json"
@@ -280,10 +294,14 @@ class PhotoApp(MDApp):
         from kivy.config import Config
         Config.set('kivy', 'log_level', 'info')
 
-        self.store = LocalStore(self.user_data_dir)
-        self.auth = AuthStore(self.user_data_dir)
+        with TRACE.phase("store_init"):
+            self.store = LocalStore(self.user_data_dir)
+            self.auth = AuthStore(self.user_data_dir)
+            self.auth.add_session_listener(self._on_session_changed)
+            self.login_log = LoginLog(os.path.join(self.user_data_dir, "auth"))
 
-        root = self._load_kv_files()
+        with TRACE.phase("kv_load"):
+            root = self._load_kv_files()
 
         try:
             u = self.auth.current_user()
@@ -305,8 +323,16 @@ class PhotoApp(MDApp):
                 pass
 
         Clock.schedule_once(lambda *_: self._delayed_gallery_init(), 0.8)
+        Clock.schedule_once(self._finish_startup_trace, 0)
         return root
 
+    def _finish_startup_trace(self, *_):
+        """Runs on the first frame: save startup timings and flag budget overruns."""
+        TRACE.mark("first_frame")
+        TRACE.remove_import_hook()
+        for line in TRACE.write(os.path.join(self.user_data_dir, "startup_trace.json")):
+            Logger.warning(f"Startup: over budget: {line}")
+
     def _delayed_gallery_init(self):
         if not self._gallery_loaded:
             self._bootstrap_gallery_for_mobile()
@@ -414,6 +440,19 @@ class PhotoApp(MDApp):
             else:
                 self._notify(str(e))
 
+    def _on_session_changed(self, user: dict | None):
+        """AuthStore callback: react to login/logout (including external ones)."""
+        def _apply(dt):
+            sm = getattr(self.root, "ids", {}).get("screen_manager") if self.root else None
+            if user:
+                if (self.profile_data.get("mobile") or "") != user.get("mobile"):
+                    self._set_active_user(user)
+            elif sm and getattr(sm, "current", None) not in ("login", "register"):
+                self.profile_data = {}
+                self._bind_profile_to_ui()
+                self.change_screen("login")
+        Clock.schedule_once(_apply, 0)
+
     def auth_logout(self):
         try:
             self.auth.logout()
@@ -469,6 +508,7 @@ class PhotoApp(MDApp):
         def _do_pick(dt):
             path = None
             try:
+                filechooser = _plyer("filechooser")
                 if filechooser:
                     paths = filechooser.open_file(
                         title="Choose an image",
@@ -640,7 +680,7 @@ class PhotoApp(MDApp):
         if self._cam_widget is not None:
             return self._cam_widget
         try:
-            w = Preview()
+            w = _preview_class()()
             holder.clear_widgets()
             holder.add_widget(w)
             self._cam_widget = w
@@ -740,7 +780,7 @@ class PhotoApp(MDApp):
             self._update_video_button_text()
             return
 
-        if not _HAS_CV2:
+        if not _has_cv2():
             self._notify("OpenCV not available; video recording unsupported on this backend.")
             return
 
@@ -886,6 +926,7 @@ class PhotoApp(MDApp):
         self._last_capture_path = video_path
         self._preview_mode = "video"
 
+        from kivy.uix.video import Video   # loads the video provider; only when needed
         player = Video(
             source=video_path,
             state='play',
@@ -1002,6 +1043,8 @@ class PhotoApp(MDApp):
                 self._stop_video_recording()
         except Exception as e:
             Logger.error(f"App pause error: {e}")
+        # Android may kill a paused app without calling on_stop
+        self._flush_auth_state()
         return True
 
     def on_resume(self):
@@ -1034,6 +1077,8 @@ class PhotoApp(MDApp):
         except Exception as e:
             Logger.warning(f"Camera stop error: {e}")
 
+        self._flush_auth_state()
+
         # Avoid misuse of Cache.remove(category) — if needed, let GC handle it.
         try:
             Cache.print_usage()
@@ -1121,6 +1166,16 @@ class PhotoApp(MDApp):
         if ids.get("tf_address"):  ids["tf_address"].text = p.get("address","")
         self._notify("Form reset")
 
+    def _flush_auth_state(self, *_):
+        self._login_flush_ev = None
+        try:
+            if self.auth:
+                self.auth.throttle.flush()
+            if self.login_log:
+                self.login_log.flush()
+        except Exception as e:
+            Logger.warning(f"Auth state flush error: {e}")
+
     def _hash_text(self, text: str) -> str:
         try:
             import hashlib
@@ -1129,15 +1184,15 @@ class PhotoApp(MDApp):
             return "masked"
 
     def _write_login_history(self, user: dict, mobile_value: str):
-        auth_dir = os.path.join(self.user_data_dir, "auth")
-        os.makedirs(auth_dir, exist_ok=True)
-        path = os.path.join(auth_dir, "login_history.csv")
-        is_new = not os.path.exists(path)
-        with open(path, "a", newline="", encoding="utf-8") as f:
-            w = csv.writer(f)
-            if is_new:
-                w.writerow(["ts_iso", "mobile_masked"])
-            w.writerow([time.strftime("%Y-%m-%d %H:%M:%S"), self._hash_text(mobile_value)])
+        # buffered; rotated/compressed by LoginLog (auth/login_history*.csv)
+        try:
+            self.login_log.append(self._hash_text(mobile_value))
+        except Exception as e:
+            Logger.warning(f"Login history write failed: {e}")
+        # logins are rare; don't leave the row buffered until the next one
+        if self._login_flush_ev is None and self.login_log:
+            self._login_flush_ev = Clock.schedule_once(self._flush_auth_state,
+                                                       self.login_log.flush_interval)
 
     def _bind_profile_to_ui(self):
         try:
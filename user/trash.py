@@ -0,0 +1,267 @@
+# trash.py — tombstone-first delete / restore / purge for user folders
+# (the user app's subset of admin/trash.py: no crash recovery or async purge)
+from __future__ import annotations
+import os, json, time, shutil, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+META_SUFFIX = ".trash.json"
+PARTIAL_SUFFIX = ".partial"
+CHUNK = 1024 * 1024
+
+Progress = Callable[[int, int], None]          # (bytes_done, bytes_total)
+Done = Callable[[Optional[str]], None]         # error message or None
+
+class TrashCancelled(Exception):
+    pass
+
+def _same_device(a: str, b: str) -> bool:
+    try:
+        return os.stat(a).st_dev == os.stat(b).st_dev
+    except OSError:
+        return False
+
+def _tree_size(path: str) -> int:
+    total = 0
+    for dirpath, _dirs, names in os.walk(path):
+        for n in names:
+            try:
+                total += os.lstat(os.path.join(dirpath, n)).st_size
+            except OSError:
+                pass
+    return total
+
+class TrashJob:
+    """Background part of a move (cross-device copy or deletion)."""
+    def __init__(self):
+        self._cancel = threading.Event()
+        self.finished = threading.Event()
+        self.error: Optional[str] = None
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self.finished.wait(timeout)
+
+class TrashBin:
+    """
+    Deleted folders go to ``trash_dir/<entry>``, with ``<entry>.trash.json``
+    recording where they came from.
+
+    move() first renames the folder to a hidden tombstone next to it
+    (``.<name>.deleting``, same device, so it is instant and the folder
+    drops out of listings at once). When the trash is on the same device
+    the tombstone is then renamed into place and the job is already done;
+    otherwise it is copied over in chunks on a worker thread, then the
+    tombstone is removed. A failed or cancelled copy renames the tombstone
+    back. restore() is the same in reverse, and purge() removes entries
+    older than a given age.
+    """
+    def __init__(self, trash_dir: str):
+        self.trash_dir = trash_dir
+        os.makedirs(trash_dir, exist_ok=True)
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="trash")
+
+    # ---- metadata ----
+    def _meta_path(self, entry: str) -> str:
+        return os.path.join(self.trash_dir, entry + META_SUFFIX)
+
+    def _write_meta(self, entry: str, meta: dict) -> None:
+        tmp = self._meta_path(entry) + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._meta_path(entry))
+
+    def _read_meta(self, entry: str) -> dict:
+        try:
+            with open(self._meta_path(entry), "r", encoding="utf-8") as f:
+                return json.load(f) or {}
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _tombstone(path: str) -> str:
+        parent, name = os.path.split(os.path.normpath(path))
+        return os.path.join(parent, f".{name}.deleting")
+
+    # ---- copy engine ----
+    def _copy_tree(self, src: str, dst: str, job: TrashJob, progress: Optional[Progress]) -> None:
+        total = _tree_size(src)
+        done = 0
+        for dirpath, dirs, names in os.walk(src):
+            rel = os.path.relpath(dirpath, src)
+            out_dir = os.path.normpath(os.path.join(dst, rel))
+            os.makedirs(out_dir, exist_ok=True)
+            for n in names:
+                s = os.path.join(dirpath, n)
+                d = os.path.join(out_dir, n)
+                with open(s, "rb") as fi, open(d, "wb") as fo:
+                    while True:
+                        if job.cancelled:
+                            raise TrashCancelled()
+                        buf = fi.read(CHUNK)
+                        if not buf:
+                            break
+                        fo.write(buf)
+                        done += len(buf)
+                        if progress:
+                            progress(done, total)
+                shutil.copystat(s, d)
+            shutil.copystat(dirpath, out_dir)
+
+    def _relocate(self, src: str, dst: str, job: TrashJob, progress: Optional[Progress],
+                  on_success: Callable[[], None], rollback: Callable[[], None],
+                  done: Optional[Done]) -> None:
+        """Copy ``src`` to ``dst`` via ``dst.partial``, then drop ``src``; runs on the pool."""
+        partial = dst + PARTIAL_SUFFIX
+        try:
+            shutil.rmtree(partial, ignore_errors=True)
+            self._copy_tree(src, partial, job, progress)
+            os.rename(partial, dst)
+            on_success()
+            shutil.rmtree(src, ignore_errors=True)
+        except Exception as e:
+            job.error = "cancelled" if isinstance(e, TrashCancelled) else str(e)
+            shutil.rmtree(partial, ignore_errors=True)
+            try:
+                rollback()
+            except OSError as re_err:
+                job.error += f" (rollback failed: {re_err})"
+        finally:
+            job.finished.set()
+            if done:
+                done(job.error)
+
+    # ---- API ----
+    def move(self, src: str, entry: str, *, progress: Optional[Progress] = None,
+             done: Optional[Done] = None) -> TrashJob:
+        """
+        Move folder ``src`` to the trash as ``entry``. Returns once ``src``
+        is gone from its parent (a rename); any copying continues on the
+        worker and reports through ``progress``/``done``. Raises OSError if
+        even the tombstone rename fails.
+        """
+        src = os.path.normpath(src)
+        dst = os.path.join(self.trash_dir, entry)
+        if os.path.exists(dst):
+            raise FileExistsError(dst)
+        meta = {"origin": src, "deleted_at": time.time(), "state": "moving"}
+        job = TrashJob()
+        if _same_device(os.path.dirname(src), self.trash_dir):
+            os.rename(src, dst)
+            meta["state"] = "done"
+            self._write_meta(entry, meta)
+            job.finished.set()
+            if done:
+                done(None)
+            return job
+        tomb = self._tombstone(src)
+        meta["tombstone"] = tomb
+        self._write_meta(entry, meta)      # before the rename, so an interrupted move is on record
+        try:
+            os.rename(src, tomb)
+        except OSError:
+            os.remove(self._meta_path(entry))
+            raise
+
+        def ok():
+            meta["state"] = "done"
+            meta.pop("tombstone", None)
+            self._write_meta(entry, meta)
+
+        def back():
+            os.rename(tomb, src)
+            try:
+                os.remove(self._meta_path(entry))
+            except OSError:
+                pass
+
+        self._pool.submit(self._relocate, tomb, dst, job, progress, ok, back, done)
+        return job
+
+    def discard(self, src: str, *, done: Optional[Done] = None) -> TrashJob:
+        """Delete ``src`` permanently: instant tombstone rename, removal in the background."""
+        tomb = self._tombstone(src)
+        os.rename(src, tomb)
+        job = TrashJob()
+
+        def run():
+            shutil.rmtree(tomb, ignore_errors=True)
+            job.finished.set()
+            if done:
+                done(None)
+
+        self._pool.submit(run)
+        return job
+
+    def restore(self, entry: str, dest: Optional[str] = None, *,
+                progress: Optional[Progress] = None, done: Optional[Done] = None) -> TrashJob:
+        """Put ``entry`` back at its origin (or ``dest``); raises if that path is taken."""
+        meta = self._read_meta(entry)
+        dest = os.path.normpath(dest or meta.get("origin") or "")
+        src = os.path.join(self.trash_dir, entry)
+        if not dest or not os.path.isdir(src):
+            raise FileNotFoundError(entry)
+        if os.path.exists(dest):
+            raise FileExistsError(dest)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        job = TrashJob()
+
+        def ok():
+            try:
+                os.remove(self._meta_path(entry))
+            except OSError:
+                pass
+
+        if _same_device(os.path.dirname(dest), self.trash_dir):
+            os.rename(src, dest)
+            ok()
+            job.finished.set()
+            if done:
+                done(None)
+            return job
+        self._pool.submit(self._relocate, src, dest, job, progress, ok, lambda: None, done)
+        return job
+
+    def entries(self) -> List[Dict]:
+        """Trash contents, newest first: {'entry', 'origin', 'deleted_at', 'state'}."""
+        out = []
+        try:
+            names = os.listdir(self.trash_dir)
+        except OSError:
+            return out
+        for n in names:
+            p = os.path.join(self.trash_dir, n)
+            if n.endswith((META_SUFFIX, PARTIAL_SUFFIX, ".tmp")) or not os.path.isdir(p):
+                continue
+            meta = self._read_meta(n)
+            try:
+                deleted_at = float(meta.get("deleted_at") or os.stat(p).st_mtime)
+            except OSError:
+                continue
+            out.append({"entry": n, "origin": meta.get("origin"), "deleted_at": deleted_at,
+                        "state": meta.get("state", "done")})
+        out.sort(key=lambda e: -e["deleted_at"])
+        return out
+
+    def purge(self, max_age: float, *, now: Optional[float] = None) -> Tuple[int, int]:
+        """Permanently remove entries older than ``max_age`` seconds; returns (entries, bytes)."""
+        cutoff = (now or time.time()) - max_age
+        count = freed = 0
+        for e in self.entries():
+            if e["deleted_at"] > cutoff or e["state"] != "done":
+                continue
+            p = os.path.join(self.trash_dir, e["entry"])
+            freed += _tree_size(p)
+            shutil.rmtree(p, ignore_errors=True)
+            try:
+                os.remove(self._meta_path(e["entry"]))
+            except OSError:
+                pass
+            count += 1
+        return count, freed